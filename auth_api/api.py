@@ -1,20 +1,36 @@
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.views.decorators.csrf import csrf_protect
 from django.utils.decorators import method_decorator
 
 from rest_framework import status, views
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.response import Response
 
+from . authentication import get_token
+from . login import LoginPoolFull, allow_attempt, check_credentials
 from . serializers import UserSerializer
+from . tokens import issue_token, revoke_token
 
 
 class LoginView(views.APIView):
+    # A stale token left in the client's headers mustn't prevent logging in.
+    authentication_classes = (SessionAuthentication,)
 
     def post(self, request):
-        user = authenticate(
-            username=request.data.get("username"),
-            password=request.data.get("password")
-        )
+        username = request.data.get("username")
+        if not allow_attempt(username):
+            return Response({
+                'status': 'Too Many Requests',
+                'message': 'Too many login attempts, try again later'
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        try:
+            user = check_credentials(username, request.data.get("password"))
+        except LoginPoolFull:
+            return Response({
+                'status': 'Service Unavailable',
+                'message': 'Too many logins in progress, try again shortly'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
 
         if user is None or not user.is_active:
             return Response({
@@ -23,10 +39,19 @@ class LoginView(views.APIView):
             }, status=status.HTTP_401_UNAUTHORIZED)
 
         login(request, user)
-        return Response(UserSerializer(user).data)
+        data = UserSerializer(user).data
+        # The session still serves the pages and the scrumboard event stream,
+        # the token authenticates API calls without it.
+        data['token'] = issue_token(user)
+        return Response(data)
 
 class LogoutView(views.APIView):
+    # The token is revoked below whether or not it is still valid.
+    authentication_classes = (SessionAuthentication,)
 
     def get(self, request):
+        token = get_token(request)
+        if token is not None:
+            revoke_token(token)
         logout(request)
         return Response({}, status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,43 @@
+from rest_framework import authentication, exceptions
+
+from . tokens import ExpiredToken, InvalidToken, load_token, token_user
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticates "Authorization: Bearer <token>" headers carrying tokens
+    issued by LoginView, without reading the user or the session. See
+    auth_api/tokens.py.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        token = get_token(request)
+        if token is None:
+            return None
+        try:
+            payload = load_token(token)
+        except ExpiredToken:
+            # Let the session, if any, authenticate the request instead.
+            return None
+        except InvalidToken as error:
+            raise exceptions.AuthenticationFailed(str(error))
+        return token_user(payload), token
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+def get_token(request):
+    """
+    Returns the token of the request's Authorization header, if any.
+    """
+    header = authentication.get_authorization_header(request).split()
+    if not header or header[0].lower() != SignedTokenAuthentication.keyword.lower().encode():
+        return None
+    if len(header) != 2:
+        raise exceptions.AuthenticationFailed('Invalid token header.')
+    try:
+        return header[1].decode('ascii')
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed('Invalid token header.')
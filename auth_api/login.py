@@ -0,0 +1,136 @@
+"""
+Login pipeline for auth_api.LoginView.
+
+Checking a password costs tens of milliseconds of CPU with the default
+PBKDF2 hasher, so a burst of logins can tie up every worker at once. Two
+settings bound that work:
+
+AUTH_API_LOGIN_RATE limits the login attempts per username in each window
+of AUTH_API_LOGIN_RATE_WINDOW seconds, so that scripts retrying a login
+can't keep the workers busy hashing. The attempts are counted in the
+AUTH_API_LOGIN_RATE_CACHE cache, which must be shared by every process for
+the limit to hold across them. The database cache doesn't increment
+atomically, so concurrent attempts may be undercounted by a few.
+
+AUTH_API_LOGIN_THREADS, when set, checks passwords in a thread pool of that
+size instead of in the request's own thread, bounding how many passwords a
+process hashes at once. The request's thread still waits for its check, so
+the pool doesn't free workers; it keeps logins from using every CPU. At most
+AUTH_API_LOGIN_QUEUE logins wait for a thread; any more are turned away
+straight away (with LoginPoolFull) rather than tying up their workers
+queueing behind the rest.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+from django.utils.crypto import salted_hmac
+
+
+class LoginPoolFull(Exception):
+    """
+    Raised when too many logins are already waiting for a password check.
+    """
+
+
+def attempt_cache():
+    return caches[getattr(settings, 'AUTH_API_LOGIN_RATE_CACHE', 'shared')]
+
+
+def attempt_key(username):
+    # Hashed, as usernames can contain characters memcached keys can't.
+    return 'auth_api:login:{0}'.format(salted_hmac('auth_api.login', str(username).lower()).hexdigest())
+
+
+def allow_attempt(username):
+    """
+    Counts a login attempt for the username and tells whether it is within
+    AUTH_API_LOGIN_RATE attempts for the current window.
+    """
+    rate = getattr(settings, 'AUTH_API_LOGIN_RATE', None)
+    if rate is None:
+        return True
+    cache = attempt_cache()
+    key = attempt_key(username)
+    window = getattr(settings, 'AUTH_API_LOGIN_RATE_WINDOW', 60)
+    if cache.add(key, 1, window):
+        return True
+    try:
+        return cache.incr(key) <= rate
+    except ValueError:
+        # The window expired between add() and incr().
+        cache.add(key, 1, window)
+        return True
+
+
+class LoginPool(object):
+    """
+    Thread pool checking passwords, with a bounded number of waiting logins.
+    """
+
+    def __init__(self, threads, queue_size):
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._slots = threading.BoundedSemaphore(threads + queue_size)
+
+    def authenticate(self, **credentials):
+        if not self._slots.acquire(blocking=False):
+            raise LoginPoolFull()
+        try:
+            return self._executor.submit(self._authenticate, credentials).result()
+        finally:
+            self._slots.release()
+
+    def _authenticate(self, credentials):
+        try:
+            return authenticate(**credentials)
+        finally:
+            # Pool threads don't see request_finished, close their connections.
+            close_old_connections()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_login_pool():
+    """
+    Returns the pool configured by AUTH_API_LOGIN_THREADS, or None when
+    passwords are checked in the request's thread.
+    """
+    global _pool
+    threads = getattr(settings, 'AUTH_API_LOGIN_THREADS', None)
+    if threads is None:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = LoginPool(threads, getattr(settings, 'AUTH_API_LOGIN_QUEUE', 32))
+        return _pool
+
+
+@receiver(setting_changed)
+def reset_login_pool(setting, **kwargs):
+    global _pool
+    if setting in ('AUTH_API_LOGIN_THREADS', 'AUTH_API_LOGIN_QUEUE'):
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = None
+
+
+def check_credentials(username, password):
+    """
+    Returns the user with these credentials, or None. Raises LoginPoolFull
+    when the login pool has no room left.
+    """
+    pool = get_login_pool()
+    if pool is None:
+        return authenticate(username=username, password=password)
+    return pool.authenticate(username=username, password=password)
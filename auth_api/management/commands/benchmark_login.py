@@ -0,0 +1,99 @@
+import json
+import os
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+# Settings of each login pipeline compared, see auth_api/login.py.
+PIPELINES = [
+    ('db sessions, inline (old)', {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTH_API_LOGIN_RATE': None,
+        'AUTH_API_LOGIN_THREADS': None,
+    }),
+    ('db sessions, pool', {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTH_API_LOGIN_RATE': 10,
+        'AUTH_API_LOGIN_THREADS': 4,
+    }),
+]
+
+USERNAME_PREFIX = 'benchmark-login-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures logins per second through /auth_api/login/ on one core with '
+        'the old and the current login pipeline, along with a storm of retried '
+        'bad passwords. The users are created and deleted again, as the '
+        'password checks run in other threads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=100,
+                            help='Number of users logging in.')
+        parser.add_argument('--retries', type=int, default=20,
+                            help='Bad passwords tried per user in the storm.')
+        parser.add_argument('--all-cores', action='store_true',
+                            help='Do not pin the process to a single core.')
+
+    def handle(self, *args, **options):
+        if not options['all_cores'] and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+        # Left over if a previous run was interrupted.
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        # Every user gets the same password, so the setup hashes it once.
+        password = 'benchmark password'
+        User.objects.bulk_create(
+            [User(username='{0}{1}'.format(USERNAME_PREFIX, num), password=make_password(password))
+             for num in range(options['logins'])],
+            batch_size=500,
+        )
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for label, pipeline in PIPELINES:
+                    with override_settings(**pipeline):
+                        self.benchmark(label, options['logins'], options['retries'], password)
+        finally:
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def login(self, client, username, password):
+        return client.post('/auth_api/login/', json.dumps({'username': username, 'password': password}),
+                           content_type='application/json')
+
+    def benchmark(self, label, logins, retries, password):
+        cache.clear()
+        usernames = ['{0}{1}'.format(USERNAME_PREFIX, num) for num in range(logins)]
+        clients = [Client() for username in usernames]
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for client, username in zip(clients, usernames):
+                assert self.login(client, username, password).status_code == 200
+            elapsed = time.perf_counter() - started
+        # Queries of the request threads only, the pool threads have their own connections.
+        login_queries = len(queries) / logins
+        with CaptureQueriesContext(connection) as queries:
+            for client in clients:
+                client.get('/scrumboard/sync/', {'since': 0})
+        request_queries = len(queries) / logins
+
+        started = time.perf_counter()
+        statuses = {}
+        for username in usernames:
+            for retry in range(retries):
+                status = self.login(Client(), username, 'wrong').status_code
+                statuses[status] = statuses.get(status, 0) + 1
+        storm_elapsed = time.perf_counter() - started
+
+        self.stdout.write(label)
+        self.stdout.write('  logins:    {0:8.1f} /s  {1:4.1f} queries per login, {2:4.1f} per later request'.format(
+            logins / elapsed, login_queries, request_queries))
+        self.stdout.write('  bad retry: {0:8.1f} /s  responses {1}'.format(
+            logins * retries / storm_elapsed, ', '.join('{0}: {1}'.format(*item) for item in sorted(statuses.items()))))
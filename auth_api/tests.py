@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .login import attempt_cache
+from .tokens import issue_token, load_token, revocation_cache, revoke_token, revoked_key
+
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class BlockingBackend(ModelBackend):
+    """
+    Authentication backend holding every password check until released.
+    """
+    started = threading.Event()
+    release = threading.Event()
+
+    def authenticate(self, request, **credentials):
+        self.started.set()
+        self.release.wait(10)
+        return super(BlockingBackend, self).authenticate(request, **credentials)
+
+
+def login(client, username, password):
+    return client.post('/auth_api/login/', json.dumps({'username': username, 'password': password}),
+                       content_type='application/json')
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUTH_API_LOGIN_THREADS=None, AUTH_API_LOGIN_RATE=3)
+class LoginTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', password='12345')
+
+    def setUp(self):
+        attempt_cache().clear()
+
+    def test_login(self):
+        resp = login(self.client, 'user', '12345')
+        self.assertEqual(resp.json()['id'], self.user.pk)
+        self.assertEqual(resp.json()['username'], 'user')
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.user.pk)
+
+    def test_wrong_password(self):
+        self.assertEqual(login(self.client, 'user', 'wrong').status_code, 401)
+
+    def test_attempts_are_rate_limited_per_user(self):
+        for attempt in range(3):
+            self.assertEqual(login(self.client, 'user', 'wrong').status_code, 401)
+        self.assertEqual(login(self.client, 'USER', '12345').status_code, 429)
+        self.assertEqual(login(self.client, 'other', 'wrong').status_code, 401)
+
+    def test_attempts_are_counted_for_every_process(self):
+        for attempt in range(3):
+            login(self.client, 'user', 'wrong')
+        # Kept in the shared cache, not in this process' default cache.
+        cache.clear()
+        self.assertEqual(login(self.client, 'user', '12345').status_code, 429)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUTH_API_LOGIN_RATE=None)
+class LoginPoolTests(TransactionTestCase):
+    """
+    Password checks run in the pool's threads, which need committed users.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='12345')
+
+    @override_settings(AUTH_API_LOGIN_THREADS=2)
+    def test_login_in_pool(self):
+        self.assertEqual(login(self.client, 'user', '12345').status_code, 200)
+        self.assertEqual(login(self.client, 'user', 'wrong').status_code, 401)
+
+    @override_settings(AUTH_API_LOGIN_THREADS=1, AUTH_API_LOGIN_QUEUE=0,
+                       AUTHENTICATION_BACKENDS=['auth_api.tests.BlockingBackend'])
+    def test_full_pool_answers_503(self):
+        BlockingBackend.started.clear()
+        BlockingBackend.release.clear()
+        responses = []
+        waiting = threading.Thread(target=lambda: responses.append(login(self.client_class(), 'user', '12345')))
+        waiting.start()
+        self.assertTrue(BlockingBackend.started.wait(10))
+        resp = login(self.client, 'user', '12345')
+        BlockingBackend.release.set()
+        waiting.join()
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp['Retry-After'], '1')
+        self.assertEqual(responses[0].status_code, 200)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUTH_API_LOGIN_THREADS=None, AUTH_API_TOKEN_AGE=3600)
+class TokenTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', password='12345')
+
+    def setUp(self):
+        cache.clear()
+
+    def api_get(self, token):
+        return self.client.get(reverse('scrumboard:sync'), {'since': 0}, HTTP_AUTHORIZATION='Bearer ' + token)
+
+    def test_login_issues_token(self):
+        token = login(self.client, 'user', '12345').json()['token']
+        self.client.logout()
+        self.assertEqual(self.api_get(token).status_code, 200)
+
+    def test_token_costs_no_auth_queries(self):
+        token = issue_token(self.user)
+        with CaptureQueriesContext(connection) as first:
+            self.api_get(token)
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.api_get(token)
+        self.assertEqual(resp.status_code, 200)
+        # Only the queries of the sync view itself.
+        self.assertEqual([query['sql'] for query in queries if 'scrumboard_' not in query['sql']], [])
+        # The first request looked the token up in the shared cache.
+        lookups = [query['sql'] for query in first if 'scrumboard_' not in query['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertIn('go_shared_cache', lookups[0])
+
+    def test_revocations_by_other_processes(self):
+        token = issue_token(self.user)
+        self.assertEqual(self.api_get(token).status_code, 200)
+        # Revoked by another process, which leaves this process' cache alone.
+        revocation_cache().set(revoked_key(load_token(token)['jti']), True)
+        self.assertEqual(self.api_get(token).status_code, 200)
+        with self.settings(AUTH_API_REVOCATION_CHECK_INTERVAL=0):
+            self.assertEqual(self.api_get(token).status_code, 401)
+
+    def test_tampered_token(self):
+        token = issue_token(self.user)
+        self.assertEqual(self.api_get(token[:-1] + ('A' if token[-1] != 'A' else 'B')).status_code, 401)
+
+    def test_expired_token(self):
+        token = issue_token(self.user)
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 3601):
+            self.assertEqual(self.api_get(token).status_code, 401)
+
+    def test_expired_token_falls_back_to_session(self):
+        token = login(self.client, 'user', '12345').json()['token']
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 3601):
+            self.assertEqual(self.api_get(token).status_code, 200)
+
+    def test_revocations_are_shared(self):
+        token = issue_token(self.user)
+        revoke_token(token)
+        # Kept in the shared cache, not in this process' default cache.
+        cache.clear()
+        self.assertEqual(self.api_get(token).status_code, 401)
+
+    def test_logout_revokes_token(self):
+        token = login(self.client, 'user', '12345').json()['token']
+        resp = self.client.get('/auth_api/logout/', HTTP_AUTHORIZATION='Bearer ' + token)
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(self.api_get(token).status_code, 401)
+        # Logging in again with the stale token still in the headers works.
+        resp = self.client.post('/auth_api/login/', json.dumps({'username': 'user', 'password': '12345'}),
+                                content_type='application/json', HTTP_AUTHORIZATION='Bearer ' + token)
+        self.assertEqual(resp.status_code, 200)
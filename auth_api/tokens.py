@@ -0,0 +1,115 @@
+"""
+Signed, expiring API tokens.
+
+A token is the user's id, username and staff flag signed with SECRET_KEY
+(django.core.signing) along with the time it was issued, so checking one
+needs neither the session nor the user table. Tokens expire after
+AUTH_API_TOKEN_AGE seconds. Each token also carries a random id, which
+revoke_token() adds to a revocation list kept until the token would have
+expired anyway. The list is kept in the AUTH_API_REVOCATION_CACHE cache,
+which must be shared by every process (the 'shared' cache by default) so
+that a token revoked by one is refused by all of them.
+
+With the shipped settings that cache is in the database (its table is
+created by migration 0001), so looking a token up costs a query. The
+tokens found not revoked are therefore remembered in the process' default
+cache for AUTH_API_REVOCATION_CHECK_INTERVAL seconds, during which their
+requests cost no query at all, and during which a revocation made by
+another process isn't seen yet. With the 'shared' cache on memcached every
+lookup is query-free, and the interval can be set to 0.
+
+An expired token isn't an error: SignedTokenAuthentication ignores it, so
+the request falls back to the session, and the scrumboard client drops it
+on the first 401 (see auth-token.service.js).
+
+As the user isn't read back, a token stays valid for its lifetime even if
+the user is deactivated, unless it is revoked.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import caches
+from django.utils.crypto import get_random_string
+
+
+SALT = 'auth_api.tokens'
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class ExpiredToken(InvalidToken):
+    pass
+
+
+def get_token_age():
+    return getattr(settings, 'AUTH_API_TOKEN_AGE', 3600)
+
+
+def issue_token(user):
+    payload = {
+        'id': user.pk,
+        'username': user.get_username(),
+        'staff': user.is_staff,
+        'jti': get_random_string(12),
+    }
+    return signing.dumps(payload, salt=SALT)
+
+
+def load_token(token):
+    """
+    Returns the payload of a valid token. Raises ExpiredToken if the token
+    has expired, InvalidToken if it was tampered with or revoked.
+    """
+    try:
+        payload = signing.loads(token, salt=SALT, max_age=get_token_age())
+    except signing.SignatureExpired:
+        raise ExpiredToken('Token has expired.')
+    except signing.BadSignature:
+        raise InvalidToken('Invalid token.')
+    if is_revoked(payload['jti']):
+        raise InvalidToken('Token has been revoked.')
+    return payload
+
+
+def is_revoked(jti):
+    """
+    Looks the token id up in the revocation list, unless this process found
+    it not revoked less than AUTH_API_REVOCATION_CHECK_INTERVAL seconds ago.
+    """
+    interval = getattr(settings, 'AUTH_API_REVOCATION_CHECK_INTERVAL', 30)
+    key = revoked_key(jti)
+    if interval and caches['default'].get(key) is False:
+        return False
+    revoked = bool(revocation_cache().get(key))
+    if interval and not revoked:
+        caches['default'].set(key, False, interval)
+    return revoked
+
+
+def token_user(payload):
+    """
+    Builds the user of a token payload without querying the database.
+    """
+    return User(pk=payload['id'], username=payload['username'], is_staff=payload['staff'], is_active=True)
+
+
+def revocation_cache():
+    return caches[getattr(settings, 'AUTH_API_REVOCATION_CACHE', 'shared')]
+
+
+def revoked_key(jti):
+    return 'auth_api:revoked:{0}'.format(jti)
+
+
+def revoke_token(token):
+    """
+    Revokes a valid token until it expires. Invalid tokens are ignored.
+    """
+    try:
+        payload = load_token(token)
+    except InvalidToken:
+        return
+    revocation_cache().set(revoked_key(payload['jti']), True, get_token_age())
+    caches['default'].delete(revoked_key(payload['jti']))
@@ -0,0 +1,288 @@
+"""
+Deterministic benchmark dataset.
+
+seed() fills an empty database with generated users, catalog, polls, blog
+and scrumboard data. The rows come from a random.Random seeded with a fixed
+value, so every run produces the same titles, links and statuses (dates are
+relative to the day of the run). Rows are inserted with bulk_create() in
+batches, each batch in its own transaction, and only the ids of earlier
+batches are kept in memory.
+"""
+import itertools
+from contextlib import contextmanager
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from blog.models import Post
+from catalog.models import Author, Book, BookInstance, Genre, Language
+from catalog.search import rebuild_search_index
+from catalog.stats import rebuild_library_stats
+from polls.models import Choice, Question
+from scrumboard.bulk import bulk_create
+from scrumboard.models import Card, List, Revision
+
+
+# Number of rows of each kind at scale 1.
+SIZES = {
+    'users': 1000,
+    'genres': 50,
+    'languages': 20,
+    'authors': 20000,
+    'books': 100000,
+    'book_instances': 1000000,
+    'questions': 10000,
+    'choices_per_question': 4,
+    'posts': 50000,
+    'lists': 200,
+    'cards_per_list': 50,
+}
+
+PASSWORD = 'benchmark'
+
+WORDS = (
+    'river stone night garden winter silver empire shadow ocean letter city storm '
+    'house forest crown glass dream island mountain secret fire paper summer road '
+    'voice bridge machine memory thunder harbor lantern orchard desert mirror'
+).split()
+
+
+# Share of the book instances in each status, in percent.
+STATUS_WEIGHTS = (('a', 50), ('o', 30), ('r', 12), ('m', 8))
+# Share of the loans that are overdue.
+OVERDUE_SHARE = 0.15
+
+# Sizes relative to another row, which don't scale.
+PER_ROW_SIZES = ('choices_per_question', 'cards_per_list')
+
+
+def scaled_sizes(scale):
+    """
+    Returns SIZES multiplied by scale, with at least one row of each kind.
+    """
+    return {name: size if name in PER_ROW_SIZES else max(1, int(round(size * scale)))
+            for name, size in SIZES.items()}
+
+
+def words(rng, count):
+    return ' '.join(rng.choices(WORDS, k=count))
+
+
+def insert(model, objs):
+    """
+    Inserts objs in one transaction and returns their primary keys.
+    """
+    with transaction.atomic():
+        return [obj.pk for obj in bulk_create(model, objs)]
+
+
+@contextmanager
+def fast_inserts():
+    """
+    On SQLite, stops waiting for every commit to reach the disk and gives
+    the page cache 256 MB while seeding. A crash halfway can then leave the
+    database corrupt, which is fine for generated data. SQLite doesn't allow
+    this inside a transaction, where nothing is changed.
+    """
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous = cursor.fetchone()[0]
+        cursor.execute('PRAGMA cache_size')
+        cache_size = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = OFF')
+        cursor.execute('PRAGMA cache_size = -262144')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = {0:d}'.format(synchronous))
+            cursor.execute('PRAGMA cache_size = {0:d}'.format(cache_size))
+
+
+def open_database(name):
+    """
+    Points the default connection at the benchmark database of that name,
+    which is created and migrated if needed, and kept afterwards so that
+    the dataset is only generated once.
+    """
+    connection.settings_dict['TEST'] = dict(connection.settings_dict.get('TEST') or {}, NAME=name)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=True)
+
+
+def analyze():
+    """
+    Updates the table statistics of the query planner, which
+    go.paginator also reads the row counts of large tables from.
+    """
+    if connection.vendor in ('sqlite', 'postgresql'):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(batch_size, total - start)
+
+
+class Seeder(object):
+    """
+    Generates the dataset, committing every batch_size rows (the rows per
+    INSERT are left to the database backend). progress, if given, is called
+    with a label, the number of rows done and the total after every batch.
+    """
+
+    def __init__(self, sizes, seed=0, batch_size=5000, progress=None):
+        self.sizes = sizes
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.progress = progress or (lambda label, done, total: None)
+        self.now = timezone.now()
+        self.today = self.now.date()
+        self.statuses = [status for status, weight in STATUS_WEIGHTS]
+        self.status_weights = list(itertools.accumulate(weight for status, weight in STATUS_WEIGHTS))
+
+    def seed(self):
+        with fast_inserts():
+            self.seed_users()
+            self.seed_catalog()
+            self.seed_polls()
+            self.seed_blog()
+            self.seed_scrumboard()
+        # bulk_create() doesn't send the signals that keep these up to date.
+        rebuild_library_stats()
+        rebuild_search_index()
+        analyze()
+
+    def seed_users(self):
+        password = make_password(PASSWORD)
+        users = [User(username='reader{0}'.format(num), password=password) for num in range(self.sizes['users'])]
+        self.user_ids = insert(User, users)
+        self.progress('users', len(self.user_ids), self.sizes['users'])
+
+    def seed_catalog(self):
+        rng = self.rng
+        self.genre_ids = insert(Genre, [Genre(name='Genre {0}'.format(num)) for num in range(self.sizes['genres'])])
+        self.language_ids = insert(
+            Language, [Language(name='Language {0}'.format(num)) for num in range(self.sizes['languages'])])
+
+        self.author_ids = []
+        for start, count in batches(self.sizes['authors'], self.batch_size):
+            authors = [Author(first_name=words(rng, 1).title(), last_name='{0}{1}'.format(words(rng, 1).title(), num),
+                              date_of_birth=self.today - timedelta(days=rng.randint(20 * 365, 90 * 365)))
+                       for num in range(start, start + count)]
+            self.author_ids.extend(insert(Author, authors))
+            self.progress('authors', len(self.author_ids), self.sizes['authors'])
+
+        self.book_ids = []
+        through = Book.genre.through
+        for start, count in batches(self.sizes['books'], self.batch_size):
+            books = [Book(title=words(rng, rng.randint(1, 5)).title(), summary=words(rng, 40),
+                          isbn='{0:013d}'.format(num), author_id=rng.choice(self.author_ids),
+                          language_id=rng.choice(self.language_ids))
+                     for num in range(start, start + count)]
+            with transaction.atomic():
+                book_ids = [book.pk for book in bulk_create(Book, books)]
+                # The many-to-many rows are written directly, without Book.genre.add().
+                through.objects.bulk_create(
+                    [through(book_id=book_id, genre_id=genre_id)
+                     for book_id in book_ids for genre_id in rng.sample(self.genre_ids, rng.randint(1, min(3, len(self.genre_ids))))])
+            self.book_ids.extend(book_ids)
+            self.progress('books', len(self.book_ids), self.sizes['books'])
+
+        done = 0
+        for start, count in batches(self.sizes['book_instances'], self.batch_size):
+            with transaction.atomic():
+                BookInstance.objects.bulk_create(
+                    [self.book_instance(rng) for num in range(count)])
+            done += count
+            self.progress('book instances', done, self.sizes['book_instances'])
+
+    def book_instance(self, rng):
+        status = rng.choices(self.statuses, cum_weights=self.status_weights)[0]
+        due_back = borrower_id = None
+        if status == 'o':
+            # Most loans are due in the coming four weeks, the rest are overdue.
+            if rng.random() < OVERDUE_SHARE:
+                due_back = self.today - timedelta(days=rng.randint(1, 60))
+            else:
+                due_back = self.today + timedelta(days=rng.randint(0, 28))
+            borrower_id = rng.choice(self.user_ids)
+        # bulk_create() skips BookInstance.save(), which sets overdue.
+        return BookInstance(id=uuid.UUID(int=rng.getrandbits(128), version=4), book_id=rng.choice(self.book_ids),
+                            imprint='{0} Press, {1}'.format(words(rng, 1).title(), rng.randint(1950, 2018)),
+                            status=status, due_back=due_back, borrower_id=borrower_id,
+                            overdue=due_back is not None and due_back < self.today)
+
+    def seed_polls(self):
+        rng = self.rng
+        done = 0
+        per_question = self.sizes['choices_per_question']
+        for start, count in batches(self.sizes['questions'], self.batch_size):
+            questions = [Question(question_text=words(rng, rng.randint(3, 8)).capitalize() + '?',
+                                  pub_date=self.now - timedelta(minutes=rng.randint(1, 60 * 24 * 365)))
+                         for num in range(count)]
+            with transaction.atomic():
+                question_ids = [question.pk for question in bulk_create(Question, questions)]
+                Choice.objects.bulk_create(
+                    [Choice(question_id=question_id, choice_text=words(rng, 2), votes=rng.randint(0, 1000))
+                     for question_id in question_ids for num in range(per_question)])
+            done += count
+            self.progress('questions', done, self.sizes['questions'])
+
+    def seed_blog(self):
+        rng = self.rng
+        done = 0
+        for start, count in batches(self.sizes['posts'], self.batch_size):
+            posts = []
+            for num in range(count):
+                text = '\n\n'.join(words(rng, 60) for paragraph in range(rng.randint(2, 6)))
+                created = self.now - timedelta(minutes=rng.randint(1, 60 * 24 * 365 * 3))
+                # bulk_create() skips Post.save(), which fills in the excerpt.
+                posts.append(Post(author_id=rng.choice(self.user_ids), title=words(rng, 4).title(), text=text,
+                                  excerpt=Truncator(text).chars(Post.EXCERPT_LENGTH), created_date=created,
+                                  published_date=created if rng.random() < 0.9 else None))
+            with transaction.atomic():
+                Post.objects.bulk_create(posts)
+            done += count
+            self.progress('posts', done, self.sizes['posts'])
+
+    def seed_scrumboard(self):
+        rng = self.rng
+        with transaction.atomic():
+            revision = Revision.bump()
+            lists = [List(name='List {0}'.format(num), revision=revision) for num in range(self.sizes['lists'])]
+            list_ids = [board_list.pk for board_list in bulk_create(List, lists)]
+            Card.objects.bulk_create(
+                [Card(list_id=list_id, title=words(rng, 3).capitalize(), description=words(rng, 20),
+                      story_points=rng.choice((None, 1, 2, 3, 5, 8, 13)), buisness_value=rng.choice((None, 1, 2, 3)),
+                      revision=revision)
+                 for list_id in list_ids for num in range(self.sizes['cards_per_list'])])
+        self.progress('lists', len(list_ids), self.sizes['lists'])
+
+
+def seed(sizes, **kwargs):
+    Seeder(sizes, **kwargs).seed()
+
+
+def is_seeded():
+    return Book.objects.exists()
+
+
+# Models counted in the dataset sizes of benchmark reports.
+COUNTED_MODELS = (User, Author, Book, BookInstance, Question, Choice, Post, List, Card)
+
+
+def dataset_sizes():
+    """
+    Returns the number of rows of each counted model.
+    """
+    return {model._meta.label: model.objects.count() for model in COUNTED_MODELS}
@@ -0,0 +1,39 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import dataset, search
+from catalog.search import has_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the full-text search of the catalog with icontains filters on the '
+        'generated dataset of the benchmark database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='benchmark_db.sqlite3',
+                            help='Name of the benchmark database, kept between runs.')
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Size of the dataset generated if the database has none.')
+        parser.add_argument('--query', action='append', dest='queries',
+                            help='Search for this query (can be repeated).')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of timed runs of each search.')
+
+    def handle(self, *args, **options):
+        dataset.open_database(options['database'])
+        if not has_search_index():
+            raise CommandError('The full-text search index needs SQLite.')
+        if not dataset.is_seeded():
+            self.stdout.write('Generating the dataset at scale {0}:'.format(options['scale']))
+            call_command('seed_data', scale=options['scale'])
+
+        self.stdout.write('{0:<30} {1:>9} {2:>10} {3:>13} {4:>8}'.format(
+            'query', 'matches', 'fts ms', 'icontains ms', 'speedup'))
+        search.run(options['queries'], options['repeat'], progress=self.show_result)
+
+    def show_result(self, query, result):
+        speedup = result['icontains_ms'] / result['fts_ms'] if result['fts_ms'] else float('inf')
+        self.stdout.write('{0:<30} {1:>9,d} {2:>10.2f} {3:>13.2f} {4:>7.0f}x'.format(
+            query, result['fts_matches'], result['fts_ms'], result['icontains_ms'], speedup))
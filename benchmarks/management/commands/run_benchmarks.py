@@ -0,0 +1,65 @@
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from benchmarks import dataset, suite
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks every named URL of the catalog, polls, blog, scrumboard and '
+        'auth_api apps against a generated dataset in a separate database, and '
+        'saves the requests per second and query counts as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='benchmark_db.sqlite3',
+                            help='Name of the benchmark database, kept between runs.')
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Size of the generated dataset, 1 being 100k books and 1M copies.')
+        parser.add_argument('--reseed', action='store_true',
+                            help='Regenerate the dataset even if the database already has one.')
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Number of timed requests per URL.')
+        parser.add_argument('--url', action='append', dest='urls',
+                            help='Only benchmark this URL name (can be repeated).')
+        parser.add_argument('--output',
+                            help='File to save the results to, benchmarks/results/<commit>.json by default.')
+        parser.add_argument('--compare',
+                            help='Results file of an earlier run to compare with.')
+
+    def handle(self, *args, **options):
+        dataset.open_database(options['database'])
+        cache.clear()
+
+        if options['reseed'] or not dataset.is_seeded():
+            self.stdout.write('Generating the dataset at scale {0}:'.format(options['scale']))
+            call_command('seed_data', scale=options['scale'], flush=options['reseed'])
+
+        results = suite.run(options['requests'], options['urls'], progress=self.show_result)
+        report = suite.build_report(results, dataset.dataset_sizes())
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', 'results', '{0}.json'.format(report['commit'] or report['created']))
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        suite.save_report(report, output)
+        self.stdout.write(self.style.SUCCESS('Results saved to {0}'.format(output)))
+
+        if options['compare']:
+            self.show_comparison(report, suite.load_report(options['compare']))
+
+    def show_result(self, name, result):
+        if 'skipped' in result:
+            self.stdout.write('{0:<40} skipped ({1})'.format(name, result['skipped']))
+            return
+        self.stdout.write('{0:<40} {1:3d} {2:9.1f} req/s {3:8.2f} ms p95 {4:5d} queries'.format(
+            name, result['status'], result['requests_per_second'], result['p95_ms'], result['queries']))
+
+    def show_comparison(self, report, baseline):
+        self.stdout.write('Compared with {0}:'.format(baseline['commit'] or baseline['created']))
+        for name, result, before in suite.compare(report, baseline):
+            change = result['requests_per_second'] / before['requests_per_second'] - 1
+            self.stdout.write('{0:<40} {1:+7.1%} req/s   queries {2} -> {3}'.format(
+                name, change, before['queries'], result['queries']))
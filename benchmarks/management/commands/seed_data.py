@@ -0,0 +1,57 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Fills the database with generated users, authors, books, book instances, '
+        'polls, blog posts and scrumboard cards, with batched bulk inserts. At scale 1 '
+        'that is 100k books and 1M book instances, a few minutes of work on SQLite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplies the default number of rows of each kind.')
+        for name, size in sorted(dataset.SIZES.items()):
+            parser.add_argument('--' + name.replace('_', '-'), type=int, dest=name,
+                                help='Number of {0}, {1} by default (times the scale).'.format(
+                                    name.replace('_', ' '), size))
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the random generator, the same seed generates the same data.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of rows inserted per transaction.')
+        parser.add_argument('--flush', action='store_true',
+                            help='Deletes ALL the data in the database first.')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            call_command('flush', interactive=False, verbosity=0)
+        elif dataset.is_seeded():
+            raise CommandError('The database already has books, use --flush to replace all its data.')
+
+        sizes = dataset.scaled_sizes(options['scale'])
+        sizes.update((name, options[name]) for name in dataset.SIZES if options[name] is not None)
+        self.label = None
+        started = self.last_progress = time.perf_counter()
+        dataset.seed(sizes, seed=options['seed'], batch_size=options['batch_size'], progress=self.show_progress)
+
+        rows = dataset.dataset_sizes()
+        for model, count in sorted(rows.items()):
+            self.stdout.write('{0:<24} {1:>10,d}'.format(model, count))
+        self.stdout.write(self.style.SUCCESS('Generated {0:,d} rows in {1:.0f} s.'.format(
+            sum(rows.values()), time.perf_counter() - started)))
+
+    def show_progress(self, label, done, total):
+        now = time.perf_counter()
+        if label != self.label:
+            # Each kind of row is generated right after the previous one.
+            self.label, self.label_started = label, self.last_progress
+        self.last_progress = now
+        rate = done / max(now - self.label_started, 1e-6)
+        self.stdout.write('\r{0:<16} {1:>10,d} / {2:,d} ({3:,.0f} rows/s)'.format(label, done, total, rate),
+                          ending='\n' if done == total else '')
+        self.stdout.flush()
@@ -0,0 +1,60 @@
+"""
+Benchmark of the catalog search: the FTS5 index of catalog/search.py against
+the icontains filters it replaced, on the same queries.
+
+Each query is timed as the search view runs it, counting the matches and
+reading the first page of books, and the median of the runs is kept. The
+default queries go from words found in most generated summaries to the name
+of a single author.
+"""
+import statistics
+import time
+
+from catalog.models import Author
+from catalog.search import SearchResults, icontains_search, search_terms
+
+QUERIES = ('lantern', 'silver harbor', 'mirror desert thunder')
+PAGE_SIZE = 20
+
+
+def default_queries():
+    """
+    Returns QUERIES and the full name of the first author, if any.
+    """
+    author = Author.objects.order_by('id').first()
+    return list(QUERIES) + ([str(author)] if author is not None else [])
+
+
+def time_search(results, repeat):
+    """
+    Returns the number of results and the median time of counting them and
+    reading the first page, in milliseconds.
+    """
+    durations = []
+    for num in range(repeat):
+        started = time.perf_counter()
+        count = results().count()
+        list(results()[:PAGE_SIZE])
+        durations.append(time.perf_counter() - started)
+    return count, round(statistics.median(durations) * 1000, 2)
+
+
+def run(queries=None, repeat=5, progress=None):
+    """
+    Times every query with both searches. Returns a dict with, for each
+    query, the number of matches and the median milliseconds of each search.
+    """
+    results = {}
+    for query in queries or default_queries():
+        terms = search_terms(query)
+        matches, fts_ms = time_search(lambda: SearchResults(terms), repeat)
+        icontains_matches, icontains_ms = time_search(lambda: icontains_search(terms), repeat)
+        results[query] = {
+            'fts_matches': matches,
+            'fts_ms': fts_ms,
+            'icontains_matches': icontains_matches,
+            'icontains_ms': icontains_ms,
+        }
+        if progress is not None:
+            progress(query, results[query])
+    return results
@@ -0,0 +1,211 @@
+"""
+HTTP benchmark of every named URL of the catalog, polls, blog, scrumboard
+and auth_api apps, and of the admin pages listing their largest tables.
+
+Each URL is requested through the Django test client, logged in as a
+superuser so that permission-protected pages are measured as well, after a
+warm-up request that also counts the queries. The URL arguments are taken
+from sample rows of the database (see Samples and URL_KWARGS), so the suite
+runs against any dataset, e.g. the one benchmarks.dataset generates.
+"""
+import json
+import subprocess
+import time
+from datetime import datetime
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import NoReverseMatch, get_resolver, reverse
+
+from blog.models import Post
+from go.middleware import RequestTimings
+from catalog.models import Author, Book, BookInstance
+from polls.models import Question
+from scrumboard.models import Card, List
+
+
+NAMESPACES = ('catalog', 'polls', 'blog', 'scrumboard')
+# auth_api's URLs aren't namespaced, they are listed from its URLconf.
+URLCONFS = ('auth_api.urls',)
+
+# Admin pages of the largest tables.
+ADMIN_URL_NAMES = (
+    'admin:catalog_author_changelist',
+    'admin:catalog_book_changelist',
+    'admin:catalog_bookinstance_changelist',
+    'admin:polls_question_changelist',
+    'admin:blog_post_changelist',
+)
+
+SUPERUSER = 'benchmark-admin'
+
+
+class Samples(object):
+    """
+    Ids of representative rows to fill in URL arguments with.
+    """
+
+    def __init__(self):
+        # The book with the most copies, and an author with books.
+        self.book = (Book.objects.annotate(copies=Count('bookinstance')).order_by('-copies', 'id')
+                     .values_list('id', flat=True).first())
+        self.author = (Book.objects.filter(pk=self.book).values_list('author', flat=True).first()
+                       or Author.objects.values_list('id', flat=True).first())
+        self.book_instance = (BookInstance.objects.filter(status='o').values_list('id', flat=True).first()
+                              or BookInstance.objects.values_list('id', flat=True).first())
+        self.question = Question.objects.order_by('-pub_date').values_list('id', flat=True).first()
+        self.post = Post.objects.filter(published_date__isnull=False).values_list('id', flat=True).first()
+        self.list = List.objects.values_list('id', flat=True).first()
+        self.card = Card.objects.values_list('id', flat=True).first()
+
+
+# Keyword arguments of the URLs that take any, from the Samples.
+URL_KWARGS = {
+    'catalog:book-detail': lambda samples: {'pk': samples.book},
+    'catalog:author-detail': lambda samples: {'pk': samples.author},
+    'catalog:renew-book-librarian': lambda samples: {'pk': samples.book_instance},
+    'catalog:author_update': lambda samples: {'pk': samples.author},
+    'catalog:author_delete': lambda samples: {'pk': samples.author},
+    'catalog:book_update': lambda samples: {'pk': samples.book},
+    'catalog:book_delete': lambda samples: {'pk': samples.book},
+    'polls:detail': lambda samples: {'pk': samples.question},
+    'polls:results': lambda samples: {'pk': samples.question},
+    'polls:results_json': lambda samples: {'pk': samples.question},
+    'polls:vote': lambda samples: {'question_id': samples.question},
+    'blog:post_detail': lambda samples: {'pk': samples.post},
+    'blog:post_edit': lambda samples: {'pk': samples.post},
+    'scrumboard:list-detail': lambda samples: {'pk': samples.list},
+    'scrumboard:card-detail': lambda samples: {'pk': samples.card},
+}
+
+# URLs that only take POST requests, which the suite doesn't make.
+POST_ONLY = ('scrumboard:card-bulk', 'scrumboard:card-move')
+
+# Query strings of the URLs that need one.
+URL_QUERIES = {
+    'catalog:search': {'q': 'silver lantern'},
+    'scrumboard:sync': {'since': 0},
+}
+
+
+def url_names():
+    """
+    Returns the names of the URLs to benchmark, in URLconf order.
+    """
+    resolver = get_resolver()
+    names = []
+    for namespace in NAMESPACES:
+        patterns = resolver.namespace_dict[namespace][1].url_patterns
+        names.extend('{0}:{1}'.format(namespace, pattern.name) for pattern in patterns if pattern.name)
+    for urlconf in URLCONFS:
+        names.extend(pattern.name for pattern in import_module(urlconf).urlpatterns if pattern.name)
+    names.extend(ADMIN_URL_NAMES)
+    # Routers add a format suffix variant of each URL under the same name.
+    return list(dict.fromkeys(names))
+
+
+def get_superuser():
+    user, created = User.objects.get_or_create(username=SUPERUSER, defaults={'is_staff': True, 'is_superuser': True})
+    return user
+
+
+def benchmark_url(user, path, query, requests):
+    """
+    Requests path repeatedly with a fresh client logged in as user. Returns
+    the status code, the queries of one request and the timings.
+    """
+    client = Client()
+    client.force_login(user)
+    # Warm-up request, also filling the caches the view uses.
+    client.get(path, query)
+    # Counted with a wrapper, as request_started clears connection.queries.
+    timings = RequestTimings()
+    with connection.execute_wrapper(timings.record_query):
+        response = client.get(path, query)
+    durations = []
+    for num in range(requests):
+        started = time.perf_counter()
+        client.get(path, query)
+        durations.append(time.perf_counter() - started)
+    total = sum(durations)
+    durations.sort()
+    return {
+        'path': path,
+        'status': response.status_code,
+        'queries': timings.queries,
+        'requests_per_second': round(requests / total, 1),
+        'mean_ms': round(total / requests * 1000, 2),
+        'p95_ms': round(durations[min(requests - 1, int(requests * 0.95))] * 1000, 2),
+    }
+
+
+def run(requests=20, names=None, progress=None):
+    """
+    Benchmarks the given URL names, all of them by default. Returns a dict
+    with a result for each name; URLs that couldn't be built are marked as
+    skipped with the reason.
+    """
+    samples = Samples()
+    user = get_superuser()
+    results = {}
+    # Views behave as in production, and don't log every query.
+    with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+        for name in names or url_names():
+            kwargs = URL_KWARGS.get(name, lambda samples: {})(samples)
+            if name in POST_ONLY:
+                results[name] = {'skipped': 'POST only'}
+            elif any(value is None for value in kwargs.values()):
+                results[name] = {'skipped': 'no sample row'}
+            else:
+                try:
+                    path = reverse(name, kwargs=kwargs)
+                except NoReverseMatch as error:
+                    results[name] = {'skipped': 'cannot reverse: {0}'.format(error)}
+                else:
+                    results[name] = benchmark_url(user, path, URL_QUERIES.get(name, {}), requests)
+            if progress is not None:
+                progress(name, results[name])
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                                       stderr=subprocess.DEVNULL).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results, sizes):
+    return {
+        'commit': current_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'database': connection.vendor,
+        'dataset': sizes,
+        'results': results,
+    }
+
+
+def compare(report, baseline):
+    """
+    Yields (name, result, baseline result) for the URLs measured in both
+    reports.
+    """
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name)
+        if before is not None and 'skipped' not in result and 'skipped' not in before:
+            yield name, result, before
+
+
+def save_report(report, path):
+    with open(path, 'w') as output:
+        json.dump(report, output, indent=2, sort_keys=True)
+
+
+def load_report(path):
+    with open(path) as report:
+        return json.load(report)
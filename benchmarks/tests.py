@@ -0,0 +1,109 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from blog.models import Post
+from catalog.models import Book, BookInstance
+from polls.models import Choice
+from scrumboard.models import Card, List
+
+from . import dataset, search, suite
+
+
+class DatasetTests(TestCase):
+
+    def test_seed(self):
+        sizes = dataset.scaled_sizes(0.0002)
+        dataset.seed(sizes, batch_size=7)
+        self.assertTrue(dataset.is_seeded())
+        self.assertEqual(Book.objects.count(), sizes['books'])
+        self.assertEqual(BookInstance.objects.count(), sizes['book_instances'])
+        self.assertEqual(Choice.objects.count(), sizes['questions'] * sizes['choices_per_question'])
+        self.assertEqual(Post.objects.count(), sizes['posts'])
+        self.assertEqual(Card.objects.count(), sizes['lists'] * sizes['cards_per_list'])
+        self.assertFalse(Book.objects.filter(genre=None).exists())
+        self.assertFalse(Post.objects.filter(excerpt='').exists())
+        # The generated books are indexed for the catalog search.
+        self.assertGreater(Book.objects.filter(summary__icontains=dataset.WORDS[0]).count(), 0)
+        self.assertGreaterEqual(search.SearchResults([dataset.WORDS[0]]).count(),
+                                Book.objects.filter(summary__icontains=dataset.WORDS[0]).count())
+
+    def test_seed_is_deterministic(self):
+        rows = []
+        for run in range(2):
+            seeder = dataset.Seeder(dataset.SIZES)
+            seeder.book_ids, seeder.user_ids = [1, 2, 3], [1, 2]
+            instances = [seeder.book_instance(seeder.rng) for num in range(20)]
+            rows.append([(instance.id, instance.book_id, instance.status, instance.due_back, instance.borrower_id)
+                         for instance in instances])
+        self.assertEqual(rows[0], rows[1])
+
+
+class SeedDataCommandTests(TestCase):
+
+    def test_seed_data(self):
+        out = StringIO()
+        call_command('seed_data', scale=0.0001, books=30, book_instances=120, stdout=out)
+        self.assertEqual(Book.objects.count(), 30)
+        self.assertEqual(BookInstance.objects.count(), 120)
+        self.assertIn('book instances', out.getvalue())
+        self.assertTrue(BookInstance.objects.filter(status='o', due_back__isnull=False).exists())
+
+        with self.assertRaisesMessage(CommandError, 'use --flush'):
+            call_command('seed_data', scale=0.0001, stdout=out)
+
+    def test_flush(self):
+        call_command('seed_data', scale=0.0001, books=30, stdout=StringIO())
+        call_command('seed_data', scale=0.0001, books=10, flush=True, stdout=StringIO())
+        self.assertEqual(Book.objects.count(), 10)
+
+
+class SuiteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        dataset.seed(dataset.scaled_sizes(0.0002))
+
+    def test_run(self):
+        results = suite.run(requests=1)
+        self.assertEqual(set(results), set(suite.url_names()))
+        for name, result in results.items():
+            if name in suite.POST_ONLY:
+                self.assertEqual(result, {'skipped': 'POST only'})
+                continue
+            self.assertNotIn('skipped', result, name)
+            self.assertLess(result['status'], 400, name)
+            self.assertGreater(result['requests_per_second'], 0)
+
+    def test_skips_urls_without_sample_rows(self):
+        List.objects.all().delete()
+        results = suite.run(requests=1, names=['scrumboard:list-detail', 'scrumboard:list-list'])
+        self.assertEqual(results['scrumboard:list-detail'], {'skipped': 'no sample row'})
+        self.assertEqual(results['scrumboard:list-list']['status'], 200)
+
+    def test_report(self):
+        report = suite.build_report(suite.run(requests=1, names=['polls:index']), dataset.dataset_sizes())
+        self.assertEqual(report['dataset']['catalog.Book'], Book.objects.count())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            suite.save_report(report, path)
+            baseline = suite.load_report(path)
+        self.assertEqual(baseline, report)
+        [(name, result, before)] = suite.compare(report, baseline)
+        self.assertEqual(name, 'polls:index')
+        self.assertEqual(result, before)
+
+
+class SearchBenchmarkTests(TestCase):
+
+    def test_run(self):
+        dataset.seed(dataset.scaled_sizes(0.0002))
+        results = search.run(repeat=1)
+        self.assertEqual(len(results), len(search.QUERIES) + 1)
+        for query, result in results.items():
+            # icontains also matches words that only start with the terms.
+            self.assertLessEqual(result['fts_matches'], result['icontains_matches'], query)
+            self.assertGreater(result['icontains_ms'], 0)
@@ -1,6 +1,13 @@
 from django.contrib import admin
 
+from go.paginator import EstimatedCountPaginator
+
 from .models import Post
 
 
-admin.site.register(Post)
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    list_display = ('title', 'author', 'published_date')
+    list_select_related = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,59 @@
+"""
+Cache of rendered blog post pages.
+
+Anonymous readers get post_detail pages straight from the cache, without any
+query or template rendering. Each post has one entry holding the rendered
+page and the post's last modification time, from which the ETag and
+Last-Modified headers are derived. The entry is dropped whenever the post is
+saved (post_edit, Post.publish(), the admin...) or deleted, see blog/signals.py.
+
+The entries are in the BLOG_PAGE_CACHE cache. Only the process saving a
+post drops its entry: with a cache local to each process (like the default
+one), the other processes serve the old page until it expires, after
+BLOG_PAGE_TIMEOUT seconds. A cache shared by every process, like
+memcached, is always up to date.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import quote_etag
+
+
+CACHE_PREFIX = 'blog:post:'
+
+
+def page_cache():
+    return caches[getattr(settings, 'BLOG_PAGE_CACHE', 'default')]
+
+
+def _cache_key(pk):
+    return '{0}{1}'.format(CACHE_PREFIX, pk)
+
+
+def get_cached_page(pk):
+    return page_cache().get(_cache_key(pk))
+
+
+def cache_page(post, content):
+    """
+    Stores the rendered page of a post and returns the cache entry.
+    """
+    last_modified = post.updated_date.timestamp()
+    page = {
+        'content': content,
+        'last_modified': int(last_modified),
+        'etag': quote_etag('{0}-{1}'.format(post.pk, int(last_modified * 1000000))),
+    }
+    page_cache().set(_cache_key(post.pk), page, getattr(settings, 'BLOG_PAGE_TIMEOUT', 60))
+    return page
+
+
+def invalidate_post(pk):
+    """
+    Drops the cached page of a post, right away and again once the current
+    transaction commits so that a concurrent read can't cache the old page.
+    """
+    key = _cache_key(pk)
+    cache = page_cache()
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -1,15 +1,35 @@
 from django.db import models
 from django.utils import timezone
+from django.utils.text import Truncator
 
 
 class Post(models.Model):
+    EXCERPT_LENGTH = 300
+
     author = models.ForeignKey('auth.User', on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
     text = models.TextField()
+    # Beginning of text shown on the index page, so text can be deferred there.
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
     created_date = models.DateTimeField(
             default=timezone.now)
     published_date = models.DateTimeField(
             blank=True, null=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Supports the keyset pagination of the index page.
+            models.Index(fields=['published_date', 'id'], name='blog_post_published_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = Truncator(self.text).chars(self.EXCERPT_LENGTH)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'excerpt'}
+        super(Post, self).save(*args, **kwargs)
 
     def publish(self):
         self.published_date = timezone.now()
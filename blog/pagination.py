@@ -0,0 +1,53 @@
+"""
+Keyset (cursor) pagination for the blog index.
+
+Instead of an OFFSET, each page continues after the (published_date, id) of
+the last post of the previous page, which the database finds through the
+blog_post_published_idx index. Any page therefore costs the same as the first.
+"""
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Largest id a database column holds (a signed 64-bit integer).
+MAX_ID = 2 ** 63 - 1
+
+
+def encode_cursor(post):
+    microseconds = (post.published_date - EPOCH) // datetime.timedelta(microseconds=1)
+    return '{0}-{1}'.format(microseconds, post.pk)
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (published_date, id) pair encoded in a cursor. Raises
+    ValueError if the cursor is malformed.
+    """
+    microseconds, pk = cursor.split('-')
+    pk = int(pk)
+    if pk > MAX_ID:
+        raise ValueError('Cursor id out of range: {0}'.format(pk))
+    try:
+        return EPOCH + datetime.timedelta(microseconds=int(microseconds)), pk
+    except OverflowError:
+        raise ValueError('Cursor date out of range: {0}'.format(microseconds))
+
+
+def keyset_page(queryset, after=None, per_page=10):
+    """
+    Returns the posts of queryset (ordered by published_date, id) following
+    the cursor in after, and the cursor of the next page (None on the last page).
+    """
+    queryset = queryset.order_by('published_date', 'id')
+    if after:
+        published_date, pk = decode_cursor(after)
+        queryset = queryset.filter(
+            Q(published_date__gt=published_date) | Q(published_date=published_date, id__gt=pk)
+        )
+    posts = list(queryset[:per_page + 1])
+    next_cursor = encode_cursor(posts[per_page - 1]) if len(posts) > per_page else None
+    return posts[:per_page], next_cursor
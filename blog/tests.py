@@ -1,3 +1,141 @@
-from django.test import TestCase
+import datetime
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Post
+from .views import POSTS_PER_PAGE
+
+
+class PostModelTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author', password='12345')
+
+    def test_excerpt_is_truncated_text(self):
+        post = Post.objects.create(author=self.user, title='Long post', text='word ' * 200)
+        self.assertEqual(len(post.excerpt), Post.EXCERPT_LENGTH)
+        self.assertTrue(post.text.startswith(post.excerpt[:Post.EXCERPT_LENGTH - 3]))
+
+    def test_excerpt_follows_text_changes(self):
+        post = Post.objects.create(author=self.user, title='Post', text='Old text')
+        post.text = 'New text'
+        post.save(update_fields=['text'])
+        self.assertEqual(Post.objects.get(pk=post.pk).excerpt, 'New text')
+
+
+class IndexPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='author', password='12345')
+        now = timezone.now()
+        # Two posts share every publication date to exercise the id tie breaker.
+        for num in range(25):
+            Post.objects.create(
+                author=user, title='Post {0}'.format(num), text='Text of post {0}'.format(num),
+                published_date=now - datetime.timedelta(days=30 - num // 2),
+            )
+        Post.objects.create(author=user, title='Draft', text='Not published')
+
+    def get_all_pages(self):
+        pages = []
+        url = reverse('blog:index')
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            pages.append([post.title for post in resp.context['posts']])
+            next_cursor = resp.context['next_cursor']
+            url = next_cursor and '{0}?after={1}'.format(reverse('blog:index'), next_cursor)
+        return pages
+
+    def test_pages_cover_all_published_posts_in_order(self):
+        pages = self.get_all_pages()
+        self.assertEqual([len(page) for page in pages], [POSTS_PER_PAGE, POSTS_PER_PAGE, 5])
+        titles = [title for page in pages for title in page]
+        self.assertEqual(titles, ['Post {0}'.format(num) for num in range(25)])
+
+    def test_later_pages_cost_the_same_as_the_first(self):
+        first = self.client.get(reverse('blog:index'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('blog:index'))
+        with self.assertNumQueries(1):
+            self.client.get('{0}?after={1}'.format(reverse('blog:index'), first.context['next_cursor']))
+
+    def test_text_is_deferred(self):
+        resp = self.client.get(reverse('blog:index'))
+        self.assertIn('text', resp.context['posts'][0].get_deferred_fields())
+        self.assertContains(resp, 'Text of post 0')
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(reverse('blog:index') + '?after=nonsense')
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.get(reverse('blog:index') + '?after=99999999999999999999-1')
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.get(reverse('blog:index') + '?after=1-99999999999999999999')
+        self.assertEqual(resp.status_code, 404)
+
+
+from django.core.cache import cache
+
+
+class PostDetailCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='12345')
+        self.post = Post.objects.create(author=self.user, title='Cached post', text='Cached text', published_date=timezone.now())
+        self.url = reverse('blog:post_detail', kwargs={'pk': self.post.pk})
+
+    def test_repeat_anonymous_reads_skip_the_database(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.content, first.content)
+        self.assertContains(resp, 'Cached text')
+        self.assertTrue(resp['ETag'])
+        self.assertTrue(resp['Last-Modified'])
+
+    def test_conditional_get(self):
+        resp = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_edit_invalidates_page(self):
+        etag = self.client.get(self.url)['ETag']
+        editor = self.client_class()
+        editor.force_login(self.user)
+        editor.post(reverse('blog:post_edit', kwargs={'pk': self.post.pk}), {'title': 'Edited post', 'text': 'Edited text'})
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'Edited text')
+
+    @override_settings(BLOG_PAGE_TIMEOUT=0.1)
+    def test_page_cached_elsewhere_expires(self):
+        self.client.get(self.url)
+        # An edit saved by another process, which clears its own cache only.
+        Post.objects.filter(pk=self.post.pk).update(text='Edited elsewhere', updated_date=timezone.now())
+        self.assertContains(self.client.get(self.url), 'Cached text')
+        time.sleep(0.2)
+        self.assertContains(self.client.get(self.url), 'Edited elsewhere')
+
+    def test_publish_invalidates_page(self):
+        etag = self.client.get(self.url)['ETag']
+        self.post.publish()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_logged_in_users_get_their_own_page(self):
+        self.client.get(self.url)
+        self.client.force_login(self.user)
+        resp = self.client.get(self.url)
+        self.assertContains(resp, 'Edit')
+        self.assertContains(resp, 'author')
+
+    def test_unknown_post(self):
+        self.assertEqual(self.client.get(reverse('blog:post_detail', kwargs={'pk': 999})).status_code, 404)
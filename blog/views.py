@@ -1,18 +1,56 @@
 from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
 from django.shortcuts import redirect
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 
 from .models import Post
+from .cache import cache_page, get_cached_page
 from .forms import PostForm
+from .pagination import keyset_page
+
+
+POSTS_PER_PAGE = 10
 
 
 def index(request):
-    posts = Post.objects.filter(published_date__lte=timezone.now()).order_by('published_date')
-    return render(request, 'blog/index.html', {'posts': posts})
+    published = Post.objects.filter(published_date__lte=timezone.now()).defer('text')
+    try:
+        posts, next_cursor = keyset_page(published, request.GET.get('after'), POSTS_PER_PAGE)
+    except ValueError:
+        raise Http404('Invalid page')
+    return render(request, 'blog/index.html', {'posts': posts, 'next_cursor': next_cursor})
+
+def is_anonymous(request):
+    """
+    Tells whether the request comes from an anonymous user, without loading
+    the session when there is no session cookie.
+    """
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return True
+    return not request.user.is_authenticated
+
 
 def post_detail(request, pk):
-    post = get_object_or_404(Post, pk=pk)
-    return render(request, 'blog/post_detail.html', {'post': post})
+    if not is_anonymous(request):
+        # The page shows the user and an edit link, don't share it.
+        post = get_object_or_404(Post, pk=pk)
+        return render(request, 'blog/post_detail.html', {'post': post})
+
+    page = get_cached_page(pk)
+    if page is None:
+        post = get_object_or_404(Post, pk=pk)
+        response = render(request, 'blog/post_detail.html', {'post': post})
+        page = cache_page(post, response.content)
+    response = get_conditional_response(request, etag=page['etag'], last_modified=page['last_modified'])
+    if response is None:
+        response = HttpResponse(page['content'])
+    response['ETag'] = page['etag']
+    response['Last-Modified'] = http_date(page['last_modified'])
+    patch_vary_headers(response, ('Cookie',))
+    return response
 
 def post_new(request):
     if request.method == "POST":
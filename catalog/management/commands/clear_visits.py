@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from catalog.visits import clear_visits
+
+
+class Command(BaseCommand):
+    help = 'Deletes the catalog visit counts of visitors whose session or cookie has expired.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Deleted the visit counts of {0} visitors.'.format(clear_visits())))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from catalog.stats import rebuild_library_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored library statistics shown on the catalog home page.'
+
+    def handle(self, *args, **options):
+        stats = rebuild_library_stats()
+        for name, value in sorted(stats.items()):
+            self.stdout.write('{0}: {1}'.format(name, value))
+        self.stdout.write(self.style.SUCCESS('Library statistics rebuilt.'))
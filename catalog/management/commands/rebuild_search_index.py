@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from catalog.search import has_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Indexes every book for the catalog search again, e.g. after bulk changes that sent no signals.'
+
+    def handle(self, *args, **options):
+        if not has_search_index():
+            self.stdout.write('This database has no search index, the catalog is searched with icontains.')
+            return
+        books = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt, {0:,d} books indexed.'.format(books)))
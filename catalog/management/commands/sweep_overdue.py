@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from catalog.overdue import overdue_report, sweep_overdue
+
+
+class Command(BaseCommand):
+    help = (
+        'Flags the loans that became overdue and clears the flag of the copies that '
+        'are no longer overdue, then reports the overdue loans. Run it daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of copies updated per transaction.')
+        parser.add_argument('--top', type=int, default=10,
+                            help='Number of borrowers listed in the report.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        flagged, cleared = sweep_overdue(batch_size=options['batch_size'], progress=self.show_progress)
+        self.stdout.write('Flagged {0:,d} loans as overdue, cleared {1:,d} flags.'.format(flagged, cleared))
+
+        report = overdue_report(top=options['top'])
+        self.stdout.write('Overdue loans: {0:,d}, of {1:,d} borrowers.'.format(report['loans'], report['borrowers']))
+        if report['loans']:
+            self.stdout.write('  due in the last 7 days:   {0:>9,d}'.format(report['up_to_week']))
+            self.stdout.write('  due 8 to 30 days ago:     {0:>9,d}'.format(report['up_to_month']))
+            self.stdout.write('  due more than 30 days ago:{0:>9,d}'.format(report['over_month']))
+            self.stdout.write('  earliest due date:        {0}'.format(report['earliest_due_back']))
+        if report['top_borrowers']:
+            self.stdout.write('Borrowers with the most overdue loans:')
+            for username, loans in report['top_borrowers']:
+                self.stdout.write('  {0:<30} {1:>6,d}'.format(username, loans))
+
+    def show_progress(self, changed):
+        if self.verbosity >= 2:
+            self.stdout.write('{0:,d} copies updated'.format(changed))
@@ -0,0 +1,17 @@
+# Generated by Django 2.0.13 on 2026-10-18 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_auto_20180419_1534'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookinstance',
+            index=models.Index(fields=['due_back', 'id'], name='catalog_bookinst_due_back_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.0.13 on 2026-10-18 20:50
+
+import datetime
+
+from django.db import migrations, models
+
+
+def flag_overdue_loans(apps, schema_editor):
+    BookInstance = apps.get_model('catalog', 'BookInstance')
+    BookInstance.objects.filter(status='o', due_back__lt=datetime.date.today()).update(overdue=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_loan_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookinstance',
+            name='overdue',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='bookinstance',
+            index=models.Index(fields=['overdue', 'due_back', 'id'], name='catalog_bookinst_overdue_idx'),
+        ),
+        migrations.RunPython(flag_overdue_loans, migrations.RunPython.noop),
+    ]
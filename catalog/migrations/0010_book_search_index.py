@@ -0,0 +1,45 @@
+# Generated by Django 2.0.13 on 2026-10-18 21:40
+
+from django.db import migrations
+
+
+# An FTS5 table keyed on the book id, see catalog/search.py. Matches in the
+# title rank highest, then the author, the genres and the summary.
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE catalog_book_fts USING fts5(title, summary, author, genres)",
+    "INSERT INTO catalog_book_fts(catalog_book_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0, 2.0)')",
+]
+
+POPULATE_SQL = (
+    'INSERT INTO catalog_book_fts(rowid, title, summary, author, genres) '
+    'SELECT book.id, book.title, book.summary, '
+    "coalesce(author.first_name || ' ' || author.last_name, ''), "
+    "(SELECT group_concat(genre.name, ' ') FROM catalog_book_genre AS book_genre "
+    'INNER JOIN catalog_genre AS genre ON genre.id = book_genre.genre_id '
+    'WHERE book_genre.book_id = book.id) '
+    'FROM catalog_book AS book LEFT OUTER JOIN catalog_author AS author ON author.id = book.author_id'
+)
+
+
+def create_search_index(apps, schema_editor):
+    # Other databases search with icontains filters instead.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL + [POPULATE_SQL]:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS catalog_book_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_bookinstance_overdue'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.0.13 on 2026-10-18 21:19
+
+from django.db import migrations, models
+
+
+def count_library(apps, schema_editor):
+    # The counters of catalog/stats.py, from the current tables.
+    Author = apps.get_model('catalog', 'Author')
+    Book = apps.get_model('catalog', 'Book')
+    BookInstance = apps.get_model('catalog', 'BookInstance')
+    LibraryCounter = apps.get_model('catalog', 'LibraryCounter')
+    LibraryCounter.objects.bulk_create([
+        LibraryCounter(name='num_books', value=Book.objects.count()),
+        LibraryCounter(name='num_instances', value=BookInstance.objects.count()),
+        LibraryCounter(name='num_instances_available', value=BookInstance.objects.filter(status='a').count()),
+        LibraryCounter(name='num_authors', value=Author.objects.count()),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_visitcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_library, migrations.RunPython.noop),
+    ]
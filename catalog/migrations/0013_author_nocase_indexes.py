@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+# Indexes of the names compared case-insensitively, which AuthorAdmin's
+# prefix searches seek on SQLite (see catalog/admin.py).
+INDEXES = (
+    ('catalog_author_last_name_nocase_idx', 'last_name'),
+    ('catalog_author_first_name_nocase_idx', 'first_name'),
+)
+
+
+def create_nocase_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, column in INDEXES:
+        schema_editor.execute('CREATE INDEX {0} ON catalog_author ({1} COLLATE NOCASE)'.format(name, column))
+
+
+def drop_nocase_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for name, column in INDEXES:
+            schema_editor.execute('DROP INDEX IF EXISTS {0}'.format(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_librarycounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_nocase_indexes, drop_nocase_indexes),
+    ]
@@ -63,7 +63,8 @@ class Book(models.Model):
         """
         Creates a string for the Genre. This is required to display genre in Admin.
         """
-        return ', '.join([ genre.name for genre in self.genre.all()[:3] ])
+        # Sliced in Python, so that genres prefetched by the admin are used.
+        return ', '.join([ genre.name for genre in self.genre.all() ][:3])
     display_genre.short_description = 'Genre'
 
     class Meta:
@@ -88,17 +89,43 @@ class BookInstance(models.Model):
     )
 
     status = models.CharField(max_length=1, choices=LOAN_STATUS, blank=True, default='m', help_text='Book availability')
+    # On loan past due_back. Set by save() and, as days pass, by manage.py sweep_overdue.
+    overdue = models.BooleanField(default=False, editable=False)
 
     class Meta:
         ordering = ["due_back"]
         permissions = (("can_mark_returned", "Set book as returned"),)
+        indexes = [
+            # Pages of copies in due_back order, see BookInstanceAdmin.ordering.
+            models.Index(fields=['due_back', 'id'], name='catalog_bookinst_due_back_idx'),
+            # Loans of a borrower and of everyone by due date, see LoanedBooksByUserListView
+            # and AllBorrowedBooksListView.
+            models.Index(fields=['borrower', 'status', 'due_back'], name='catalog_bookinst_borrower_idx'),
+            models.Index(fields=['status', 'due_back'], name='catalog_bookinst_status_idx'),
+            # Pages of overdue loans, see catalog.overdue.
+            models.Index(fields=['overdue', 'due_back', 'id'], name='catalog_bookinst_overdue_idx'),
+        ]
 
 
     def __str__(self):
         """
         String for representing the Model object
         """
-        return '{0} ({1})'.format(self.id, self.book.title)
+        return '{0} ({1})'.format(self.id, self.book.title if self.book_id is not None else 'no book')
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'status', 'due_back'} & set(update_fields):
+            self.overdue = self.is_loan_overdue(date.today())
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'overdue'}
+        super(BookInstance, self).save(*args, **kwargs)
+
+    def is_loan_overdue(self, today):
+        """
+        Whether the copy is on loan past its due date on the given day.
+        """
+        return self.status == 'o' and self.due_back is not None and self.due_back < today
 
     @property
     def is_overdue(self):
@@ -118,6 +145,10 @@ class Author(models.Model):
 
     class Meta:
         ordering = ["last_name","first_name"]
+        indexes = [
+            # Authors in name order, e.g. the author autocomplete of BookAdmin.
+            models.Index(fields=['last_name', 'first_name'], name='catalog_author_name_idx'),
+        ]
 
     def get_absolute_url(self):
         """
@@ -131,3 +162,26 @@ class Author(models.Model):
         String for representing the Model object.
         """
         return '{0}, {1}'.format(self.last_name, self.first_name)
+
+
+class VisitCount(models.Model):
+    """
+    Number of visits of the catalog home page by one visitor, see catalog/visits.py.
+    """
+    visitor = models.CharField(max_length=50, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    last_visit = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return '{0}: {1}'.format(self.visitor, self.count)
+
+
+class LibraryCounter(models.Model):
+    """
+    One of the library statistics shown on the catalog home page, see catalog/stats.py.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.IntegerField(default=0)
+
+    def __str__(self):
+        return '{0}: {1}'.format(self.name, self.value)
@@ -0,0 +1,118 @@
+"""
+Overdue loans.
+
+BookInstance.overdue flags the copies on loan past their due date, so that
+overdue loans can be filtered, counted and paged through in SQL, from the
+catalog_bookinst_overdue_idx index. BookInstance.save() sets the flag when
+a copy's status or due date changes. Loans also fall overdue as the days
+pass, without any write: sweep_overdue() (``manage.py sweep_overdue``, run
+daily) flags those, and fixes the flags left stale by QuerySet.update() and
+bulk_create().
+
+The sweep walks the rows to change in primary key order, batch_size at a
+time, and updates each batch in its own transaction, so it holds at most one
+batch of keys in memory however many loans there are.
+"""
+import datetime
+import uuid
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+
+from .models import BookInstance
+
+
+def overdue_loans(today):
+    """
+    Condition matching the copies on loan past their due date on today.
+    """
+    return Q(status='o', due_back__lt=today)
+
+
+def _set_overdue(queryset, value, batch_size, progress):
+    """
+    Sets overdue to value on the rows of queryset, batch_size rows per
+    UPDATE. Returns the number of rows changed.
+    """
+    changed = 0
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(batch.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return changed
+        with transaction.atomic():
+            # Filtered again, in case a row changed since it was read.
+            changed += queryset.filter(pk__in=pks).update(overdue=value)
+        last_pk = pks[-1]
+        if progress is not None:
+            progress(changed)
+
+
+def sweep_overdue(today=None, batch_size=1000, progress=None):
+    """
+    Brings BookInstance.overdue up to date for today. progress, if given, is
+    called with the number of rows changed so far after every batch. Returns
+    the number of loans flagged as overdue and of flags cleared.
+    """
+    today = today or datetime.date.today()
+    flagged = _set_overdue(BookInstance.objects.filter(overdue_loans(today), overdue=False), True,
+                           batch_size, progress)
+    cleared = _set_overdue(BookInstance.objects.filter(overdue=True).exclude(overdue_loans(today)), False,
+                           batch_size, progress and (lambda changed: progress(flagged + changed)))
+    return flagged, cleared
+
+
+def overdue_report(today=None, top=10):
+    """
+    Returns the number of overdue loans (in total and by how late they are),
+    of borrowers with overdue loans, the earliest due date, and the top
+    borrowers by number of overdue loans.
+    """
+    today = today or datetime.date.today()
+    week_ago = today - datetime.timedelta(days=7)
+    month_ago = today - datetime.timedelta(days=30)
+    overdue = BookInstance.objects.filter(overdue=True)
+    report = overdue.aggregate(
+        loans=Count('pk'),
+        borrowers=Count('borrower', distinct=True),
+        up_to_week=Count('pk', filter=Q(due_back__gte=week_ago)),
+        up_to_month=Count('pk', filter=Q(due_back__lt=week_ago, due_back__gte=month_ago)),
+        over_month=Count('pk', filter=Q(due_back__lt=month_ago)),
+        earliest_due_back=Min('due_back'),
+    )
+    report['top_borrowers'] = list(
+        overdue.exclude(borrower=None).values_list('borrower__username').annotate(loans=Count('pk'))
+        .order_by('-loans', 'borrower__username')[:top]
+    )
+    return report
+
+
+def encode_cursor(copy):
+    return '{0}_{1}'.format(copy.due_back.isoformat(), copy.pk.hex)
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (due_back, id) pair encoded in a cursor. Raises ValueError if
+    the cursor is malformed.
+    """
+    due_back, pk = cursor.split('_')
+    return datetime.datetime.strptime(due_back, '%Y-%m-%d').date(), uuid.UUID(pk)
+
+
+def overdue_page(after=None, per_page=20):
+    """
+    Returns the overdue loans, most overdue first, following the cursor in
+    after, and the cursor of the next page (None on the last page). Like the
+    blog index, pages continue after the last row of the previous one rather
+    than at an OFFSET, so every page is read straight from the index.
+    """
+    queryset = BookInstance.objects.filter(overdue=True).select_related('book', 'borrower').order_by('due_back', 'id')
+    if after:
+        due_back, pk = decode_cursor(after)
+        # due_back >= ... bounds the index range, the OR only filters within it.
+        queryset = queryset.filter(due_back__gte=due_back).filter(Q(due_back__gt=due_back) | Q(id__gt=pk))
+    loans = list(queryset[:per_page + 1])
+    next_cursor = encode_cursor(loans[per_page - 1]) if len(loans) > per_page else None
+    return loans[:per_page], next_cursor
@@ -0,0 +1,140 @@
+"""
+Signal handlers keeping the library statistics in catalog/stats.py and the
+search index of catalog/search.py up to date.
+
+Both live in the database and are written straight away, so they commit or
+roll back with the change that triggered them when it runs in a
+transaction. Note that QuerySet.update() and bulk_create() don't send these
+signals, run ``manage.py rebuild_library_stats`` and ``manage.py
+rebuild_search_index`` after using them on Book, BookInstance, Author or
+Genre.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import search, stats
+from .models import Author, Book, BookInstance, Genre
+
+# Marker for copies saved without knowing their stored status.
+UNKNOWN_STATUS = object()
+
+
+@receiver(post_save, sender=Book)
+def book_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust('num_books', 1)
+
+
+@receiver(post_delete, sender=Book)
+def book_deleted(sender, instance, **kwargs):
+    stats.adjust('num_books', -1)
+
+
+@receiver(post_save, sender=Author)
+def author_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust('num_authors', 1)
+
+
+@receiver(post_delete, sender=Author)
+def author_deleted(sender, instance, **kwargs):
+    stats.adjust('num_authors', -1)
+
+
+def _saves_status(instance, update_fields):
+    return update_fields is None or 'status' in update_fields
+
+
+@receiver(pre_save, sender=BookInstance)
+def bookinstance_saving(sender, instance, update_fields, **kwargs):
+    """
+    Reads the stored status of a copy being updated, so that post_save can
+    tell whether it changed. New copies have none.
+    """
+    if instance._state.adding:
+        instance._stats_status = UNKNOWN_STATUS
+    elif _saves_status(instance, update_fields):
+        instance._stats_status = BookInstance.objects.filter(pk=instance.pk).values_list(
+            'status', flat=True).first()
+
+
+@receiver(post_save, sender=BookInstance)
+def bookinstance_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        stats.adjust('num_instances', 1)
+        if instance.status == 'a':
+            stats.adjust('num_instances_available', 1)
+        return
+    if not _saves_status(instance, update_fields):
+        return
+    old_status = instance._stats_status
+    if old_status is UNKNOWN_STATUS:
+        # A new instance that updated an existing row.
+        stats.recount('num_instances_available')
+    elif old_status != instance.status:
+        if old_status == 'a':
+            stats.adjust('num_instances_available', -1)
+        elif instance.status == 'a':
+            stats.adjust('num_instances_available', 1)
+
+
+@receiver(pre_delete, sender=BookInstance)
+def bookinstance_deleting(sender, instance, **kwargs):
+    # Loads the status if it was deferred, the row is gone by post_delete.
+    instance._stats_status = instance.status
+
+
+@receiver(post_delete, sender=BookInstance)
+def bookinstance_deleted(sender, instance, **kwargs):
+    stats.adjust('num_instances', -1)
+    if instance._stats_status == 'a':
+        stats.adjust('num_instances_available', -1)
+
+
+@receiver(post_save, sender=Book)
+def book_saved_search(sender, instance, **kwargs):
+    search.index_books([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def book_deleted_search(sender, instance, **kwargs):
+    search.index_books([instance.pk])
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Genre)
+def name_saved_search(sender, instance, created, **kwargs):
+    # A new author or genre has no books yet.
+    if not created:
+        search.index_books(instance.book_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Genre)
+def name_deleting_search(sender, instance, **kwargs):
+    """
+    Remembers the books of an author or genre about to be deleted, which
+    lose the name without any signal of their own.
+    """
+    instance._search_book_ids = list(instance.book_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Genre)
+def name_deleted_search(sender, instance, **kwargs):
+    search.index_books(instance._search_book_ids)
+
+
+@receiver(m2m_changed, sender=Book.genre.through)
+def book_genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # instance is a book.
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            search.index_books([instance.pk])
+    elif action == 'pre_clear':
+        # instance is a genre, whose books are about to be removed.
+        instance._search_book_ids = list(instance.book_set.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        search.index_books(instance._search_book_ids)
+    elif action in ('post_add', 'post_remove'):
+        search.index_books(pk_set)
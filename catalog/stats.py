@@ -0,0 +1,79 @@
+"""
+Library statistics shown on the catalog home page.
+
+The counters are kept in the LibraryCounter table, one row per counter, so
+rendering the home page reads them with one query instead of running a
+COUNT(*) over each table. The signal handlers in catalog/signals.py adjust
+them with ``UPDATE ... SET value = value + delta`` in the transaction of the
+change they count: every process sees the same counters, concurrent changes
+are all counted, and rolled back changes never are.
+
+A missing counter is computed from the database when it is read, and stored
+by the next change that adjusts it. ``manage.py rebuild_library_stats``
+recomputes all of them (e.g. after a bulk import).
+"""
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import F
+
+from .models import Author, Book, BookInstance, LibraryCounter
+
+
+# Name of each counter and the query used to compute it from scratch.
+COUNTERS = {
+    'num_books': lambda: Book.objects.count(),
+    'num_instances': lambda: BookInstance.objects.count(),
+    'num_instances_available': lambda: BookInstance.objects.filter(status__exact='a').count(),
+    'num_authors': lambda: Author.objects.count(),
+}
+
+
+def get_library_stats():
+    """
+    Returns a dict with the current value of every counter.
+    """
+    stats = dict(LibraryCounter.objects.filter(name__in=COUNTERS).values_list('name', 'value'))
+    for name in COUNTERS:
+        if name not in stats:
+            stats[name] = COUNTERS[name]()
+    return stats
+
+
+def recount(name):
+    """
+    Recomputes the named counter from the database and stores it. The
+    counter's row is locked first, so that changes adjusting it meanwhile
+    are either in the count or wait for it.
+    """
+    with transaction.atomic():
+        counter, created = LibraryCounter.objects.select_for_update().get_or_create(name=name)
+        counter.value = COUNTERS[name]()
+        counter.save(update_fields=['value'])
+    return counter.value
+
+
+def rebuild_library_stats():
+    """
+    Recomputes every counter from the database.
+    """
+    with transaction.atomic():
+        return {name: recount(name) for name in COUNTERS}
+
+
+def adjust(name, delta):
+    """
+    Adds delta (which may be negative) to the named counter.
+    """
+    if not LibraryCounter.objects.filter(name=name).update(value=F('value') + delta):
+        # Not stored yet, the count includes the change being counted.
+        recount(name)
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator that is given the total number of objects up front instead of
+    running a COUNT(*) query to find it.
+    """
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super(CountedPaginator, self).__init__(object_list, per_page, **kwargs)
+        self.count = count
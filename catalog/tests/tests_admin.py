@@ -0,0 +1,161 @@
+import datetime
+
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.models import Author, Book, BookInstance, Genre, Language
+
+
+class ChangeListQueriesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        cls.author = Author.objects.create(first_name='John', last_name='Smith')
+        cls.language = Language.objects.create(name='English')
+        cls.genres = [Genre.objects.create(name='Genre {0}'.format(num)) for num in range(4)]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_books(self, count):
+        for num in range(count):
+            book = Book.objects.create(title='Book {0}'.format(num), summary='Summary', isbn='ABCDEFG',
+                                       author=self.author, language=self.language)
+            book.genre.set(self.genres)
+            BookInstance.objects.create(book=book, imprint='Imprint', status='o', borrower=self.admin,
+                                        due_back=datetime.date.today())
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        return len(queries)
+
+    def test_book_changelist_queries_dont_grow_with_rows(self):
+        url = reverse('admin:catalog_book_changelist')
+        self.create_books(2)
+        queries = self.count_queries(url)
+        self.create_books(8)
+        self.assertEqual(self.count_queries(url), queries)
+
+    def test_book_changelist_shows_three_genres(self):
+        self.create_books(1)
+        resp = self.client.get(reverse('admin:catalog_book_changelist'))
+        self.assertContains(resp, 'Genre 0, Genre 1, Genre 2<')
+
+    def test_bookinstance_changelist_queries_dont_grow_with_rows(self):
+        url = reverse('admin:catalog_bookinstance_changelist')
+        self.create_books(2)
+        queries = self.count_queries(url)
+        self.create_books(8)
+        self.assertEqual(self.count_queries(url), queries)
+
+    def test_bookinstance_without_book(self):
+        copy = BookInstance.objects.create(imprint='Imprint')
+        self.assertEqual(str(copy), '{0} (no book)'.format(copy.id))
+        resp = self.client.get(reverse('admin:catalog_bookinstance_changelist'))
+        self.assertEqual(resp.status_code, 200)
+
+
+class PaginatedInlineTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        cls.author = Author.objects.create(first_name='John', last_name='Smith')
+        cls.language = Language.objects.create(name='English')
+        cls.genre = Genre.objects.create(name='Fiction')
+        cls.book = Book.objects.create(title='Book', summary='Summary', isbn='ABCDEFG', author=cls.author,
+                                       language=cls.language)
+        cls.book.genre.add(cls.genre)
+        today = datetime.date.today()
+        cls.copies = [BookInstance.objects.create(book=cls.book, imprint='Imprint {0}'.format(num), status='o',
+                                                  borrower=cls.admin, due_back=today + datetime.timedelta(days=num))
+                      for num in range(25)]
+        cls.url = reverse('admin:catalog_book_change', args=(cls.book.pk,))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_copies(self, count):
+        BookInstance.objects.bulk_create([BookInstance(book=self.book, imprint='More', status='o', borrower=self.admin,
+                                                       due_back=datetime.date.today()) for num in range(count)])
+
+    def test_first_page(self):
+        resp = self.client.get(self.url)
+        formset = resp.context['inline_admin_formsets'][0].formset
+        self.assertEqual(formset.initial_form_count(), 20)
+        self.assertEqual([form.instance for form in formset.initial_forms], self.copies[:20])
+        self.assertContains(resp, 'Page 1 of 2 (25 book instances)')
+        self.assertContains(resp, 'href="?bookinstance_set-page=2"')
+
+    def test_other_page(self):
+        resp = self.client.get(self.url, {'bookinstance_set-page': 2})
+        formset = resp.context['inline_admin_formsets'][0].formset
+        self.assertEqual([form.instance for form in formset.initial_forms], self.copies[20:])
+        self.assertContains(resp, 'href="?bookinstance_set-page=1"')
+
+    def test_queries_dont_grow_with_copies(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.add_copies(100)
+        with self.assertNumQueries(len(queries)):
+            self.client.get(self.url)
+
+    def test_save_page(self):
+        page = self.copies[20:]
+        data = {
+            'title': 'Book', 'author': self.author.pk, 'summary': 'Summary', 'isbn': 'ABCDEFG',
+            'genre': [self.genre.pk], 'language': self.language.pk,
+            'bookinstance_set-TOTAL_FORMS': len(page), 'bookinstance_set-INITIAL_FORMS': len(page),
+            'bookinstance_set-MIN_NUM_FORMS': 0, 'bookinstance_set-MAX_NUM_FORMS': 1000,
+        }
+        for num, copy in enumerate(page):
+            prefix = 'bookinstance_set-{0}-'.format(num)
+            data.update({
+                prefix + 'id': copy.pk, prefix + 'book': self.book.pk, prefix + 'imprint': copy.imprint,
+                prefix + 'status': 'a' if copy == page[-1] else copy.status,
+                prefix + 'due_back': copy.due_back, prefix + 'borrower': self.admin.pk,
+            })
+        resp = self.client.post(self.url + '?bookinstance_set-page=2', data)
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(BookInstance.objects.get(pk=page[-1].pk).status, 'a')
+        self.assertEqual(BookInstance.objects.filter(status='o').count(), 24)
+
+    def test_author_autocomplete(self):
+        Author.objects.create(first_name='Jane', last_name='Doe')
+        resp = self.client.get(reverse('admin:catalog_author_autocomplete'), {'term': 'smi'})
+        self.assertEqual([result['text'] for result in resp.json()['results']], ['Smith, John'])
+        Author.objects.create(first_name='Smilla', last_name='Jaspersen')
+        Author.objects.create(first_name='Ann', last_name='Smi_th')
+        resp = self.client.get(reverse('admin:catalog_author_autocomplete'), {'term': 'SMI jo'})
+        self.assertEqual([result['text'] for result in resp.json()['results']], ['Smith, John'])
+        resp = self.client.get(reverse('admin:catalog_author_autocomplete'), {'term': 'smi_'})
+        self.assertEqual([result['text'] for result in resp.json()['results']], ['Smi_th, Ann'])
+
+    def test_author_search_ending_in_uppercase(self):
+        Author.objects.create(first_name='Emile', last_name='Zola')
+        Author.objects.create(first_name='Stefan', last_name='Zweig')
+        author_admin = site._registry[Author]
+        request = RequestFactory().get('/')
+        for term, names in (('Z', ['Zola', 'Zweig']), ('z', ['Zola', 'Zweig']), ('Emile Z', ['Zola']),
+                            ('ZOL', ['Zola'])):
+            queryset, use_distinct = author_admin.get_search_results(request, Author.objects.all(), term)
+            self.assertEqual(sorted(author.last_name for author in queryset), names, term)
+
+    def test_author_search_uses_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('The NOCASE indexes are created on SQLite only.')
+        request = RequestFactory().get('/')
+        queryset, use_distinct = site._registry[Author].get_search_results(request, Author.objects.all(), 'smi')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('SEARCH catalog_author USING INDEX catalog_author_last_name_nocase_idx', plan)
+        self.assertIn('SEARCH catalog_author USING INDEX catalog_author_first_name_nocase_idx', plan)
@@ -0,0 +1,122 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.models import Book, BookInstance
+from catalog.overdue import overdue_page, overdue_report, sweep_overdue
+
+
+TODAY = datetime.date.today()
+
+
+def days(num):
+    return TODAY + datetime.timedelta(days=num)
+
+
+class OverdueFlagTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.borrower = User.objects.create_user(username='reader', password='1X<ISRUkw+tuK')
+        cls.book = Book.objects.create(title='Book Title', summary='My book summary', isbn='ABCDEFG')
+
+    def create_copy(self, status='o', due_back=None, borrower=True):
+        return BookInstance.objects.create(book=self.book, imprint='Imprint', status=status, due_back=due_back,
+                                           borrower=self.borrower if borrower else None)
+
+    def test_save_sets_flag(self):
+        self.assertTrue(self.create_copy(due_back=days(-1)).overdue)
+        self.assertFalse(self.create_copy(due_back=TODAY).overdue)
+        self.assertFalse(self.create_copy(status='a', due_back=days(-1)).overdue)
+        self.assertFalse(self.create_copy(due_back=None).overdue)
+
+    def test_save_update_fields(self):
+        copy = self.create_copy(due_back=days(-1))
+        copy.status = 'a'
+        copy.save(update_fields=['status'])
+        self.assertFalse(BookInstance.objects.get(pk=copy.pk).overdue)
+
+    def test_sweep(self):
+        falls_due = self.create_copy(due_back=days(1))
+        returned = self.create_copy(due_back=days(-3))
+        on_time = self.create_copy(due_back=days(3))
+        # Changes made without save(), and tomorrow coming.
+        BookInstance.objects.filter(pk=returned.pk).update(status='a')
+        bulk = BookInstance.objects.bulk_create([
+            BookInstance(book=self.book, imprint='Bulk', status='o', due_back=days(-num)) for num in range(1, 6)])
+
+        self.assertEqual(sweep_overdue(today=days(2), batch_size=2), (6, 1))
+        overdue = set(BookInstance.objects.filter(overdue=True).values_list('pk', flat=True))
+        self.assertEqual(overdue, {falls_due.pk} | {copy.pk for copy in bulk})
+        self.assertNotIn(on_time.pk, overdue)
+        self.assertEqual(sweep_overdue(today=days(2)), (0, 0))
+
+    def test_report(self):
+        for num in (1, 3, 10, 40):
+            self.create_copy(due_back=days(-num))
+        self.create_copy(due_back=days(-2), borrower=False)
+        report = overdue_report(TODAY)
+        self.assertEqual(report['loans'], 5)
+        self.assertEqual(report['borrowers'], 1)
+        self.assertEqual((report['up_to_week'], report['up_to_month'], report['over_month']), (3, 1, 1))
+        self.assertEqual(report['earliest_due_back'], days(-40))
+        self.assertEqual(report['top_borrowers'], [('reader', 4)])
+
+    def test_command(self):
+        BookInstance.objects.bulk_create([BookInstance(book=self.book, imprint='Bulk', status='o', due_back=days(-2))])
+        out = StringIO()
+        call_command('sweep_overdue', stdout=out)
+        self.assertIn('Flagged 1 loans as overdue, cleared 0 flags.', out.getvalue())
+        self.assertIn('Overdue loans: 1, of 0 borrowers.', out.getvalue())
+
+
+class OverdueBooksViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.librarian = User.objects.create_user(username='librarian', password='1X<ISRUkw+tuK')
+        cls.librarian.user_permissions.add(Permission.objects.get(codename='can_mark_returned'))
+        book = Book.objects.create(title='Book Title', summary='My book summary', isbn='ABCDEFG')
+        # Several loans per due date, so that pages end in the middle of a day.
+        cls.copies = [BookInstance.objects.create(book=book, imprint='Imprint', status='o', due_back=days(-1 - num // 3))
+                      for num in range(45)]
+        cls.copies.sort(key=lambda copy: (copy.due_back, copy.pk))
+
+    def test_requires_permission(self):
+        self.client.force_login(User.objects.create_user(username='reader', password='1X<ISRUkw+tuK'))
+        self.assertEqual(self.client.get(reverse('catalog:overdue')).status_code, 302)
+
+    def test_pages(self):
+        self.client.force_login(self.librarian)
+        seen = []
+        url = reverse('catalog:overdue')
+        params = {}
+        while True:
+            resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, 200)
+            seen.extend(resp.context['loans'])
+            if resp.context['next_cursor'] is None:
+                break
+            params = {'after': resp.context['next_cursor']}
+        self.assertEqual(seen, self.copies)
+        self.assertContains(resp, '45 loans overdue.')
+
+    def test_invalid_cursor(self):
+        self.client.force_login(self.librarian)
+        self.assertEqual(self.client.get(reverse('catalog:overdue'), {'after': 'garbage'}).status_code, 404)
+
+    def test_page_uses_index(self):
+        loans, cursor = overdue_page(per_page=10)
+        with CaptureQueriesContext(connection) as queries:
+            overdue_page(cursor, per_page=10)
+        with connection.cursor() as db_cursor:
+            db_cursor.execute('EXPLAIN QUERY PLAN ' + queries[0]['sql'])
+            plan = ' '.join(str(row[-1]) for row in db_cursor.fetchall())
+        self.assertIn('catalog_bookinst_overdue_idx (overdue=? AND due_back>?)', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
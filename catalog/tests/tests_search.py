@@ -0,0 +1,135 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from catalog.models import Author, Book, Genre
+from catalog.search import SearchResults, icontains_search, match_expression, search_books, search_terms
+
+from .utils import QueryBudgetMixin
+
+
+def titles(query):
+    return [book.title for book in search_books(query)[:100]]
+
+
+class SearchIndexTest(TestCase):
+
+    def setUp(self):
+        # Created for each test, as the tests change and delete them.
+        self.author = Author.objects.create(first_name='Ursula', last_name='Le Guin')
+        self.genre = Genre.objects.create(name='Fantasy')
+        self.book = Book.objects.create(title='A Wizard of Earthsea', summary='A young mage on the island of Roke.',
+                                        isbn='9780553383041', author=self.author)
+        self.book.genre.add(self.genre)
+        self.other = Book.objects.create(title='The Lathe of Heaven', summary='Dreams that change the world.',
+                                         isbn='9781416556961')
+
+    def test_search_fields(self):
+        self.assertEqual(titles('wizard'), ['A Wizard of Earthsea'])
+        self.assertEqual(titles('ROKE island'), ['A Wizard of Earthsea'])
+        self.assertEqual(titles('le guin'), ['A Wizard of Earthsea'])
+        self.assertEqual(titles('fantasy'), ['A Wizard of Earthsea'])
+        self.assertEqual(titles('dreams'), ['The Lathe of Heaven'])
+        self.assertEqual(titles('wizard dreams'), [])
+        self.assertEqual(titles(''), [])
+
+    def test_title_ranks_first(self):
+        Book.objects.create(title='Island Stories', summary='Short stories.', isbn='1')
+        self.assertEqual(titles('island'), ['Island Stories', 'A Wizard of Earthsea'])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(search_terms('"wizard" AND (earth*'), ['wizard', 'and', 'earth'])
+        self.assertEqual(match_expression(['near', 'or']), '"near" "or"')
+        self.assertEqual(titles('"wizard" (of*'), ['A Wizard of Earthsea'])
+
+    def test_book_changes(self):
+        self.book.title = 'The Tombs of Atuan'
+        self.book.save()
+        self.assertEqual(titles('atuan'), ['The Tombs of Atuan'])
+        self.assertEqual(titles('earthsea'), [])
+        self.book.delete()
+        self.assertEqual(titles('atuan'), [])
+
+    def test_author_changes(self):
+        self.author.last_name = 'Leguin'
+        self.author.save()
+        self.assertEqual(titles('leguin'), ['A Wizard of Earthsea'])
+        self.author.delete()
+        self.assertEqual(titles('ursula'), [])
+        self.assertEqual(titles('wizard'), ['A Wizard of Earthsea'])
+
+    def test_genre_changes(self):
+        self.genre.name = 'Fable'
+        self.genre.save()
+        self.assertEqual(titles('fable'), ['A Wizard of Earthsea'])
+        self.other.genre.add(self.genre)
+        self.assertEqual(sorted(titles('fable')), ['A Wizard of Earthsea', 'The Lathe of Heaven'])
+        self.genre.book_set.remove(self.book)
+        self.assertEqual(titles('fable'), ['The Lathe of Heaven'])
+        self.genre.book_set.clear()
+        self.assertEqual(titles('fable'), [])
+
+        self.book.genre.add(self.genre)
+        self.genre.delete()
+        self.assertEqual(titles('fable'), [])
+
+    def test_rebuild_search_index(self):
+        # QuerySet.update() sends no signals.
+        Book.objects.filter(pk=self.book.pk).update(title='The Farthest Shore')
+        self.assertEqual(titles('shore'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('2 books indexed', out.getvalue())
+        self.assertEqual(titles('shore'), ['The Farthest Shore'])
+
+    def test_deleted_books_are_skipped(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM catalog_book_genre')
+            cursor.execute('DELETE FROM catalog_book WHERE id = %s', [self.book.pk])
+        self.assertEqual(SearchResults(['wizard']).count(), 1)
+        self.assertEqual(titles('wizard'), [])
+
+    def test_icontains_search(self):
+        self.assertEqual([book.title for book in icontains_search(['guin', 'fanta'])], ['A Wizard of Earthsea'])
+
+    def test_search_uses_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN SELECT rowid FROM catalog_book_fts WHERE catalog_book_fts MATCH %s '
+                           'ORDER BY rank LIMIT 20', ['"wizard"'])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('VIRTUAL TABLE INDEX', plan)
+
+
+class SearchViewTest(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(first_name='Jules', last_name='Verne')
+        for num in range(25):
+            Book.objects.create(title='Voyage {0}'.format(num), summary='Around the world.', isbn=str(num),
+                                author=author)
+
+    def test_search(self):
+        with self.assertMaxQueries(3):
+            resp = self.client.get(reverse('catalog:search'), {'q': 'voyage verne'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTemplateUsed(resp, 'catalog/search.html')
+        self.assertEqual(resp.context['page_obj'].paginator.count, 25)
+        self.assertEqual(len(resp.context['books']), 20)
+        self.assertContains(resp, '?q=voyage%20verne&amp;page=2')
+
+        resp = self.client.get(reverse('catalog:search'), {'q': 'voyage verne', 'page': 2})
+        self.assertEqual(len(resp.context['books']), 5)
+
+    def test_no_results(self):
+        resp = self.client.get(reverse('catalog:search'), {'q': 'submarine'})
+        self.assertContains(resp, 'No books match your search.')
+
+    def test_empty_query(self):
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse('catalog:search'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotContains(resp, 'No books match')
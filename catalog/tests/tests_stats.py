@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_init
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.models import Author, Book, BookInstance, LibraryCounter
+from catalog.stats import get_library_stats, rebuild_library_stats
+
+
+class LibraryStatsTest(TestCase):
+    """
+    The stored counters must match the real counts after every kind of change.
+    """
+
+    def setUp(self):
+        rebuild_library_stats()
+        self.author = Author.objects.create(first_name='John', last_name='Smith')
+        self.book = Book.objects.create(title='Book Title', summary='My book summary', isbn='ABCDEFG', author=self.author)
+
+    def assertStatsMatchDatabase(self):
+        self.assertEqual(get_library_stats(), {
+            'num_books': Book.objects.count(),
+            'num_instances': BookInstance.objects.count(),
+            'num_instances_available': BookInstance.objects.filter(status__exact='a').count(),
+            'num_authors': Author.objects.count(),
+        })
+
+    def test_counts_after_creates(self):
+        Author.objects.create(first_name='Jane', last_name='Doe')
+        Book.objects.create(title='Second Book', summary='Summary', isbn='1234567', author=self.author)
+        for status in ('a', 'a', 'o', 'm'):
+            BookInstance.objects.create(book=self.book, imprint='Imprint', status=status)
+        self.assertStatsMatchDatabase()
+        self.assertEqual(get_library_stats()['num_instances_available'], 2)
+
+    def test_counts_after_status_changes(self):
+        copy = BookInstance.objects.create(book=self.book, imprint='Imprint', status='a')
+        copy.status = 'o'
+        copy.save()
+        self.assertStatsMatchDatabase()
+
+        copy = BookInstance.objects.get(pk=copy.pk)
+        copy.status = 'a'
+        copy.save()
+        copy.save()
+        self.assertStatsMatchDatabase()
+        self.assertEqual(get_library_stats()['num_instances_available'], 1)
+
+    def test_counts_after_deferred_status_change(self):
+        copy = BookInstance.objects.create(book=self.book, imprint='Imprint', status='a')
+        copy = BookInstance.objects.defer('status').get(pk=copy.pk)
+        copy.status = 'm'
+        copy.save()
+        self.assertStatsMatchDatabase()
+
+    def test_counts_after_deletes(self):
+        available = BookInstance.objects.create(book=self.book, imprint='Imprint', status='a')
+        BookInstance.objects.create(book=self.book, imprint='Imprint', status='o')
+        available.delete()
+        self.book.delete()
+        self.author.delete()
+        self.assertStatsMatchDatabase()
+
+    def test_missing_counters(self):
+        BookInstance.objects.create(book=self.book, imprint='Imprint', status='a')
+        LibraryCounter.objects.all().delete()
+        self.assertStatsMatchDatabase()
+        BookInstance.objects.create(book=self.book, imprint='Imprint', status='o')
+        self.assertEqual(LibraryCounter.objects.get(name='num_instances').value, 2)
+        self.assertStatsMatchDatabase()
+
+    def test_rolled_back_changes_are_not_counted(self):
+        try:
+            with transaction.atomic():
+                BookInstance.objects.create(book=self.book, imprint='Imprint', status='a')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertStatsMatchDatabase()
+
+    def test_rebuild_library_stats(self):
+        Book.objects.filter(pk=self.book.pk).delete()
+        LibraryCounter.objects.filter(name='num_books').update(value=10)
+        out = StringIO()
+        call_command('rebuild_library_stats', stdout=out)
+        self.assertIn('num_books: 0', out.getvalue())
+        self.assertStatsMatchDatabase()
+
+    def test_loading_copies_sends_no_signal(self):
+        self.assertFalse(post_init.has_listeners(BookInstance))
+
+    @override_settings(CATALOG_VISITS_FLUSH_INTERVAL=None)
+    def test_index_runs_no_count_queries(self):
+        for num in range(5):
+            Book.objects.create(title='Book {0}'.format(num), summary='Summary', isbn='1234567', author=self.author)
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse('catalog:index'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['num_books'], 6)
+        self.assertEqual(resp.context['paginator'].num_pages, 3)
+        self.assertFalse([q['sql'] for q in queries if 'COUNT(' in q['sql'].upper()])
@@ -339,3 +339,132 @@ class AuthorCreateViewTest(TestCase):
         #Manually check redirect because we don't know what author was created
         self.assertEqual( resp.status_code,302)
         self.assertTrue( resp.url.startswith('/catalog/author/') )
+
+
+from catalog.tests.utils import QueryBudgetMixin
+
+class BookDetailViewQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    The book detail page must run a fixed number of queries (book with author
+    and language, genres, copies) however many genres or copies the book has.
+    """
+    QUERY_BUDGET = 3
+
+    def setUp(self):
+        self.author = Author.objects.create(first_name='John', last_name='Smith')
+        self.language = Language.objects.create(name='English')
+
+    def create_book(self, number_of_genres, number_of_copies):
+        book = Book.objects.create(title='Book Title', summary='My book summary', isbn='ABCDEFG', author=self.author, language=self.language)
+        for genre_num in range(number_of_genres):
+            book.genre.add(Genre.objects.create(name='Genre {0}'.format(genre_num)))
+        for copy_num in range(number_of_copies):
+            BookInstance.objects.create(book=book, imprint='Imprint {0}'.format(copy_num), status='a')
+        return book
+
+    def test_book_with_single_genre_and_copy(self):
+        book = self.create_book(number_of_genres=1, number_of_copies=1)
+        with self.assertMaxQueries(self.QUERY_BUDGET):
+            resp = self.client.get(book.get_absolute_url())
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'Imprint 0')
+
+    def test_book_with_many_genres_and_copies(self):
+        book = self.create_book(number_of_genres=10, number_of_copies=50)
+        with self.assertMaxQueries(self.QUERY_BUDGET):
+            resp = self.client.get(book.get_absolute_url())
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'Genre 9')
+        self.assertContains(resp, 'Imprint 49')
+
+    def test_book_without_author_or_language(self):
+        book = Book.objects.create(title='Orphan', summary='My book summary', isbn='ABCDEFG')
+        with self.assertMaxQueries(self.QUERY_BUDGET):
+            resp = self.client.get(book.get_absolute_url())
+        self.assertEqual(resp.status_code, 200)
+
+
+class AuthorDetailViewQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    The author detail page runs two queries (the author and the annotated
+    books) however many books and copies the author has.
+    """
+    QUERY_BUDGET = 2
+
+    def setUp(self):
+        self.author = Author.objects.create(first_name='John', last_name='Smith')
+
+    def create_books(self, number_of_books, statuses):
+        for book_num in range(number_of_books):
+            book = Book.objects.create(title='Book {0}'.format(book_num), summary='My book summary', isbn='ABCDEFG', author=self.author)
+            for status in statuses:
+                BookInstance.objects.create(book=book, imprint='Imprint', status=status)
+
+    def test_author_without_books(self):
+        with self.assertMaxQueries(self.QUERY_BUDGET):
+            resp = self.client.get(self.author.get_absolute_url())
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context['book_list']), 0)
+
+    def test_author_with_many_books(self):
+        self.create_books(20, statuses=('a', 'a', 'o', 'm', 'r'))
+        with self.assertMaxQueries(self.QUERY_BUDGET):
+            resp = self.client.get(self.author.get_absolute_url())
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context['book_list']), 20)
+        self.assertContains(resp, '5 copies, 2 available, 1 on loan', count=20)
+
+    def test_book_without_copies_is_listed(self):
+        self.create_books(1, statuses=())
+        resp = self.client.get(self.author.get_absolute_url())
+        book = resp.context['book_list'][0]
+        self.assertEqual((book.num_copies, book.num_available, book.num_on_loan), (0, 0, 0))
+
+
+from django.db import connection
+from django.test import RequestFactory
+
+from catalog.views import AllBorrowedBooksListView, LoanedBooksByUserListView
+
+class LoanListsQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    The loan lists join the books of the copies instead of loading each one,
+    and find the loans through the (borrower, status, due_back) and
+    (status, due_back) indexes.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='librarian', password='1X<ISRUkw+tuK')
+        self.user.user_permissions.add(Permission.objects.get(codename='can_mark_returned'))
+        self.client.force_login(self.user)
+        self.book = Book.objects.create(title='Book Title', summary='My book summary', isbn='ABCDEFG')
+        today = datetime.date.today()
+        for copy_num in range(10):
+            BookInstance.objects.create(book=self.book, imprint='Imprint', status='o', borrower=self.user,
+                                        due_back=today + datetime.timedelta(days=copy_num))
+
+    def test_my_borrowed(self):
+        # Session and user, then the page's own queries.
+        with self.assertMaxQueries(6):
+            resp = self.client.get(reverse('catalog:my-borrowed'))
+        self.assertContains(resp, 'Book Title', count=10)
+
+    def test_all_borrowed(self):
+        with self.assertMaxQueries(6):
+            resp = self.client.get(reverse('catalog:all-borrowed'))
+        self.assertContains(resp, 'Book Title', count=10)
+
+    def assertUsesIndex(self, queryset, index):
+        with connection.cursor() as cursor:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn(index, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_loan_queries_use_indexes(self):
+        view = LoanedBooksByUserListView()
+        view.request = RequestFactory().get(reverse('catalog:my-borrowed'))
+        view.request.user = self.user
+        self.assertUsesIndex(view.get_queryset()[:10], 'catalog_bookinst_borrower_idx')
+        self.assertUsesIndex(AllBorrowedBooksListView().get_queryset()[:10], 'catalog_bookinst_status_idx')
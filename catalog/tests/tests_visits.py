@@ -0,0 +1,95 @@
+import datetime
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog import visits
+from catalog.models import Author, Book, VisitCount
+from catalog.visits import VISITOR_COOKIE, clear_visits, flush_visits
+
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+@override_settings(CATALOG_VISITS_FLUSH_INTERVAL=None)
+class VisitCounterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(first_name='John', last_name='Smith')
+        cls.book = Book.objects.create(title='Book Title', summary='Summary', isbn='ABCDEFG', author=author)
+        cls.user = User.objects.create_user(username='testuser', password='12345')
+
+    def setUp(self):
+        # Drop the visits of the previous tests.
+        visits._pending.take()
+
+    def assertNoWrites(self, queries):
+        writes = [query['sql'] for query in queries if query['sql'].lstrip().upper().startswith(WRITES)]
+        self.assertEqual(writes, [])
+
+    def visits(self):
+        return self.client.get(reverse('catalog:index')).context['num_visits']
+
+    def test_anonymous_visits(self):
+        with CaptureQueriesContext(connection) as queries:
+            visits = [self.visits() for num in range(3)]
+            self.client.get(reverse('catalog:books'))
+            self.client.get(reverse('catalog:book-detail', args=(self.book.pk,)))
+        self.assertNoWrites(queries)
+        self.assertEqual(visits, [0, 1, 2])
+        self.assertNotIn('sessionid', self.client.cookies)
+
+    def test_new_visitor_gets_a_cookie_once(self):
+        first = self.client.get(reverse('catalog:index'))
+        self.assertIn(VISITOR_COOKIE, first.cookies)
+        second = self.client.get(reverse('catalog:index'))
+        self.assertNotIn(VISITOR_COOKIE, second.cookies)
+
+    def test_logged_in_visits(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            visits = [self.visits() for num in range(3)]
+        self.assertNoWrites(queries)
+        self.assertEqual(visits, [0, 1, 2])
+        self.assertFalse(VisitCount.objects.exists())
+
+    def test_visits_are_written_in_batches(self):
+        self.client.force_login(self.user)
+        for num in range(3):
+            self.visits()
+        self.assertEqual(flush_visits(), 1)
+        self.assertEqual(VisitCount.objects.get().count, 3)
+        self.assertEqual(flush_visits(), 0)
+        self.assertEqual([self.visits() for num in range(2)], [3, 4])
+        flush_visits()
+        self.assertEqual(VisitCount.objects.get().count, 5)
+
+    def test_count_continues_from_the_session(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['num_visits'] = 5
+        session.save()
+        self.assertEqual([self.visits() for num in range(2)], [5, 6])
+        flush_visits()
+        self.assertEqual(VisitCount.objects.get().count, 7)
+
+    def test_clear_visits(self):
+        self.visits()
+        self.client.force_login(self.user)
+        self.visits()
+        flush_visits()
+        expired = timezone.now() - datetime.timedelta(seconds=settings.SESSION_COOKIE_AGE + 1)
+        VisitCount.objects.filter(visitor__startswith='visitor:').update(last_visit=expired)
+        self.assertEqual(clear_visits(), 1)
+        self.assertTrue(VisitCount.objects.get().visitor.startswith('session:'))
+        out = StringIO()
+        call_command('clear_visits', stdout=out)
+        self.assertIn('Deleted the visit counts of 0 visitors.', out.getvalue())
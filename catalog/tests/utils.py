@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin(object):
+    """
+    TestCase mixin for pinning the number of queries a page is allowed to run.
+    Unlike assertNumQueries() it only fails when the budget is exceeded, and it
+    lists the executed queries to make the offending N+1 easy to spot.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=connection):
+        with CaptureQueriesContext(using) as context:
+            yield context
+        executed = len(context)
+        if executed > budget:
+            queries = '\n'.join(
+                '{0}. {1}'.format(num, query['sql'])
+                for num, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail('{0} queries executed, budget is {1}\nCaptured queries were:\n{2}'.format(
+                executed, budget, queries))
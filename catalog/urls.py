@@ -11,6 +11,8 @@ urlpatterns = [
     path('author/<int:pk>', views.AuthorDetailView.as_view(), name='author-detail'),
     re_path(r'^mybooks/$', views.LoanedBooksByUserListView.as_view(), name='my-borrowed'),
     re_path(r'borrowed/', views.AllBorrowedBooksListView.as_view(), name='all-borrowed'), #Added for challenge
+    path('overdue/', views.overdue_books, name='overdue'),
+    path('search/', views.search, name='search'),
     re_path(r'^book/(?P<pk>[-\w]+)/renew/$', views.renew_book_librarian, name='renew-book-librarian'),
     re_path(r'^author/create/$', views.AuthorCreate.as_view(), name='author_create'),
     re_path(r'^author/(?P<pk>\d+)/update/$', views.AuthorUpdate.as_view(), name='author_update'),
@@ -1,15 +1,22 @@
+from django.conf import settings
 from django.contrib.auth.decorators import permission_required
+from django.core.paginator import Paginator
 from django.shortcuts import render
 from django.views import generic
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect
 from django.urls import reverse
+from django.db.models import Count, Prefetch, Q
 import datetime
 
 from .forms import RenewBookForm, RenewBookModelForm
 
 from .models import Book, Author, BookInstance, Genre
+from .overdue import overdue_page
+from .search import search_books
+from .stats import CountedPaginator, get_library_stats
+from .visits import VISITOR_COOKIE, record_visit
 
 
 # def index(request):
@@ -33,40 +40,50 @@ from .models import Book, Author, BookInstance, Genre
 
 class BookListView(generic.ListView):
     model = Book
-    # queryset = Book.objects.filter(title__icontains='war')[:5] # Get 5 books containing the title war
+    queryset = Book.objects.select_related('author')
     # context_object_name = 'book_list'   # your own name for the list as a template variable
     template_name = 'catalog/index.html'  # Specify your own template name/location
     paginate_by = 2
+    ordering = ['id']
 
     # def get_queryset(self):
     #     return Book.objects.filter(title__icontains='war')[:5] # Get 5 books containing the title war
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        # The number of books is already known from the library statistics.
+        return CountedPaginator(queryset, per_page, self.stats['num_books'], **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        # Counts of the main objects, kept up to date in a table (see catalog/stats.py).
+        self.stats = get_library_stats()
+        # Number of visits to this view, counted in memory and written in batches (see catalog/visits.py).
+        self.num_visits, new_visitor = record_visit(request)
+        response = super(BookListView, self).get(request, *args, **kwargs)
+        if new_visitor is not None:
+            response.set_cookie(VISITOR_COOKIE, new_visitor, max_age=settings.SESSION_COOKIE_AGE, httponly=True)
+        return response
+
     def get_context_data(self, **kwargs):
         # Call the base implementation first to get the context
         context = super(BookListView, self).get_context_data(**kwargs)
-        display_books = Book.objects.filter(title__icontains='war')
-        # Generate counts of some of the main objects
-        num_books=Book.objects.all().count()
-        num_instances=BookInstance.objects.all().count()
-        # Available books (status = 'a')
-        num_instances_available=BookInstance.objects.filter(status__exact='a').count()
-        num_authors=Author.objects.count()  # The 'all()' is implied by default.
-        # Number of visits to this view, as counted in the session variable.
-        num_visits=self.request.session.get('num_visits', 0)
-        self.request.session['num_visits'] = num_visits+1
         # Create any data and add it to the context
-        context['display_books'] = display_books
-        context['num_books'] = num_books
-        context['num_instances'] = num_instances
-        context['num_instances_available'] = num_instances_available
-        context['num_authors'] = num_authors
-        context['num_visits'] = num_instances_available
+        context.update(self.stats)
+        context['num_visits'] = self.num_visits
         return context
 
 
 class BookDetailView(generic.DetailView):
     model = Book
 
+    def get_queryset(self):
+        # Load everything the template shows in three queries: the book with
+        # its author and language, its genres and its copies.
+        copies = BookInstance.objects.order_by('due_back', 'id')
+        return Book.objects.select_related('author', 'language').prefetch_related(
+            Prefetch('genre', queryset=Genre.objects.order_by('name')),
+            Prefetch('bookinstance_set', queryset=copies),
+        )
+
     def book_detail_view(request,pk):
         try:
             book_id=Book.objects.get(pk=pk)
@@ -101,6 +118,16 @@ class AuthorListView(generic.ListView):
 class AuthorDetailView(generic.DetailView):
     model = Author
 
+    def get_context_data(self, **kwargs):
+        context = super(AuthorDetailView, self).get_context_data(**kwargs)
+        # Count the copies of every book in the same query as the books.
+        context['book_list'] = self.object.book_set.annotate(
+            num_copies=Count('bookinstance'),
+            num_available=Count('bookinstance', filter=Q(bookinstance__status__exact='a')),
+            num_on_loan=Count('bookinstance', filter=Q(bookinstance__status__exact='o')),
+        ).order_by('title', 'id')
+        return context
+
     def author_detail_view(request,pk):
         try:
             author_id=Author.objects.get(pk=pk)
@@ -125,7 +152,8 @@ class LoanedBooksByUserListView(LoginRequiredMixin, generic.ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        return BookInstance.objects.filter(borrower=self.request.user).filter(status__exact='o').order_by('due_back')
+        return (BookInstance.objects.filter(borrower=self.request.user).filter(status__exact='o')
+                .select_related('book').order_by('due_back'))
 
 
 class AllBorrowedBooksListView(PermissionRequiredMixin, generic.ListView):
@@ -138,7 +166,37 @@ class AllBorrowedBooksListView(PermissionRequiredMixin, generic.ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        return BookInstance.objects.filter(status__exact='o').order_by('due_back')
+        return BookInstance.objects.filter(status__exact='o').select_related('book').order_by('due_back')
+
+
+OVERDUE_PER_PAGE = 20
+
+
+@permission_required('catalog.can_mark_returned')
+def overdue_books(request):
+    """
+    View function listing the overdue loans, most overdue first, a page at a time.
+    """
+    try:
+        loans, next_cursor = overdue_page(request.GET.get('after'), OVERDUE_PER_PAGE)
+    except ValueError:
+        raise Http404('Invalid page')
+    num_overdue = BookInstance.objects.filter(overdue=True).count()
+    return render(request, 'catalog/overdue_books.html',
+                  {'loans': loans, 'next_cursor': next_cursor, 'num_overdue': num_overdue})
+
+
+SEARCH_PER_PAGE = 20
+
+
+def search(request):
+    """
+    View function searching the books, best match first (see catalog/search.py).
+    """
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(search_books(query), SEARCH_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'catalog/search.html', {'query': query, 'page_obj': page_obj, 'books': page_obj.object_list})
 
 
 @permission_required('catalog.can_mark_returned')
@@ -0,0 +1,180 @@
+"""
+Visit counting for the catalog home page.
+
+The page used to count visits in request.session, which saved the whole
+session (a database write) on every page view. Browsing the catalog now
+writes nothing: record_visit() only reads the visitor's stored count, from
+the VisitCount table, and adds the visit to the pending visits of the
+current process. flush_visits() writes those in batches, adding them to the
+stored counts with ``UPDATE ... SET count = count + n``, so the visits
+counted by every process add up. A timer thread flushes them
+CATALOG_VISITS_FLUSH_INTERVAL seconds after the first pending visit, and
+they are flushed when the process exits; visits are lost if it is killed.
+With CATALOG_VISITS_FLUSH_INTERVAL set to None only the exit flushes them.
+
+A visitor's count includes the visits pending in the process serving the
+request, and those of the other processes once they have been flushed.
+Sessions are only read, to carry over the count of visitors counted the
+old way. Visitors without a session aren't given one, they get a random id
+in the VISITOR_COOKIE cookie instead.
+
+The rows of visitors whose session or cookie has expired are deleted by
+``manage.py clear_visits``.
+"""
+import atexit
+import datetime
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .models import VisitCount
+
+
+VISITOR_COOKIE = 'catalog_visitor'
+SESSION_VISITS = 'num_visits'
+
+
+class PendingVisits(object):
+    """
+    Visits counted by this process and not written yet, by visitor: the
+    number of visits, the time of the last one and the count to start from
+    if the visitor has no VisitCount row.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._visits = {}
+        self._timer = None
+
+    def add(self, visitor, start, count=1, last_visit=None):
+        """
+        Adds visits of visitor and returns the number pending.
+        """
+        with self._lock:
+            last_visit = last_visit or timezone.now()
+            pending, last, start = self._visits.get(visitor, (0, last_visit, start))
+            pending += count
+            self._visits[visitor] = (pending, max(last, last_visit), start)
+            flush_interval = getattr(settings, 'CATALOG_VISITS_FLUSH_INTERVAL', 10)
+            if self._timer is None and flush_interval is not None:
+                self._timer = threading.Timer(flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+            return pending
+
+    def take(self):
+        """
+        Removes and returns all pending visits.
+        """
+        with self._lock:
+            visits, self._visits = self._visits, {}
+        return visits
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            if _pending is self:
+                flush_visits()
+        except DatabaseError:
+            # Kept pending by flush_visits(), the next timer retries them.
+            pass
+        finally:
+            connection.close()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+_pending = PendingVisits()
+
+
+@receiver(setting_changed)
+def reset_pending_visits(setting, **kwargs):
+    global _pending
+    if setting == 'CATALOG_VISITS_FLUSH_INTERVAL':
+        _pending.close()
+        _pending = PendingVisits()
+
+
+def record_visit(request):
+    """
+    Counts a visit of the request's visitor. Returns the number of earlier
+    visits and, for a new visitor without a session, the id to set in the
+    VISITOR_COOKIE cookie (None otherwise).
+    """
+    session_key = request.session.session_key
+    new_visitor = None
+    if session_key is not None:
+        visitor = 'session:' + session_key
+    else:
+        visitor_id = request.COOKIES.get(VISITOR_COOKIE)
+        if not visitor_id or len(visitor_id) != 32 or not visitor_id.isalnum():
+            visitor_id = new_visitor = get_random_string(32)
+        visitor = 'visitor:' + visitor_id
+    stored = None
+    if new_visitor is None:
+        stored = VisitCount.objects.filter(visitor=visitor).values_list('count', flat=True).first()
+    if stored is None:
+        # Not counted yet, start from the session's count.
+        stored = request.session.get(SESSION_VISITS, 0) if session_key is not None else 0
+    pending = _pending.add(visitor, stored)
+    return stored + pending - 1, new_visitor
+
+
+def _write_visits(visitor, count, last_visit, start):
+    counts = VisitCount.objects.filter(visitor=visitor)
+    if counts.update(count=F('count') + count, last_visit=last_visit):
+        return
+    try:
+        with transaction.atomic():
+            VisitCount.objects.create(visitor=visitor, count=start + count, last_visit=last_visit)
+    except IntegrityError:
+        # Created by another process meanwhile.
+        counts.update(count=F('count') + count, last_visit=last_visit)
+
+
+def flush_visits():
+    """
+    Adds the visits pending in this process to the stored counts, in one
+    transaction. Returns the number of visitors written.
+    """
+    pending = _pending.take()
+    try:
+        with transaction.atomic():
+            for visitor, (count, last_visit, start) in pending.items():
+                _write_visits(visitor, count, last_visit, start)
+    except Exception:
+        # Keep the visits so that the next flush retries them.
+        for visitor, (count, last_visit, start) in pending.items():
+            _pending.add(visitor, start, count, last_visit)
+        raise
+    return len(pending)
+
+
+@atexit.register
+def flush_visits_at_exit():
+    _pending.close()
+    try:
+        flush_visits()
+    except DatabaseError:
+        pass
+
+
+def clear_visits():
+    """
+    Deletes the counts of the visitors not seen for SESSION_COOKIE_AGE, whose
+    session or cookie has expired. Returns the number deleted.
+    """
+    expired = timezone.now() - datetime.timedelta(seconds=settings.SESSION_COOKIE_AGE)
+    deleted, per_model = VisitCount.objects.filter(last_visit__lt=expired).delete()
+    return deleted
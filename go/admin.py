@@ -0,0 +1,66 @@
+"""
+Admin inlines for models with many related rows.
+
+A TabularInline renders a form for every related row, so the change page
+of a book with thousands of copies renders thousands of forms. The inlines
+here show one page of per_page rows instead, with links to the other pages
+(a ?<prefix>-page= parameter, kept when the page is saved). Changes on a
+page have to be saved before moving to another one.
+"""
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset editing one page of the related rows. per_page and the
+    query parameters of the change page (params) are set by
+    PaginatedTabularInline.get_formset().
+    """
+    per_page = 20
+    params = None
+
+    @property
+    def page_param(self):
+        return '{0}-page'.format(self.prefix)
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            # Ordered by the primary key if the inline has no ordering.
+            queryset = super().get_queryset()
+            self.paginator = Paginator(queryset, self.per_page)
+            self.page = self.paginator.get_page(self.params.get(self.page_param) if self.params else None)
+            self._queryset = self.page.object_list
+            # Django 2.0 only sets the foreign key's id on the forms' instances.
+            for obj in self._queryset:
+                setattr(obj, self.fk.name, self.instance)
+        return self._queryset
+
+    def page_url(self, number):
+        params = self.params.copy() if self.params is not None else {}
+        params[self.page_param] = number
+        return '?' + params.urlencode()
+
+    @property
+    def previous_page_url(self):
+        return self.page_url(self.page.previous_page_number())
+
+    @property
+    def next_page_url(self):
+        return self.page_url(self.page.next_page_number())
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    """
+    TabularInline showing per_page related rows at a time.
+    """
+    formset = PaginatedInlineFormSet
+    template = 'admin/edit_inline/paginated_tabular.html'
+    per_page = 20
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.params = request.GET
+        return formset
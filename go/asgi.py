@@ -0,0 +1,121 @@
+"""
+ASGI config for go project.
+
+Serves the scrumboard event stream (Server-Sent Events on /scrumboard/events/)
+itself and hands every other request to the regular WSGI application, which
+runs in a thread pool. Any ASGI 3 server can run it, e.g.
+
+    uvicorn go.asgi:application
+
+Events are published in-process (see scrumboard/events.py). Listeners only
+see card changes made through the same process, so serve the scrumboard API
+from this entry point as well.
+"""
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "go.settings")
+
+wsgi_application = get_wsgi_application()
+
+from scrumboard.events import event_stream  # noqa: E402 (needs the apps to be loaded)
+
+EVENTS_PATH = '/scrumboard/events/'
+
+wsgi_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('WSGI_THREADS', 16)))
+
+
+def build_environ(scope, body):
+    """
+    Builds the WSGI environ of an ASGI HTTP connection.
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': 'HTTP/{0}'.format(scope.get('http_version', '1.1')),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin-1')
+        environ[key] = '{0},{1}'.format(environ[key], value) if key in environ else value
+    return environ
+
+
+def run_wsgi(environ):
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    chunks = wsgi_application(environ, start_response)
+    try:
+        body = b''.join(chunks)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    return response['status'], response['headers'], body
+
+
+async def wsgi(scope, receive, send):
+    body = BytesIO()
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        body.write(message.get('body', b''))
+        more_body = message.get('more_body', False)
+    body.seek(0)
+    loop = asyncio.get_event_loop()
+    status, headers, content = await loop.run_in_executor(wsgi_executor, run_wsgi, build_environ(scope, body))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': content})
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            wsgi_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(scope, receive, send)
+    elif scope['type'] != 'http':
+        raise ValueError('Unsupported connection type {0}'.format(scope['type']))
+    elif scope['path'] == EVENTS_PATH:
+        await event_stream(scope, receive, send)
+    else:
+        await wsgi(scope, receive, send)
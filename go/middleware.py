@@ -0,0 +1,149 @@
+"""
+Request timing middleware.
+
+RequestTimingMiddleware measures every request's wall time, the number and
+total time of its database queries (through connection.execute_wrapper(),
+so nothing is kept per query) and the time spent rendering its
+TemplateResponse, if any. Templates rendered with render() inside a view
+are counted as view time.
+
+The measurements are
+
+- sent back in a Server-Timing header when REQUEST_TIMING_HEADER is set
+  (by default with DEBUG), so they show up in the browser's developer tools,
+- and added to a rolling window of the last REQUEST_TIMING_WINDOW requests
+  of each URL name, from which the staff-only go.views.request_stats page
+  computes percentiles. The windows are kept in the memory of each process.
+
+Recording a request costs a few timer reads and a deque append, so the
+middleware can stay enabled in production. Setting REQUEST_TIMING to False
+removes it altogether.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+UNRESOLVED = '<unresolved>'
+
+
+class RequestTimings(object):
+    """
+    Measurements of a single request, in seconds.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.template_started = None
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of sorted values.
+    """
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class TimingRegistry(object):
+    """
+    Rolling windows of request measurements per URL name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows = {}
+
+    def add(self, name, total, queries, db, template):
+        size = getattr(settings, 'REQUEST_TIMING_WINDOW', 1000)
+        with self._lock:
+            window = self._windows.get(name)
+            if window is None or window.maxlen != size:
+                window = self._windows[name] = deque(window or (), maxlen=size)
+            window.append((total, queries, db, template))
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+    def summary(self):
+        """
+        Returns the percentiles of each URL name's window, in milliseconds.
+        """
+        with self._lock:
+            windows = {name: list(window) for name, window in self._windows.items()}
+        summary = {}
+        for name, samples in sorted(windows.items()):
+            totals = sorted(sample[0] for sample in samples)
+            summary[name] = {
+                'requests': len(samples),
+                'p50_ms': round(percentile(totals, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(totals, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(totals, 0.99) * 1000, 2),
+                'max_ms': round(totals[-1] * 1000, 2),
+                'queries_mean': round(sum(sample[1] for sample in samples) / len(samples), 2),
+                'queries_max': max(sample[1] for sample in samples),
+                'db_p95_ms': round(percentile(sorted(sample[2] for sample in samples), 0.95) * 1000, 2),
+                'template_p95_ms': round(percentile(sorted(sample[3] for sample in samples), 0.95) * 1000, 2),
+            }
+        return summary
+
+
+registry = TimingRegistry()
+
+
+class RequestTimingMiddleware(object):
+    """
+    Records the timings described in the module docstring. Put it first in
+    MIDDLEWARE so that the other middleware is measured as well.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = request.timings = RequestTimings()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings.record_query))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match is not None else UNRESOLVED
+        registry.add(name, total, timings.queries, timings.db, timings.template)
+        if getattr(settings, 'REQUEST_TIMING_HEADER', settings.DEBUG):
+            response['Server-Timing'] = ', '.join([
+                'total;dur={0:.1f}'.format(total * 1000),
+                'db;dur={0:.1f};desc="{1} queries"'.format(timings.db * 1000, timings.queries),
+                'tpl;dur={0:.1f}'.format(timings.template * 1000),
+            ])
+        return response
+
+    def process_template_response(self, request, response):
+        timings = request.timings
+        timings.template_started = time.perf_counter()
+
+        def rendered(response):
+            timings.template += time.perf_counter() - timings.template_started
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -32,6 +32,7 @@ ALLOWED_HOSTS = []
 
 INSTALLED_APPS = [
     'auth_api.apps.AuthApiConfig',
+    'benchmarks.apps.BenchmarksConfig',
     'scrumboard.apps.ScrumboardConfig',
     'home.apps.HomeConfig',
     'catalog.apps.CatalogConfig',
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'go.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +86,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Use a database file for tests too: an in-memory SQLite database
+        # fails concurrent writes instead of waiting for the lock, which
+        # breaks the multi-threaded tests.
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
@@ -129,5 +137,82 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'go/static'),
 ]
 
+# The default cache is local to each process. State that every process must
+# see the same goes to the 'shared' cache, kept in the database here (its
+# table is created by the auth_api migrations). Point it at memcached in
+# production, where reading it costs no database query.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'go_shared_cache',
+    },
+}
+
 # Redirect to home URL after login (Default redirects to /accounts/profile/)
 LOGIN_REDIRECT_URL = '/'
+
+# Cache of the rendered blog post pages (see blog/cache.py). Other processes
+# serve the page they cached for up to BLOG_PAGE_TIMEOUT seconds after an
+# edit, unless the cache is shared by all of them.
+BLOG_PAGE_CACHE = 'default'
+BLOG_PAGE_TIMEOUT = 60  # seconds, None to keep them until invalidated
+
+# Request timings recorded by go.middleware.RequestTimingMiddleware, see
+# /admin/request-stats/. The Server-Timing header shows query counts and
+# timings to anyone, so it is only sent while debugging.
+REQUEST_TIMING = True
+REQUEST_TIMING_HEADER = DEBUG
+REQUEST_TIMING_WINDOW = 1000  # latest requests kept per URL name
+
+# Polls vote counting (see polls/votes.py). None writes every vote immediately,
+# 'local' or 'cache' buffer votes and write them in batches. 'cache' buffers
+# them in POLLS_VOTE_CACHE, which must be shared by the server processes and
+# increment atomically (memcached, not the database cache) to count them all.
+POLLS_VOTE_BUFFER = None
+POLLS_VOTE_CACHE = 'default'
+# Cache of the poll results (see polls/results.py). Other processes serve
+# the results they cached for up to POLLS_RESULTS_TIMEOUT seconds after a
+# vote, unless the cache is shared by all of them.
+POLLS_RESULTS_CACHE = 'default'
+POLLS_RESULTS_TIMEOUT = 10  # seconds, None to keep them until invalidated
+POLLS_VOTE_FLUSH_INTERVAL = 5  # seconds
+POLLS_VOTE_FLUSH_SIZE = 100
+
+# Serialize GET /scrumboard/lists/ with scrumboard.serializers.serialize_lists()
+# instead of the (slower) nested DRF serializers.
+SCRUMBOARD_FAST_SERIALIZATION = True
+SCRUMBOARD_PAGE_SIZE = 100  # lists or cards per page of the scrumboard API
+
+# Scrumboard event stream served by go/asgi.py (see scrumboard/events.py).
+SCRUMBOARD_EVENTS_QUEUE_SIZE = 100  # events a listener may fall behind before it is dropped
+SCRUMBOARD_EVENTS_HEARTBEAT = 15  # seconds
+
+# Sessions stay in the database. The cached_db engine would need the
+# 'shared' cache, as with the default one a session ended in one process
+# stays valid in the others.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+# Catalog home page visits are counted in memory and written to the
+# database in batches, by a timer of each process (see catalog/visits.py).
+CATALOG_VISITS_FLUSH_INTERVAL = 10  # seconds, None to only flush them on exit
+
+# auth_api login pipeline (see auth_api/login.py).
+AUTH_API_LOGIN_RATE = 10  # attempts per username and window, None for no limit
+AUTH_API_LOGIN_RATE_WINDOW = 60  # seconds
+AUTH_API_LOGIN_RATE_CACHE = 'shared'  # cache alias of the attempt counts, shared by every process
+AUTH_API_LOGIN_THREADS = 4  # threads checking passwords, None to check them in the request's thread
+AUTH_API_LOGIN_QUEUE = 32  # logins waiting for a thread before answering 503
+AUTH_API_TOKEN_AGE = 3600  # seconds the tokens issued at login are valid for
+AUTH_API_REVOCATION_CACHE = 'shared'  # cache alias of the revoked tokens, shared by every process
+AUTH_API_REVOCATION_CHECK_INTERVAL = 30  # seconds a process trusts a token it found not revoked
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'auth_api.authentication.SignedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ),
+}
@@ -3,7 +3,10 @@
   angular
     .module('scrumboard.demo')
     .config(['$routeProvider', config])
-    .run(['$http', start_csrf]);
+    .run(['$http', start_csrf])
+    .run(['AuthToken', function(AuthToken) {
+      AuthToken.restore();
+    }]);
 
   function config($routeProvider) {
     $routeProvider
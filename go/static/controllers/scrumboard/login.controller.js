@@ -3,12 +3,13 @@
 
   angular
     .module('scrumboard.demo')
-    .controller('LoginController', ['$scope', '$http', '$location', LoginController ]);
+    .controller('LoginController', ['$scope', '$http', '$location', 'AuthToken', LoginController ]);
 
-  function LoginController($scope, $http, $location) {
+  function LoginController($scope, $http, $location, AuthToken) {
     $scope.login = function() {
       $http.post('/auth_api/login/', $scope.user)
-        .then(function() {
+        .then(function(response) {
+          AuthToken.set(response.data.token);
           $location.url('/scrumboard');
         },
         function() {
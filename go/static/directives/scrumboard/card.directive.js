@@ -7,26 +7,19 @@
     return {
       templateUrl: '/static/directives/scrumboard/card.html',
       restrict: 'E',
-      controller: ['$scope', '$http', function($scope, $http) {
+      controller: ['$scope', '$http', 'CardBatch', function($scope, $http, CardBatch) {
         var url = '/scrumboard/cards/' + $scope.card.id + '/';
         $scope.destList = $scope.list;
         $scope.update = function() {
-          return $http.put(
-            url,
-            $scope.card
-          );
+          return CardBatch.update($scope.card);
         };
-        function removeCardFromList(card, list) {
-          var cards = list.cards;
-          cards.splice(
-            cards.indexOf(card),
-            1
-          );
-        }
+        // Cards are merged by id (see scrumboard.js), the event stream may
+        // have applied the change already.
         $scope.delete = function() {
+          var id = $scope.card.id;
           $http.delete(url).then(
             function() {
-              removeCardFromList($scope.card, $scope.list);
+              $scope.removeCard(id);
             }
           );
         };
@@ -37,14 +30,12 @@
           if ($scope.destList === undefined) {
             return;
           }
-          $scope.card.list = $scope.destList.id;
+          var card = $scope.card;
+          card.list = $scope.destList.id;
           $scope.update().then(function() {
-            {
-              removeCardFromList($scope.card, $scope.list);
-              $scope.destList.cards.push($scope.card);
-            }
+            $scope.mergeCard(card);
           });
-        }
+        };
       }]
     };
   }
@@ -3,9 +3,16 @@
 
   angular
     .module('scrumboard.demo', ['ngRoute'])
-    .controller('ScrumboardController', ['$scope', '$http', ScrumboardController]);
+    .controller('ScrumboardController', ['$scope', '$http', '$interval', '$q', '$location', 'AuthToken', ScrumboardController]);
+
+  function ScrumboardController($scope, $http, $interval, $q, $location, AuthToken) {
+    // Board revision the client is synced to, see scrumboard/sync.py. It is
+    // taken from the server before the board is loaded, so that changes made
+    // meanwhile are synced again, and only moves with sync responses.
+    var revision = 0;
+    var syncing = false;
+    var streaming = false;
 
-  function ScrumboardController($scope, $http) {
     $scope.add = function(list, title) {
       var card = {
         list: list.id,
@@ -13,7 +20,8 @@
       };
       $http.post('/scrumboard/cards/', card).then(
         function(response) {
-          list.cards.push(response.data);
+          // The event stream may have brought the card already.
+          mergeCard(response.data);
         },
         function() {
           alert('Could not add card');
@@ -23,13 +31,221 @@
     $scope.logout = function() {
       $http.get('/auth_api/logout/')
         .then(function() {
-          $location.url('/scrumboard');
+          AuthToken.clear();
+          $location.url('/login');
         });
     };
     $scope.data = [];
-    $http.get('/scrumboard/lists/').then(function(response) {
-      $scope.data = response.data;
+    // Follows the cursor pagination of the lists endpoint to the last page.
+    function loadLists(url, lists) {
+      return $http.get(url).then(function(response) {
+        lists = lists.concat(response.data.results);
+        return response.data.next ? loadLists(response.data.next, lists) : lists;
+      });
+    }
+    // The cards of each list are loaded separately, a page at a time, and
+    // sorted and filtered on the server. list.view keeps the search and the
+    // ordering they were loaded with, to place the cards changed later.
+    function cardOrdering(sortBy, reverse) {
+      return sortBy ? (reverse ? '-' : '') + sortBy : 'id';
+    }
+    $scope.loadCards = function(list, search, sortBy, reverse) {
+      var params = {list: list.id, ordering: cardOrdering(sortBy, reverse)};
+      if (search) {
+        params.search = search;
+      }
+      return $http.get('/scrumboard/cards/', {params: params}).then(function(response) {
+        list.view = {search: (search || '').toLowerCase(), ordering: params.ordering};
+        showCards(list, response.data.results, response.data.next);
+      });
+    };
+    // Cards that changed since the previous page was loaded may come again,
+    // they are merged by id.
+    $scope.loadMoreCards = function(list) {
+      return $http.get(list.next).then(function(response) {
+        var cards = list.cards;
+        response.data.results.forEach(function(card) {
+          var existing = takeCard(card.id);
+          cards.push(existing === null ? card : angular.extend(existing, card));
+        });
+        showCards(list, cards, response.data.next);
+      });
+    };
+
+    function showCards(list, cards, next) {
+      list.cards = cards;
+      list.next = next;
+    }
+
+    $http.get('/scrumboard/sync/').then(function(response) {
+      revision = response.data.revision;
+      return loadLists('/scrumboard/lists/?fields=id,revision,name', []);
+    }).then(function(lists) {
+      $scope.data = lists;
+      $scope.data.forEach(function(list) {
+        list.cards = [];
+      });
+      return $q.all($scope.data.map(function(list) {
+        return $scope.loadCards(list, '', $scope.sortBy, $scope.reverse);
+      }));
+    }).then(function() {
+      var timer = $interval(function() {
+        // Polling only backs up the event stream while it is down.
+        if (!streaming) {
+          $scope.sync();
+        }
+      }, 10000);
+      var source = listen();
+      $scope.$on('$destroy', function() {
+        $interval.cancel(timer);
+        if (source !== null) {
+          source.close();
+        }
+      });
     });
+
+    // Card changes pushed by go/asgi.py, see scrumboard/events.py. Pushed
+    // deltas do not move the sync revision; a sync on (re)connect fills in
+    // anything missed while the stream was down.
+    function listen() {
+      if (!window.EventSource) {
+        return null;
+      }
+      var source = new EventSource('/scrumboard/events/');
+      source.onopen = function() {
+        streaming = true;
+        $scope.$applyAsync($scope.sync);
+      };
+      source.onerror = function() {
+        streaming = false;
+      };
+      source.onmessage = function(event) {
+        $scope.$applyAsync(function() {
+          applyDelta(angular.fromJson(event.data));
+        });
+      };
+      return source;
+    }
+
+    function findIndex(items, id) {
+      for (var i = 0; i < items.length; i++) {
+        if (items[i].id === id) {
+          return i;
+        }
+      }
+      return -1;
+    }
+
+    function findList(id) {
+      var index = findIndex($scope.data, id);
+      return index === -1 ? null : $scope.data[index];
+    }
+
+    // Removes the card from the list showing it and returns it, or null.
+    function takeCard(id) {
+      var card = null;
+      $scope.data.forEach(function(list) {
+        var index = findIndex(list.cards, id);
+        if (index !== -1) {
+          card = list.cards.splice(index, 1)[0];
+        }
+      });
+      return card;
+    }
+
+    // Compares card values like the server orders them, nulls first.
+    function compareValues(a, b) {
+      if (a === b) {
+        return 0;
+      }
+      if (a === null || a === undefined) {
+        return -1;
+      }
+      if (b === null || b === undefined) {
+        return 1;
+      }
+      return a < b ? -1 : 1;
+    }
+
+    // Compares cards in an ordering of CardViewSet.ORDERINGS, ties broken
+    // by id in the same direction.
+    function compareCards(ordering, a, b) {
+      var name = ordering.replace(/^-/, '');
+      var result = compareValues(a[name], b[name]) || compareValues(a.id, b.id);
+      return ordering.charAt(0) === '-' ? -result : result;
+    }
+
+    // Inserts a card where the list's search and ordering put it. Cards the
+    // search excludes aren't shown, and neither are those sorting after the
+    // loaded cards while more pages remain: they come with a later page.
+    function placeCard(list, card) {
+      var view = list.view || {search: '', ordering: 'id'};
+      if (view.search && (card.title || '').toLowerCase().indexOf(view.search) === -1) {
+        return;
+      }
+      var index = 0;
+      while (index < list.cards.length && compareCards(view.ordering, list.cards[index], card) < 0) {
+        index++;
+      }
+      if (index === list.cards.length && list.next) {
+        return;
+      }
+      list.cards.splice(index, 0, card);
+    }
+
+    // Merges a changed card by id, into the existing object if a list shows
+    // it, and places it in its list. The client's own changes go through
+    // here too, as the event stream may bring them before the response.
+    function mergeCard(changed) {
+      var existing = takeCard(changed.id);
+      var card = existing === null ? changed : angular.extend(existing, changed);
+      var list = findList(card.list);
+      if (list !== null) {
+        placeCard(list, card);
+      }
+    }
+    $scope.mergeCard = mergeCard;
+    $scope.removeCard = takeCard;
+
+    // Merges the changes returned by /scrumboard/sync/ or pushed on the
+    // event stream into $scope.data,
+    // keeping the existing objects so that open cards stay bound.
+    function applyDelta(delta) {
+      delta.lists.forEach(function(changed) {
+        var list = findList(changed.id);
+        if (list === null) {
+          changed.cards = [];
+          changed.next = null;
+          changed.view = {search: '', ordering: cardOrdering($scope.sortBy, $scope.reverse)};
+          $scope.data.push(changed);
+        } else {
+          angular.extend(list, changed);
+        }
+      });
+      delta.cards.forEach(mergeCard);
+      delta.deleted.cards.forEach(takeCard);
+      delta.deleted.lists.forEach(function(id) {
+        var index = findIndex($scope.data, id);
+        if (index !== -1) {
+          $scope.data.splice(index, 1);
+        }
+      });
+    }
+
+    $scope.sync = function() {
+      if (syncing) {
+        return;
+      }
+      syncing = true;
+      $http.get('/scrumboard/sync/', {params: {since: revision}}).then(
+        function(response) {
+          applyDelta(response.data);
+          revision = Math.max(revision, response.data.revision);
+        }
+      ).finally(function() {
+        syncing = false;
+      });
+    };
     $scope.sortBy="story_points";
     $scope.reverse=true;
     $scope.showFilters=false;
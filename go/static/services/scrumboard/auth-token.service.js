@@ -0,0 +1,63 @@
+(function() {
+  'use strict';
+
+  angular
+    .module('scrumboard.demo')
+    .factory('AuthToken', ['$http', '$window', AuthToken])
+    .factory('authTokenInterceptor', ['$injector', '$q', authTokenInterceptor])
+    .config(['$httpProvider', function($httpProvider) {
+      $httpProvider.interceptors.push('authTokenInterceptor');
+    }]);
+
+  // Keeps the API token issued at login (see auth_api/tokens.py) for the
+  // browser tab and sends it with every request, so API calls don't need the
+  // session.
+  function AuthToken($http, $window) {
+    var key = 'scrumboard.token';
+
+    function use(token) {
+      if (token) {
+        $http.defaults.headers.common.Authorization = 'Bearer ' + token;
+      } else {
+        delete $http.defaults.headers.common.Authorization;
+      }
+    }
+
+    return {
+      restore: function() {
+        use($window.sessionStorage.getItem(key));
+      },
+      set: function(token) {
+        $window.sessionStorage.setItem(key, token);
+        use(token);
+      },
+      clear: function() {
+        $window.sessionStorage.removeItem(key);
+        use(null);
+      }
+    };
+  }
+
+  // Tokens expire after AUTH_API_TOKEN_AGE. When the API refuses the token,
+  // drops it and retries the request once with the session alone. When the
+  // session has ended as well, goes back to the login page.
+  function authTokenInterceptor($injector, $q) {
+    return {
+      responseError: function(rejection) {
+        var config = rejection.config;
+        var challenge = rejection.headers('WWW-Authenticate') || '';
+        if (rejection.status !== 401 || challenge.indexOf('Bearer') !== 0) {
+          return $q.reject(rejection);
+        }
+        if (config.headers.Authorization && !config.retriedWithoutToken) {
+          $injector.get('AuthToken').clear();
+          var retry = angular.extend({}, config, {headers: angular.extend({}, config.headers), retriedWithoutToken: true});
+          delete retry.headers.Authorization;
+          return $injector.get('$http')(retry);
+        }
+        $injector.get('$location').url('/login');
+        return $q.reject(rejection);
+      }
+    };
+  }
+})();
@@ -0,0 +1,53 @@
+(function() {
+  'use strict';
+
+  angular
+    .module('scrumboard.demo')
+    .factory('CardBatch', ['$http', '$q', '$timeout', CardBatch]);
+
+  // Collects the card updates made within a short window and sends them to
+  // the bulk endpoint as a single PATCH request.
+  function CardBatch($http, $q, $timeout) {
+    var url = '/scrumboard/cards/bulk/';
+    var delay = 200;
+    var pending = {};
+    var waiting = [];
+    var timer = null;
+
+    function flush() {
+      var cards = Object.keys(pending).map(function(id) {
+        return pending[id];
+      });
+      var deferreds = waiting;
+      pending = {};
+      waiting = [];
+      timer = null;
+      $http.patch(url, cards).then(
+        function(response) {
+          deferreds.forEach(function(deferred) { deferred.resolve(response); });
+        },
+        function(response) {
+          deferreds.forEach(function(deferred) { deferred.reject(response); });
+        }
+      );
+    }
+
+    return {
+      update: function(card) {
+        var deferred = $q.defer();
+        // Only send the fields the board edits, the latest values win.
+        pending[card.id] = {
+          id: card.id,
+          title: card.title,
+          description: card.description,
+          list: card.list
+        };
+        waiting.push(deferred);
+        if (timer === null) {
+          timer = $timeout(flush, delay);
+        }
+        return deferred.promise;
+      }
+    };
+  }
+})();
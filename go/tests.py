@@ -0,0 +1,101 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalog.models import Author
+from polls.models import Question
+
+from .middleware import percentile, registry
+from .paginator import EstimatedCountPaginator, estimated_row_count
+
+
+@override_settings(REQUEST_TIMING_HEADER=True)
+class RequestTimingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        registry.clear()
+
+    def test_server_timing_header(self):
+        resp = self.client.get(reverse('catalog:authors'))
+        self.assertRegex(resp['Server-Timing'],
+                         r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+$')
+
+    @override_settings(REQUEST_TIMING_HEADER=False)
+    def test_server_timing_header_off(self):
+        resp = self.client.get(reverse('catalog:authors'))
+        self.assertFalse(resp.has_header('Server-Timing'))
+        self.assertEqual(registry.summary()['catalog:authors']['requests'], 1)
+
+    def test_queries_and_templates_are_measured(self):
+        self.client.get(reverse('catalog:authors'))
+        timings = registry.summary()['catalog:authors']
+        self.assertEqual(timings['requests'], 1)
+        self.assertGreater(timings['queries_max'], 0)
+        self.assertGreater(timings['template_p95_ms'], 0)
+
+    def test_requests_are_grouped_by_url_name(self):
+        question = Question.objects.create(question_text='Question', pub_date='2018-01-01T00:00Z')
+        for num in range(3):
+            self.client.get(reverse('polls:index'))
+        self.client.get(reverse('polls:results_json', args=(question.pk,)))
+        self.client.get('/no-such-page/')
+        summary = registry.summary()
+        self.assertEqual(summary['polls:index']['requests'], 3)
+        self.assertEqual(summary['polls:results_json']['requests'], 1)
+        self.assertEqual(summary['<unresolved>']['requests'], 1)
+
+    @override_settings(REQUEST_TIMING_WINDOW=2)
+    def test_window_keeps_latest_requests(self):
+        for num in range(5):
+            self.client.get(reverse('polls:index'))
+        self.assertEqual(registry.summary()['polls:index']['requests'], 2)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_stats_are_staff_only(self):
+        user = User.objects.create_user(username='user', password='12345')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('request_stats')).status_code, 302)
+        user.is_staff = True
+        user.save()
+        resp = self.client.get(reverse('request_stats'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('request_stats', resp.json())
+
+
+class EstimatedCountPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for num in range(5):
+            Author.objects.create(first_name='First {0}'.format(num), last_name='Last {0}'.format(num))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        # Not in the statistics until the next ANALYZE.
+        Author.objects.create(first_name='First', last_name='Last')
+
+    def paginator(self, queryset, threshold):
+        paginator = EstimatedCountPaginator(queryset, 2)
+        paginator.estimate_threshold = threshold
+        return paginator
+
+    def test_estimated_row_count(self):
+        self.assertEqual(estimated_row_count(Author), 5)
+
+    def test_unfiltered_queryset_uses_estimate(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.paginator(Author.objects.all(), 1).count, 5)
+
+    def test_small_table_is_counted(self):
+        self.assertEqual(self.paginator(Author.objects.all(), 10).count, 6)
+
+    def test_filtered_queryset_is_counted(self):
+        self.assertEqual(self.paginator(Author.objects.filter(first_name='First'), 1).count, 1)
+
+    def test_lists_are_counted(self):
+        self.assertEqual(self.paginator(list(Author.objects.all()), 1).count, 6)
@@ -21,8 +21,11 @@ from django.views.generic import RedirectView
 from django.conf import settings
 from django.conf.urls.static import static
 
+from . import views
+
 urlpatterns = [
     path('polls/', include('polls.urls')),
+    path('admin/request-stats/', views.request_stats, name='request_stats'),
     path('admin/', admin.site.urls),
     path('', include('home.urls')),
     path('blog/', include('blog.urls')),
@@ -0,0 +1,13 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .middleware import registry
+
+
+@staff_member_required
+def request_stats(request):
+    """
+    Percentiles of the recent requests of each URL name served by this
+    process, as recorded by go.middleware.RequestTimingMiddleware.
+    """
+    return JsonResponse(registry.summary())
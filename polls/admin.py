@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from go.paginator import EstimatedCountPaginator
+
 from .models import Choice, Question
 
 
@@ -17,5 +19,7 @@ class QuestionAdmin(admin.ModelAdmin):
     list_display = ('question_text', 'pub_date', 'was_published_recently')
     list_filter = ['pub_date']
     search_fields = ['question_text']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 admin.site.register(Question, QuestionAdmin)
@@ -0,0 +1,62 @@
+import datetime
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from polls.models import Choice, Question
+from polls.views import IndexView
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the polls index "questions with choices" query with the old '
+        'join based query on generated data. The data is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000],
+                            help='Numbers of questions to benchmark with.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Number of times each query is run.')
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            with transaction.atomic():
+                self.create_questions(size)
+                self.benchmark(size, options['repeat'])
+                transaction.set_rollback(True)
+
+    def create_questions(self, size):
+        # Every other question gets two choices, so the query has to skip
+        # over empty questions.
+        now = timezone.now()
+        Question.objects.bulk_create(
+            [Question(question_text='Question {0}'.format(num), pub_date=now - datetime.timedelta(minutes=num))
+             for num in range(size)],
+            batch_size=500,
+        )
+        question_ids = list(Question.objects.order_by('pub_date').values_list('pk', flat=True))
+        Choice.objects.bulk_create(
+            [Choice(question_id=question_id, choice_text=text)
+             for question_id in question_ids[::2] for text in ('Yes', 'No')],
+            batch_size=500,
+        )
+
+    def benchmark(self, size, repeat):
+        now = timezone.now()
+        querysets = [
+            ('join (old)', lambda: Question.objects.exclude(choice__isnull=True)),
+            ('exists', IndexView().show_question_with_choices),
+        ]
+        self.stdout.write('{0} questions:'.format(size))
+        for label, base_queryset in querysets:
+            def run():
+                return list(base_queryset().filter(pub_date__lte=now).order_by('-pub_date')[:5])
+            with CaptureQueriesContext(connection) as queries:
+                run()
+            seconds = timeit.timeit(run, number=repeat) / repeat
+            self.stdout.write('  {0:<12} {1:8.2f} ms/query\n    {2}'.format(
+                label, seconds * 1000, queries[0]['sql']))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from polls.votes import flush_votes, get_vote_buffer
+
+
+class Command(BaseCommand):
+    help = 'Writes the votes collected in the POLLS_VOTE_BUFFER cache buffer to the database.'
+
+    def handle(self, *args, **options):
+        if get_vote_buffer() is None:
+            self.stdout.write('POLLS_VOTE_BUFFER is not set, votes are written immediately.')
+            return
+        if settings.POLLS_VOTE_BUFFER == 'local':
+            self.stdout.write("POLLS_VOTE_BUFFER is 'local', each server process writes the votes it buffers "
+                              "itself, every POLLS_VOTE_FLUSH_INTERVAL seconds and when it exits.")
+            return
+        # Takes the same lock as the flushes of the server processes, so that
+        # no vote is written twice.
+        self.stdout.write(self.style.SUCCESS('Flushed {0} votes.'.format(flush_votes())))
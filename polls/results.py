@@ -0,0 +1,93 @@
+"""
+Cached poll results.
+
+Each question has a single entry in the POLLS_RESULTS_CACHE cache holding
+its tally, which is used both by ResultsView and by the JSON results
+endpoint. The entry is dropped when votes for the question are written (see
+polls/votes.py) or the question or its choices are edited (see
+polls/signals.py), and rebuilt on the next read.
+
+Only the cache of the process writing the votes is cleared, the entries
+of a cache local to each process (like the default one) are stale in the
+other processes until they expire, after POLLS_RESULTS_TIMEOUT seconds.
+A cache shared by every process, like memcached, is always up to date.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+
+from .models import Question
+
+
+CACHE_PREFIX = 'polls:results:'
+
+
+def results_cache():
+    return caches[getattr(settings, 'POLLS_RESULTS_CACHE', 'default')]
+
+
+def _cache_key(question_id):
+    return '{0}{1}'.format(CACHE_PREFIX, question_id)
+
+
+def build_results(question_id):
+    """
+    Reads the tally of a question from the database, or returns None if the
+    question doesn't exist.
+    """
+    try:
+        question = Question.objects.get(pk=question_id)
+    except Question.DoesNotExist:
+        return None
+    choices = list(question.choice_set.order_by('pk').values('id', 'choice_text', 'votes'))
+    results = {
+        'id': question.id,
+        'question_text': question.question_text,
+        'pub_date': question.pub_date,
+        'choices': choices,
+        'total_votes': sum(choice['votes'] for choice in choices),
+    }
+    # The ETag only depends on the content, so an unchanged tally keeps its
+    # ETag even after the cache entry has been rebuilt.
+    content = json.dumps([question.question_text, choices], sort_keys=True).encode('utf-8')
+    results['etag'] = '"{0}"'.format(hashlib.md5(content).hexdigest())
+    return results
+
+
+def get_results(question_id):
+    """
+    Returns the cached tally of a question, or None if it doesn't exist.
+    """
+    key = _cache_key(question_id)
+    cache = results_cache()
+    results = cache.get(key)
+    if results is None:
+        results = build_results(question_id)
+        if results is not None:
+            cache.set(key, results, getattr(settings, 'POLLS_RESULTS_TIMEOUT', 10))
+    return results
+
+
+def get_published_results_or_404(question_id):
+    results = get_results(question_id)
+    if results is None or results['pub_date'] > timezone.now():
+        raise Http404('No question found matching the query')
+    return results
+
+
+def invalidate_results(*question_ids):
+    """
+    Drops the cached tally of the given questions. This is done both right
+    away and once the current transaction commits, so that a read racing with
+    the transaction can't cache the old tally for good.
+    """
+    keys = [_cache_key(question_id) for question_id in question_ids]
+    if keys:
+        cache = results_cache()
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -183,3 +183,191 @@ class QuestionsAndChoices(TestCase):
         #create a response object to simulate someone using the site
         response = self.client.get(reverse('polls:index'))
         self.assertQuerysetEqual(response.context['latest_question_list'], ['<Question: Full question>'])
+
+
+import threading
+import time
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+
+from .models import Choice
+from .votes import flush_votes, get_vote_buffer, record_vote
+
+
+class ConcurrentVoteTests(TransactionTestCase):
+    """
+    Votes cast from many threads at once must all be counted, whether they
+    are written immediately or buffered and flushed later.
+    """
+    threads = 8
+    votes_per_thread = 25
+
+    def setUp(self):
+        cache.clear()
+        question = create_question(question_text='Concurrent question', days=-1)
+        self.choices = [
+            question.choice_set.create(choice_text='Choice {0}'.format(num), votes=0)
+            for num in range(2)
+        ]
+
+    def vote_from_threads(self):
+        errors = []
+
+        def cast_votes(thread_num):
+            try:
+                for vote_num in range(self.votes_per_thread):
+                    record_vote(self.choices[(thread_num + vote_num) % 2])
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=cast_votes, args=(num,)) for num in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+
+    def assertAllVotesCounted(self):
+        total = sum(Choice.objects.filter(question=self.choices[0].question).values_list('votes', flat=True))
+        self.assertEqual(total, self.threads * self.votes_per_thread)
+
+    def test_atomic_votes(self):
+        self.vote_from_threads()
+        self.assertAllVotesCounted()
+
+    @override_settings(POLLS_VOTE_BUFFER='local', POLLS_VOTE_FLUSH_SIZE=10)
+    def test_local_buffer(self):
+        self.vote_from_threads()
+        flush_votes()
+        self.assertAllVotesCounted()
+
+    @override_settings(POLLS_VOTE_BUFFER='cache', POLLS_VOTE_FLUSH_INTERVAL=0)
+    def test_cache_buffer(self):
+        self.vote_from_threads()
+        flush_votes()
+        self.assertAllVotesCounted()
+
+    @override_settings(POLLS_VOTE_BUFFER='local', POLLS_VOTE_FLUSH_SIZE=1000, POLLS_VOTE_FLUSH_INTERVAL=3600)
+    def test_buffered_votes_are_written_on_flush(self):
+        self.client.post(reverse('polls:vote', args=(self.choices[0].question_id,)), {'choice': self.choices[0].pk})
+        self.assertEqual(Choice.objects.get(pk=self.choices[0].pk).votes, 0)
+        self.assertEqual(flush_votes(), 1)
+        self.assertEqual(Choice.objects.get(pk=self.choices[0].pk).votes, 1)
+        self.assertEqual(get_vote_buffer().take(), {})
+
+    @override_settings(POLLS_VOTE_BUFFER='local', POLLS_VOTE_FLUSH_SIZE=1000, POLLS_VOTE_FLUSH_INTERVAL=0.1)
+    def test_local_buffer_is_flushed_by_a_timer(self):
+        record_vote(self.choices[0])
+        for attempt in range(50):
+            if Choice.objects.get(pk=self.choices[0].pk).votes:
+                break
+            time.sleep(0.1)
+        self.assertEqual(Choice.objects.get(pk=self.choices[0].pk).votes, 1)
+        out = StringIO()
+        call_command('flush_votes', stdout=out)
+        self.assertIn("POLLS_VOTE_BUFFER is 'local'", out.getvalue())
+
+    @override_settings(POLLS_VOTE_BUFFER='cache', POLLS_VOTE_FLUSH_INTERVAL=3600)
+    def test_cache_buffer_reads_pending_choices_only(self):
+        buffer = get_vote_buffer()
+        with self.assertNumQueries(0):
+            buffer.add(self.choices[0].pk)
+            buffer.add(self.choices[0].pk)
+            self.assertEqual(buffer.take(), {self.choices[0].pk: 2})
+            self.assertEqual(buffer.take(), {})
+            buffer.add(self.choices[1].pk)
+            self.assertEqual(buffer.take(), {self.choices[1].pk: 1})
+
+    @override_settings(POLLS_VOTE_BUFFER='cache', POLLS_VOTE_FLUSH_INTERVAL=3600)
+    def test_cache_buffer_is_taken_by_one_flush_at_a_time(self):
+        buffer = get_vote_buffer()
+        buffer.add(self.choices[0].pk)
+        cache.add(buffer.take_lock_key, True)
+        out = StringIO()
+        call_command('flush_votes', stdout=out)
+        self.assertIn('Flushed 0 votes.', out.getvalue())
+        self.assertEqual(Choice.objects.get(pk=self.choices[0].pk).votes, 0)
+        cache.delete(buffer.take_lock_key)
+        call_command('flush_votes', stdout=out)
+        self.assertIn('Flushed 1 votes.', out.getvalue())
+        self.assertEqual(Choice.objects.get(pk=self.choices[0].pk).votes, 1)
+        self.assertEqual(cache.get(buffer._key(self.choices[0].pk)), 0)
+
+    @override_settings(POLLS_VOTE_BUFFER='cache', POLLS_VOTE_CACHE='shared')
+    def test_cache_buffer_needs_atomic_increments(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_vote_buffer()
+
+
+class CachedResultsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.question = create_question(question_text='Cached question', days=-1)
+        self.choice = self.question.choice_set.create(choice_text='Only choice', votes=0)
+        self.results_url = reverse('polls:results', args=(self.question.id,))
+        self.json_url = reverse('polls:results_json', args=(self.question.id,))
+
+    def vote(self):
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice.pk})
+
+    def test_repeated_results_page_is_served_from_cache(self):
+        self.client.get(self.results_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.results_url)
+        self.assertContains(response, 'Only choice -- 0 votes')
+
+    def test_vote_updates_results(self):
+        self.client.get(self.results_url)
+        self.vote()
+        response = self.client.get(self.results_url)
+        self.assertContains(response, 'Only choice -- 1 vote')
+
+    @override_settings(POLLS_RESULTS_TIMEOUT=0.1)
+    def test_results_cached_elsewhere_expire(self):
+        self.client.get(self.results_url)
+        # A vote written by another process, which clears its own cache only.
+        Choice.objects.filter(pk=self.choice.pk).update(votes=5)
+        self.assertContains(self.client.get(self.results_url), 'Only choice -- 0 votes')
+        time.sleep(0.2)
+        self.assertContains(self.client.get(self.results_url), 'Only choice -- 5 votes')
+
+    def test_editing_choice_updates_results(self):
+        self.client.get(self.results_url)
+        self.choice.choice_text = 'Renamed choice'
+        self.choice.save()
+        self.assertContains(self.client.get(self.results_url), 'Renamed choice')
+
+    def test_json_results(self):
+        response = self.client.get(self.json_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_votes'], 0)
+        self.assertEqual(response.json()['choices'], [{'id': self.choice.pk, 'choice_text': 'Only choice', 'votes': 0}])
+        self.assertTrue(response['ETag'])
+
+    def test_unchanged_json_results_are_not_modified(self):
+        etag = self.client.get(self.json_url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.json_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_vote_changes_json_etag(self):
+        etag = self.client.get(self.json_url)['ETag']
+        self.vote()
+        response = self.client.get(self.json_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['total_votes'], 1)
+
+    def test_future_question_json_results(self):
+        future_question = create_question(question_text='Future question.', days=5)
+        response = self.client.get(reverse('polls:results_json', args=(future_question.id,)))
+        self.assertEqual(response.status_code, 404)
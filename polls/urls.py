@@ -10,6 +10,8 @@ urlpatterns = [
     path('<int:pk>/', views.QuestionDetailView.as_view(), name='detail'),
     # ex: /polls/5/results/
     path('<int:pk>/results/', views.ResultsView.as_view(), name='results'),
+    # ex: /polls/5/results.json
+    path('<int:pk>/results.json', views.results_json, name='results_json'),
     # ex: /polls/5/vote/
     path('<int:question_id>/vote/', views.vote, name='vote'),
 ]
@@ -1,10 +1,14 @@
 from django.shortcuts import get_object_or_404, render
-from django.http import HttpResponseRedirect, HttpResponse
+from django.http import HttpResponseRedirect, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.urls import reverse
 from django.views import generic
 from django.utils import timezone
+from django.db.models import Exists, OuterRef
 
 from .models import Choice, Question
+from .results import get_published_results_or_404
+from .votes import record_vote
 
 
 class IndexView(generic.ListView):
@@ -35,7 +39,11 @@ class IndexView(generic.ListView):
         #return Question.objects.order_by('-pub_date')[:5]
 
     def show_question_with_choices(self):
-        return Question.objects.exclude(choice__isnull=True)
+        # EXISTS rather than a join, so questions aren't duplicated and the
+        # pub_date index can be walked until five matching questions are found.
+        return Question.objects.annotate(
+            has_choices=Exists(Choice.objects.filter(question=OuterRef('pk')))
+        ).filter(has_choices=True)
 
 
 # def index(request):
@@ -58,15 +66,36 @@ class QuestionDetailView(generic.DetailView):
 #     question = get_object_or_404(Question, pk=question_id)
 #     return render(request, 'polls/detail.html', {'question': question})
 
-class ResultsView(generic.DetailView):
-    model = Question
+class ResultsView(generic.TemplateView):
     template_name = 'polls/results.html'
 
-    def get_queryset(self):
+    def get_context_data(self, **kwargs):
         """
-        Excludes any questions that aren't published yet.
+        Renders the cached tally, excluding questions that aren't published yet.
         """
-        return Question.objects.filter(pub_date__lte=timezone.now())
+        context = super(ResultsView, self).get_context_data(**kwargs)
+        context['question'] = get_published_results_or_404(self.kwargs['pk'])
+        return context
+
+
+def results_json(request, pk):
+    """
+    Returns the tally of a question as JSON. Clients polling it should send
+    the ETag back in If-None-Match, an unchanged tally then costs a single
+    cache lookup and a 304 response.
+    """
+    results = get_published_results_or_404(pk)
+    response = get_conditional_response(request, etag=results['etag'])
+    if response is None:
+        response = JsonResponse({
+            'id': results['id'],
+            'question_text': results['question_text'],
+            'choices': results['choices'],
+            'total_votes': results['total_votes'],
+        })
+    response['ETag'] = results['etag']
+    patch_cache_control(response, no_cache=True)
+    return response
 # def results(request, question_id):
 #     question = get_object_or_404(Question, pk=question_id)
 #     return render(request, 'polls/results.html', {'question': question})
@@ -82,8 +111,7 @@ def vote(request, question_id):
             'error_message': "You didn't select a choice.",
         })
     else:
-        selected_choice.votes += 1
-        selected_choice.save()
+        record_vote(selected_choice)
         # Always return an HttpResponseRedirect after successfully dealing
         # with POST data. This prevents data from being posted twice if a
         # user hits the Back button.
@@ -0,0 +1,304 @@
+"""
+Vote counting for polls.
+
+By default every vote is applied straight away with an atomic
+``UPDATE ... SET votes = votes + 1``, so concurrent votes are never lost and
+only the votes column is written.
+
+Setting POLLS_VOTE_BUFFER to 'local' or 'cache' makes record_vote() collect
+votes in a buffer instead, which is written to the database in batches by
+flush_votes(). Buffered votes only show up in the results once they have
+been flushed.
+
+The 'local' buffer is in the memory of each server process. record_vote()
+flushes it once POLLS_VOTE_FLUSH_SIZE votes are pending, a timer flushes it
+POLLS_VOTE_FLUSH_INTERVAL seconds after the first pending vote, and it is
+flushed when the process exits. Votes are still lost if the process is
+killed. ``manage.py flush_votes`` runs in a process of its own and can't
+reach these buffers.
+
+The 'cache' buffer is in the POLLS_VOTE_CACHE cache. Its counters are only
+seen by every process (and by ``manage.py flush_votes``) if the cache is
+shared between them, like memcached, and are only exact if its incr() is
+atomic, which rules out the database and file caches. With the local memory
+cache it works as a buffer of the current process. record_vote() flushes it
+every POLLS_VOTE_FLUSH_INTERVAL seconds. Only one flush at a time reads the
+counters, those started meanwhile, by other processes or
+``manage.py flush_votes``, find nothing to write.
+"""
+import atexit
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import BaseDatabaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.db.models import F
+from django.dispatch import receiver
+
+from .models import Choice
+from .results import invalidate_results
+
+
+class LocalVoteBuffer(object):
+    """
+    Buffers votes in the memory of the current process, and flushes them
+    from a timer thread POLLS_VOTE_FLUSH_INTERVAL seconds after the first
+    pending vote.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._votes = Counter()
+        self._size = 0
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def add(self, choice_id, count=1):
+        with self._lock:
+            self._votes[choice_id] += count
+            self._size += count
+            if self._timer is None:
+                flush_interval = getattr(settings, 'POLLS_VOTE_FLUSH_INTERVAL', 5)
+                self._timer = threading.Timer(flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            if _buffer is self:
+                flush_votes()
+        finally:
+            connection.close()
+
+    def take(self):
+        """
+        Removes and returns all pending votes as a Counter of choice ids.
+        """
+        with self._lock:
+            votes, self._votes = self._votes, Counter()
+            self._size = 0
+            self._last_flush = time.monotonic()
+        return votes
+
+    def flush_due(self):
+        flush_size = getattr(settings, 'POLLS_VOTE_FLUSH_SIZE', 100)
+        flush_interval = getattr(settings, 'POLLS_VOTE_FLUSH_INTERVAL', 5)
+        return self._size >= flush_size or time.monotonic() - self._last_flush >= flush_interval
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+class CacheVoteBuffer(object):
+    """
+    Buffers votes in the POLLS_VOTE_CACHE cache. Each choice has its own
+    counter, so voting on different choices never contends.
+
+    The choices with pending votes are listed in a log of numbered keys, so
+    that take() only reads their counters: add() appends the choice to the
+    log when its counter goes up from 0, and take() reads the log from where
+    the previous take() stopped. take() holds the take_lock_key lock while
+    it reads and decrements the counters, since two takes reading the same
+    counter would both write its votes.
+    """
+    key_prefix = 'polls:votes:'
+    pending_key = 'polls:votes-pending'
+    taken_key = 'polls:votes-taken'
+    hole_key = 'polls:votes-hole'
+    flush_lock_key = 'polls:votes-flushed'
+    take_lock_key = 'polls:votes-taking'
+    # Seconds after which the lock of a take() that never released it expires.
+    take_lock_timeout = 60
+    chunk_size = 500
+
+    def __init__(self):
+        alias = getattr(settings, 'POLLS_VOTE_CACHE', 'default')
+        self.cache = caches[alias]
+        if isinstance(self.cache, (BaseDatabaseCache, FileBasedCache)):
+            raise ImproperlyConfigured(
+                "POLLS_VOTE_CACHE '{0}' doesn't increment atomically, votes would be lost.".format(alias))
+
+    def _key(self, choice_id):
+        return '{0}{1}'.format(self.key_prefix, choice_id)
+
+    def _incr(self, key, count):
+        try:
+            return self.cache.incr(key, count)
+        except ValueError:
+            if self.cache.add(key, count, None):
+                return count
+            return self.cache.incr(key, count)
+
+    def _mark_pending(self, choice_id):
+        num = self._incr(self.pending_key, 1)
+        self.cache.set('{0}:{1}'.format(self.pending_key, num), choice_id, None)
+
+    def add(self, choice_id, count=1):
+        if self._incr(self._key(choice_id), count) == count:
+            self._mark_pending(choice_id)
+
+    def _take_pending(self):
+        """
+        Removes and returns the ids of the choices added to the log since the
+        previous call.
+        """
+        last = self.cache.get(self.pending_key, 0)
+        taken = self.cache.get(self.taken_key, 0)
+        hole = self.cache.get(self.hole_key)
+        choice_ids = set()
+        for start in range(taken + 1, last + 1, self.chunk_size):
+            keys = ['{0}:{1}'.format(self.pending_key, num)
+                    for num in range(start, min(start + self.chunk_size, last + 1))]
+            entries = self.cache.get_many(keys)
+            read = []
+            for num, key in enumerate(keys, start):
+                if key in entries:
+                    choice_ids.add(entries[key])
+                elif num != hole:
+                    # Numbered but not written yet, read it at the next
+                    # flush. Skipped then, in case it was evicted.
+                    self.cache.set(self.hole_key, num, None)
+                    break
+                read.append(key)
+                taken = num
+            self.cache.delete_many(read)
+            if len(read) < len(keys):
+                break
+        self.cache.set(self.taken_key, taken, None)
+        return choice_ids
+
+    def take(self):
+        """
+        Removes and returns all pending votes as a Counter of choice ids, or
+        an empty Counter if another take() is running. Counters are
+        decremented by the amount read rather than deleted, so votes arriving
+        in the meantime stay in the buffer.
+        """
+        if not self.cache.add(self.take_lock_key, True, self.take_lock_timeout):
+            return Counter()
+        try:
+            return self._take()
+        finally:
+            self.cache.delete(self.take_lock_key)
+
+    def _take(self):
+        votes = Counter()
+        choice_ids = sorted(self._take_pending())
+        for start in range(0, len(choice_ids), self.chunk_size):
+            keys = {self._key(choice_id): choice_id for choice_id in choice_ids[start:start + self.chunk_size]}
+            for key, count in self.cache.get_many(keys).items():
+                if count:
+                    votes[keys[key]] += count
+                    if self.cache.decr(key, count):
+                        # Votes arrived since the get, keep the choice pending.
+                        self._mark_pending(keys[key])
+        return votes
+
+    def flush_due(self):
+        # Only the process that manages to set the marker flushes.
+        flush_interval = getattr(settings, 'POLLS_VOTE_FLUSH_INTERVAL', 5)
+        return self.cache.add(self.flush_lock_key, True, flush_interval)
+
+    def close(self):
+        pass
+
+
+VOTE_BUFFERS = {
+    'local': LocalVoteBuffer,
+    'cache': CacheVoteBuffer,
+}
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_vote_buffer():
+    """
+    Returns the buffer configured by POLLS_VOTE_BUFFER, or None when votes are
+    applied immediately.
+    """
+    global _buffer
+    name = getattr(settings, 'POLLS_VOTE_BUFFER', None)
+    if name is None:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = VOTE_BUFFERS[name]()
+        return _buffer
+
+
+@receiver(setting_changed)
+def reset_vote_buffer(setting, **kwargs):
+    global _buffer
+    if setting in ('POLLS_VOTE_BUFFER', 'POLLS_VOTE_CACHE'):
+        with _buffer_lock:
+            if _buffer is not None:
+                _buffer.close()
+            _buffer = None
+
+
+def record_vote(choice):
+    """
+    Counts one vote for the given choice.
+    """
+    buffer = get_vote_buffer()
+    if buffer is None:
+        Choice.objects.filter(pk=choice.pk).update(votes=F('votes') + 1)
+        invalidate_results(choice.question_id)
+        return
+    buffer.add(choice.pk)
+    if buffer.flush_due():
+        flush_votes()
+
+
+def apply_votes(votes):
+    """
+    Adds a Counter of choice ids to the stored votes, in a single transaction
+    and with one UPDATE per distinct vote count.
+    """
+    choices_by_count = defaultdict(list)
+    for choice_id, count in votes.items():
+        choices_by_count[count].append(choice_id)
+    with transaction.atomic():
+        for count, choice_ids in choices_by_count.items():
+            Choice.objects.filter(pk__in=choice_ids).update(votes=F('votes') + count)
+    question_ids = Choice.objects.filter(pk__in=list(votes)).values_list('question_id', flat=True).distinct()
+    invalidate_results(*question_ids)
+
+
+def flush_votes():
+    """
+    Writes the buffered votes to the database and returns how many there were.
+    """
+    buffer = get_vote_buffer()
+    if buffer is None:
+        return 0
+    votes = buffer.take()
+    if not votes:
+        return 0
+    try:
+        apply_votes(votes)
+    except Exception:
+        # Put the votes back so that the next flush retries them.
+        for choice_id, count in votes.items():
+            buffer.add(choice_id, count)
+        raise
+    return sum(votes.values())
+
+
+@atexit.register
+def flush_votes_at_exit():
+    if isinstance(_buffer, LocalVoteBuffer):
+        _buffer.close()
+        flush_votes()
@@ -1,16 +1,304 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django.contrib.auth.mixins import LoginRequiredMixin
 
-from .serializers import ListSerializer, CardSerializer
-from .models import List, Card
+from .bulk import bulk_create, bulk_update
+from .events import publish_on_commit
+from .pagination import BoardCursorPagination, CardCursorPagination
+from .serializers import (
+    ListSerializer, CardSerializer, BulkCardSerializer, CARD_FIELDS, LIST_FIELDS, serialize_lists,
+)
+from .models import List, Card, Revision
+from .sync import changes_since
 
-class ListViewSet(ModelViewSet):
-    queryset = List.objects.all()
+
+def model_columns(model, fields):
+    """
+    Returns the field names that are columns of the model, for only().
+    """
+    columns = {field.name for field in model._meta.concrete_fields}
+    return [name for name in fields if name in columns]
+
+
+class SparseFieldsViewMixin(object):
+    """
+    Lets GET requests pick the fields to return, e.g. ?fields=id,title. Maps
+    each query parameter to the serializer argument of the same name and the
+    field names it accepts.
+    """
+    sparse_fields = {}
+
+    def get_field_kwargs(self):
+        if not hasattr(self, '_field_kwargs'):
+            self._field_kwargs = {}
+            if self.request.method == 'GET':
+                for param, allowed in self.sparse_fields.items():
+                    value = self.request.query_params.get(param)
+                    if value is None:
+                        continue
+                    fields = [name for name in value.split(',') if name]
+                    unknown = [name for name in fields if name not in allowed]
+                    if unknown:
+                        raise ValidationError({param: ['Unknown field "{0}".'.format(unknown[0])]})
+                    self._field_kwargs[param] = fields
+        return self._field_kwargs
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_field_kwargs())
+        return super(SparseFieldsViewMixin, self).get_serializer(*args, **kwargs)
+
+
+class ListViewSet(SparseFieldsViewMixin, ModelViewSet):
+    queryset = List.objects.prefetch_related(Prefetch('cards', queryset=Card.objects.order_by('id')))
     serializer_class = ListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = BoardCursorPagination
+    sparse_fields = {'fields': LIST_FIELDS, 'card_fields': CARD_FIELDS}
+
+    def get_queryset(self):
+        queryset = super(ListViewSet, self).get_queryset()
+        field_kwargs = self.get_field_kwargs()
+        fields = field_kwargs.get('fields', LIST_FIELDS)
+        if 'fields' in field_kwargs:
+            queryset = queryset.only(*model_columns(List, fields))
+        if 'cards' not in fields:
+            queryset = queryset.prefetch_related(None)
+        elif 'card_fields' in field_kwargs:
+            cards = Card.objects.order_by('id').only('list', *model_columns(Card, field_kwargs['card_fields']))
+            queryset = queryset.prefetch_related(None).prefetch_related(Prefetch('cards', queryset=cards))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'SCRUMBOARD_FAST_SERIALIZATION', True):
+            return super(ListViewSet, self).list(request, *args, **kwargs)
+        # serialize_lists() fetches the cards itself, skip the prefetch.
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_lists(page, **self.get_field_kwargs()))
+        return Response(serialize_lists(queryset, **self.get_field_kwargs()))
 
-class CardViewSet(ModelViewSet):
+# Largest primary key the databases accept, larger ids are invalid.
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_id(value):
+    """
+    Returns value as a primary key, None if it isn't a positive integer or
+    a string of one.
+    """
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and 0 < value <= MAX_ID:
+        return value
+    return None
+
+
+def get_int_param(request, name):
+    value = request.query_params.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: ['A valid integer is required.']})
+
+
+class CardViewSet(SparseFieldsViewMixin, ModelViewSet):
+    """
+    Listing cards accepts ?list=<id>, ?story_points_min=, ?story_points_max=,
+    ?buisness_value_min=, ?buisness_value_max=, ?search=<title text> and
+    ?ordering= with one of ORDERINGS.
+    """
     queryset = Card.objects.all()
     serializer_class = CardSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CardCursorPagination
+    sparse_fields = {'fields': CARD_FIELDS}
+    ORDERINGS = ('id', 'title', '-title', 'story_points', '-story_points', 'buisness_value', '-buisness_value')
+    RANGE_FILTERS = ('story_points', 'buisness_value')
+
+    def get_queryset(self):
+        queryset = super(CardViewSet, self).get_queryset()
+        field_kwargs = self.get_field_kwargs()
+        if 'fields' in field_kwargs:
+            queryset = queryset.only(*model_columns(Card, field_kwargs['fields']))
+        if self.action == 'list':
+            queryset = self.filter_cards(queryset)
+        return queryset
+
+    def filter_cards(self, queryset):
+        list_id = get_int_param(self.request, 'list')
+        if list_id is not None:
+            queryset = queryset.filter(list=list_id)
+        for name in self.RANGE_FILTERS:
+            low = get_int_param(self.request, name + '_min')
+            if low is not None:
+                queryset = queryset.filter(**{name + '__gte': low})
+            high = get_int_param(self.request, name + '_max')
+            if high is not None:
+                queryset = queryset.filter(**{name + '__lte': high})
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = queryset.filter(title__icontains=search)
+        return queryset
+
+    def get_sort_field(self):
+        """
+        Returns the ?ordering= field for CardCursorPagination, None when
+        ordering by id.
+        """
+        ordering = self.request.query_params.get('ordering') or 'id'
+        if ordering not in self.ORDERINGS:
+            raise ValidationError({'ordering': ['Must be one of {0}.'.format(', '.join(self.ORDERINGS))]})
+        return None if ordering == 'id' else ordering
+
+    def perform_create(self, serializer):
+        serializer.save()
+        publish_on_commit(cards=[serializer.data])
+
+    def perform_update(self, serializer):
+        serializer.save()
+        publish_on_commit(cards=[serializer.data])
+
+    def perform_destroy(self, instance):
+        card_id = instance.pk
+        instance.delete()
+        publish_on_commit(deleted_cards=[card_id])
+
+    def get_array(self, data, kind):
+        if not isinstance(data, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of {0}.'.format(kind)]})
+        return data
+
+    def get_ids(self, data, kind):
+        """
+        Returns data, which must be a list of ids, as a list of integers.
+        """
+        ids = [parse_id(value) for value in self.get_array(data, kind)]
+        if None in ids:
+            raise ValidationError({'non_field_errors': ['Expected a list of {0}.'.format(kind)]})
+        return ids
+
+    def get_bulk_context(self, items):
+        # Invalid list ids are left to the serializer to report.
+        list_ids = [parse_id(item['list']) for item in items if isinstance(item, dict) and 'list' in item]
+        context = self.get_serializer_context()
+        context['list_ids'] = set(List.objects.filter(pk__in=[list_id for list_id in list_ids if list_id is not None])
+                                  .values_list('id', flat=True))
+        return context
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """
+        POST an array of cards to create them, PATCH an array of partial cards
+        (each with its id) to update them, or DELETE an array of card ids.
+        Each request is applied in a single transaction.
+        """
+        if request.method == 'POST':
+            return self.bulk_create(request)
+        if request.method == 'PATCH':
+            return self.bulk_update(request)
+        return self.bulk_delete(request)
+
+    def bulk_create(self, request):
+        items = self.get_array(request.data, 'cards')
+        serializer = BulkCardSerializer(data=items, many=True, context=self.get_bulk_context(items))
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            revision = Revision.bump()
+            cards = bulk_create(Card, [Card(revision=revision, **data) for data in serializer.validated_data])
+            data = BulkCardSerializer(cards, many=True).data
+            publish_on_commit(cards=data)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        items = self.get_array(request.data, 'cards')
+        card_ids = [parse_id(item.get('id')) if isinstance(item, dict) else None for item in items]
+        context = self.get_bulk_context(items)
+        with transaction.atomic():
+            # Read in the transaction that writes them, so that the changes
+            # of concurrent requests aren't overwritten.
+            cards = Card.objects.select_for_update().in_bulk([card_id for card_id in card_ids if card_id is not None])
+            updated, changed_fields, errors = [], {}, []
+            for item, card_id in zip(items, card_ids):
+                card = cards.get(card_id)
+                if card is None:
+                    errors.append({'id': ['Not found.']})
+                    continue
+                serializer = BulkCardSerializer(card, data=item, partial=True, context=context)
+                if not serializer.is_valid():
+                    errors.append(serializer.errors)
+                    continue
+                errors.append({})
+                updated.append(card)
+                fields = changed_fields.setdefault(card.pk, set())
+                for name, value in serializer.validated_data.items():
+                    if getattr(card, name) != value:
+                        setattr(card, name, value)
+                        fields.add(name)
+            if any(errors):
+                raise ValidationError(errors)
+            changed = [card for card in cards.values() if changed_fields.get(card.pk)]
+            if changed:
+                revision = Revision.bump()
+                for card in changed:
+                    card.revision = revision
+                    changed_fields[card.pk].add('revision')
+                # Only the fields that changed are written, each on its own cards.
+                bulk_update(Card, changed, sorted(set.union(*changed_fields.values())), changed_fields=changed_fields)
+                publish_on_commit(cards=BulkCardSerializer(changed, many=True).data)
+        return Response(BulkCardSerializer(updated, many=True).data)
+
+    def bulk_delete(self, request):
+        ids = self.get_ids(request.data, 'card ids')
+        with transaction.atomic():
+            cards = Card.objects.filter(pk__in=ids)
+            deleted_ids = list(cards.values_list('pk', flat=True))
+            cards.delete()
+            publish_on_commit(deleted_cards=deleted_ids)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['post'])
+    def move(self, request):
+        """
+        POST {"list": <list id>, "cards": [<card ids>]} to move the cards to
+        the list with a single UPDATE.
+        """
+        try:
+            target = List.objects.get(pk=parse_id(request.data.get('list')))
+        except List.DoesNotExist:
+            raise ValidationError({'list': ['Invalid list.']})
+        ids = self.get_ids(request.data.get('cards'), 'card ids')
+        with transaction.atomic():
+            cards = Card.objects.filter(pk__in=ids)
+            moved = cards.update(list=target, revision=Revision.bump())
+            publish_on_commit(cards=cards.values(*CARD_FIELDS))
+        return Response({'list': target.pk, 'moved': moved})
+
+
+class SyncView(APIView):
+    """
+    GET ?since=<revision> returns the lists and cards changed and the ids of
+    those deleted since that revision, along with the current revision.
+    Without since only the current revision is returned, for clients to take
+    before loading the board.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if 'since' not in request.query_params:
+            return Response({'revision': Revision.current()})
+        try:
+            since = int(request.query_params['since'])
+        except ValueError:
+            raise ValidationError({'since': ['A valid integer is required.']})
+        return Response(changes_since(since))
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ScrumboardConfig(AppConfig):
     name = 'scrumboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (connects the signal handlers)
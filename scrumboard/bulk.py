@@ -0,0 +1,49 @@
+"""
+Bulk write helpers for the scrumboard API.
+
+Django 2.0 has no QuerySet.bulk_update() and only returns primary keys from
+bulk_create() on PostgreSQL, so both are filled in here.
+"""
+from django.db import connection, transaction
+from django.db.transaction import TransactionManagementError
+from django.db.models import Case, F, Value, When
+
+
+def bulk_create(model, objs, batch_size=None):
+    """
+    bulk_create() that sets the primary keys of the created objects on every
+    database. Must be called inside a transaction.
+    """
+    objs = model.objects.bulk_create(objs, batch_size=batch_size)
+    if objs and not connection.features.can_return_ids_from_bulk_insert:
+        # SQLite hands out increasing ids and holds the write lock until the
+        # transaction ends, so the newest rows are the ones just inserted.
+        if not transaction.get_connection().in_atomic_block:
+            raise TransactionManagementError('bulk_create() must run in a transaction.')
+        pks = model.objects.order_by('-pk').values_list('pk', flat=True)[:len(objs)]
+        for obj, pk in zip(objs, reversed(list(pks))):
+            obj.pk = pk
+    return objs
+
+
+def bulk_update(model, objs, fields, batch_size=100, changed_fields=None):
+    """
+    Saves the given fields of objs with one UPDATE ... SET field = CASE pk
+    WHEN ... per batch, like QuerySet.bulk_update() in later Django versions.
+    changed_fields, if given, maps the pk of each obj to the fields to save
+    for it; the other fields of its row are left as they are.
+    """
+    fields = [model._meta.get_field(name) for name in fields]
+    if changed_fields is not None:
+        # Fields may be named by their attname, e.g. list_id.
+        changed_fields = {pk: {model._meta.get_field(name).name for name in names}
+                          for pk, names in changed_fields.items()}
+    for start in range(0, len(objs), batch_size):
+        batch = objs[start:start + batch_size]
+        updates = {}
+        for field in fields:
+            whens = [When(pk=obj.pk, then=Value(getattr(obj, field.attname), output_field=field)) for obj in batch
+                     if changed_fields is None or field.name in changed_fields[obj.pk]]
+            if whens:
+                updates[field.attname] = Case(*whens, default=F(field.attname), output_field=field)
+        model.objects.filter(pk__in=[obj.pk for obj in batch]).update(**updates)
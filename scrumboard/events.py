@@ -0,0 +1,176 @@
+"""
+In-process publish/subscribe of board events for the scrumboard event stream.
+
+CardViewSet publishes an event after every committed card change, and each
+connection to /scrumboard/events/ (served by go/asgi.py) subscribes to them.
+Events have the same shape as a /scrumboard/sync/ delta. They are encoded
+once, whichever thread publishes them, and handed to every subscriber's
+event loop.
+
+Every subscriber has a bounded queue. A subscriber that falls behind by more
+than SCRUMBOARD_EVENTS_QUEUE_SIZE events is dropped rather than buffered
+without limit. Its client reconnects and catches up through the sync
+endpoint. When the site runs under WSGI only there are no subscribers and
+publishing costs nothing.
+"""
+import asyncio
+import json
+import threading
+from http.cookies import SimpleCookie
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+
+
+CLOSE = object()
+
+
+class Subscriber(object):
+
+    def __init__(self, loop, queue_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def offer(self, message):
+        """
+        Queues a message, dropping the subscriber if its queue is full. Must
+        be called from the subscriber's event loop.
+        """
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        """
+        Discards pending messages and makes get() return CLOSE.
+        """
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(CLOSE)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventBroker(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self):
+        """
+        Adds a subscriber. Must be called from the event loop it will be read in.
+        """
+        queue_size = getattr(settings, 'SCRUMBOARD_EVENTS_QUEUE_SIZE', 100)
+        subscriber = Subscriber(asyncio.get_event_loop(), queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        """
+        Sends an event to every subscriber. Can be called from any thread.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        message = 'data: {0}\n\n'.format(json.dumps(event, cls=DjangoJSONEncoder)).encode('utf-8')
+        for subscriber in subscribers:
+            subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+
+
+broker = EventBroker()
+
+
+def publish_on_commit(cards=(), deleted_cards=()):
+    """
+    Publishes a card change event once the current transaction commits.
+    """
+    event = {
+        'lists': [],
+        'cards': list(cards),
+        'deleted': {'lists': [], 'cards': list(deleted_cards)},
+    }
+    transaction.on_commit(lambda: broker.publish(event))
+
+
+def is_authenticated(scope):
+    """
+    Tells whether the session cookie of an ASGI connection belongs to an
+    active user. Queries the database, run it in an executor.
+    """
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    if settings.SESSION_COOKIE_NAME not in cookies:
+        return False
+    try:
+        session = import_module(settings.SESSION_ENGINE).SessionStore(cookies[settings.SESSION_COOKIE_NAME].value)
+        user_id = session.get(SESSION_KEY)
+        return user_id is not None and User.objects.filter(pk=user_id, is_active=True).exists()
+    finally:
+        close_old_connections()
+
+
+async def event_stream(scope, receive, send):
+    """
+    ASGI endpoint streaming board events as Server-Sent Events until the
+    client disconnects or is dropped for falling behind.
+    """
+    loop = asyncio.get_event_loop()
+    if not await loop.run_in_executor(None, is_authenticated, scope):
+        await send({'type': 'http.response.start', 'status': 403,
+                    'headers': [(b'content-type', b'text/plain; charset=utf-8')]})
+        await send({'type': 'http.response.body', 'body': b'Authentication required.'})
+        return
+
+    subscriber = broker.subscribe()
+    disconnected = False
+
+    async def watch_disconnect():
+        nonlocal disconnected
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected = True
+        subscriber.close()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    heartbeat = getattr(settings, 'SCRUMBOARD_EVENTS_HEARTBEAT', 15)
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        # Tell the client to wait 5 seconds before reconnecting after a drop.
+        message = b'retry: 5000\n\n'
+        while message is not CLOSE:
+            await send({'type': 'http.response.body', 'body': message, 'more_body': True})
+            try:
+                message = await asyncio.wait_for(subscriber.get(), heartbeat)
+            except asyncio.TimeoutError:
+                message = b': ping\n\n'
+        if not disconnected:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        broker.unsubscribe(subscriber)
+        watcher.cancel()
@@ -0,0 +1,53 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from scrumboard.api import ListViewSet
+from scrumboard.models import Card, List
+from scrumboard.serializers import ListSerializer, serialize_lists
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures serialization time and query count of the scrumboard lists '
+        'endpoint on generated boards. The data is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000],
+                            help='Numbers of lists to benchmark with.')
+        parser.add_argument('--cards', type=int, default=10,
+                            help='Number of cards per list.')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of times each serialization is run.')
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            with transaction.atomic():
+                self.create_board(size, options['cards'])
+                self.benchmark(size, options['repeat'])
+                transaction.set_rollback(True)
+
+    def create_board(self, size, cards_per_list):
+        List.objects.bulk_create([List(name='List {0}'.format(num)) for num in range(size)], batch_size=500)
+        Card.objects.bulk_create(
+            [Card(list_id=list_id, title='Card {0}'.format(num), description='Description ' * 10,
+                  story_points=num % 8, buisness_value=num % 5)
+             for list_id in List.objects.values_list('id', flat=True) for num in range(cards_per_list)],
+            batch_size=500,
+        )
+
+    def benchmark(self, size, repeat):
+        serializations = [
+            ('drf, no prefetch (old)', lambda: ListSerializer(List.objects.all(), many=True).data),
+            ('drf + prefetch', lambda: ListSerializer(ListViewSet.queryset.all(), many=True).data),
+            ('serialize_lists', lambda: serialize_lists(List.objects.all())),
+        ]
+        self.stdout.write('{0} lists:'.format(size))
+        for label, serialize in serializations:
+            with CaptureQueriesContext(connection) as queries:
+                serialize()
+            seconds = timeit.timeit(serialize, number=repeat) / repeat
+            self.stdout.write('  {0:<24} {1:9.2f} ms {2:6d} queries'.format(label, seconds * 1000, len(queries)))
@@ -0,0 +1,21 @@
+# Generated by Django 2.0.13 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrumboard', '0002_board_revisions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['list', 'story_points'], name='scrumboard_card_points_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['list', 'buisness_value'], name='scrumboard_card_value_idx'),
+        ),
+    ]
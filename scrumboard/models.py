@@ -1,19 +1,153 @@
-from django.db import models
+import threading
+from contextlib import contextmanager
 
+from django.db import models, transaction
 
-class List(models.Model):
+
+class Revision(models.Model):
+    """
+    Single row holding the current board revision, see scrumboard/sync.py.
+    """
+    ROW_ID = 1
+
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def bump(cls):
+        """
+        Returns a new board revision, greater than all previous ones. Call it
+        in the transaction that writes the rows stamped with the revision.
+        """
+        with transaction.atomic(savepoint=False):
+            if not cls.objects.filter(pk=cls.ROW_ID).update(value=models.F('value') + 1):
+                # The row is created by a migration, but manage.py flush removes it.
+                cls.objects.get_or_create(pk=cls.ROW_ID)
+                cls.objects.filter(pk=cls.ROW_ID).update(value=models.F('value') + 1)
+            return cls.current()
+
+    @classmethod
+    def current(cls):
+        value = cls.objects.filter(pk=cls.ROW_ID).values_list('value', flat=True).first()
+        if value is None:
+            value = cls.objects.get_or_create(pk=cls.ROW_ID)[0].value
+        return value
+
+
+# Tombstones queued by the deletions running in tombstone_batch(), per thread.
+_pending = threading.local()
+
+
+@contextmanager
+def tombstone_batch():
+    """
+    Runs the block in a transaction and writes the tombstones of the lists
+    and cards it deletes at the end, stamped with a single revision, with
+    one INSERT.
+    """
+    if getattr(_pending, 'tombstones', None) is not None:
+        # Nested in another batch, which writes the tombstones.
+        yield
+        return
+    _pending.tombstones = []
+    try:
+        with transaction.atomic():
+            yield
+            if _pending.tombstones:
+                revision = Revision.bump()
+                for tombstone in _pending.tombstones:
+                    tombstone.revision = revision
+                Tombstone.objects.bulk_create(_pending.tombstones)
+    finally:
+        _pending.tombstones = None
+
+
+class RevisionedQuerySet(models.QuerySet):
+
+    def delete(self):
+        with tombstone_batch():
+            return super(RevisionedQuerySet, self).delete()
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class RevisionedModel(models.Model):
+    """
+    Model stamped with a new board revision every time it is saved.
+    """
+    revision = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    objects = RevisionedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # The revision row stays locked until the row stamped with it is
+        # written and committed, see scrumboard/sync.py.
+        with transaction.atomic():
+            self.revision = Revision.bump()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'revision'}
+            super(RevisionedModel, self).save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        # Deleting a list also deletes its cards.
+        with tombstone_batch():
+            return super(RevisionedModel, self).delete(*args, **kwargs)
+
+
+class List(RevisionedModel):
     name = models.CharField(max_length=50)
 
     def __str__(self):
         return "List: {}".format(self.name)
 
 
-class Card(models.Model):
+class Card(RevisionedModel):
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     list = models.ForeignKey(List, related_name="cards", on_delete=models.CASCADE)
     story_points = models.IntegerField(null=True, blank=True)
     buisness_value = models.IntegerField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Sorting and filtering a list's cards, see CardViewSet.
+            models.Index(fields=['list', 'story_points'], name='scrumboard_card_points_idx'),
+            models.Index(fields=['list', 'buisness_value'], name='scrumboard_card_value_idx'),
+        ]
+
     def __str__(self):
         return "Card: {}".format(self.title)
+
+
+class Tombstone(models.Model):
+    """
+    Records a deleted list or card so that clients syncing later learn about it.
+    """
+    LIST = 'list'
+    CARD = 'card'
+    KINDS = (
+        (LIST, 'List'),
+        (CARD, 'Card'),
+    )
+
+    kind = models.CharField(max_length=4, choices=KINDS)
+    object_id = models.IntegerField()
+    revision = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return "Deleted {} {}".format(self.kind, self.object_id)
+
+    @classmethod
+    def record(cls, kind, object_id):
+        """
+        Records a deletion, in the current tombstone_batch() if any.
+        """
+        tombstone = cls(kind=kind, object_id=object_id)
+        if getattr(_pending, 'tombstones', None) is not None:
+            _pending.tombstones.append(tombstone)
+        else:
+            with transaction.atomic():
+                tombstone.revision = Revision.bump()
+                tombstone.save()
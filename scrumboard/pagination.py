@@ -0,0 +1,111 @@
+import binascii
+import json
+from base64 import b64decode, b64encode
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class BoardCursorPagination(CursorPagination):
+    """
+    Cursor pagination by id for the scrumboard endpoints. Pages stay stable
+    while cards are added or moved, and each page is a single indexed query
+    however deep the client pages.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        self.page_size = getattr(settings, 'SCRUMBOARD_PAGE_SIZE', 100)
+        return super(BoardCursorPagination, self).get_page_size(request)
+
+
+def nulls_sort_first():
+    """
+    Tells whether the database sorts NULLs before other values, like SQLite
+    and MySQL do and PostgreSQL and Oracle don't.
+    """
+    return connection.vendor in ('sqlite', 'mysql')
+
+
+def keyset_ordering(name, descending):
+    """
+    Returns the order_by() arguments of the (field, id) keyset, with NULLs
+    first in ascending order and last in descending order. Spelled out only
+    where that isn't the database's own order, which an index can serve.
+    """
+    if nulls_sort_first():
+        field = F(name).desc() if descending else F(name).asc()
+    else:
+        field = F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_first=True)
+    return [field, '-id' if descending else 'id']
+
+
+def keyset_after(name, descending, value, pk):
+    """
+    Returns the filter for the rows after the (value, pk) position in the
+    keyset_ordering() order.
+    """
+    if descending:
+        if value is None:
+            return Q(**{name + '__isnull': True, 'id__lt': pk})
+        return Q(**{name + '__lt': value}) | Q(**{name: value, 'id__lt': pk}) | Q(**{name + '__isnull': True})
+    if value is None:
+        return Q(**{name + '__isnull': True, 'id__gt': pk}) | Q(**{name + '__isnull': False})
+    return Q(**{name + '__gt': value}) | Q(**{name: value, 'id__gt': pk})
+
+
+class CardCursorPagination(BoardCursorPagination):
+    """
+    Also pages cards ordered by a nullable, non-unique field such as
+    story_points, which CursorPagination can't. Those pages are keyed on
+    (field, id), the order the Card (list, field) indexes are in, and only
+    have next links.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.sort_field = view.get_sort_field()
+        if self.sort_field is None:
+            return super(CardCursorPagination, self).paginate_queryset(queryset, request, view)
+        name, descending = self.sort_field.lstrip('-'), self.sort_field.startswith('-')
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position = self.decode_position(request)
+        if position is not None:
+            queryset = queryset.filter(keyset_after(name, descending, *position))
+        results = list(queryset.order_by(*keyset_ordering(name, descending))[:self.page_size + 1])
+        page = results[:self.page_size]
+        self.next_position = None
+        if len(results) > self.page_size:
+            self.next_position = [getattr(page[-1], name), page[-1].pk]
+        return page
+
+    def decode_position(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            value, pk = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if not isinstance(pk, int) or not isinstance(value, (int, str, type(None))):
+                raise ValueError
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def get_next_link(self):
+        if self.sort_field is None:
+            return super(CardCursorPagination, self).get_next_link()
+        if self.next_position is None:
+            return None
+        encoded = b64encode(json.dumps(self.next_position).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_previous_link(self):
+        if self.sort_field is None:
+            return super(CardCursorPagination, self).get_previous_link()
+        return None
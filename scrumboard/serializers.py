@@ -1,15 +1,80 @@
+from collections import defaultdict
+
 from rest_framework import serializers
 
 from .models import Card, List
 
-class CardSerializer(serializers.ModelSerializer):
+
+class SparseFieldsMixin(object):
+    """
+    Serializer that only outputs the field names passed as `fields`, all of
+    them when it is None.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super(SparseFieldsMixin, self).__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Card
         fields = '__all__'
 
-class ListSerializer(serializers.ModelSerializer):
+class ListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     cards = CardSerializer(read_only=True, many=True)
     class Meta:
         model = List
         fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        card_fields = kwargs.pop('card_fields', None)
+        super(ListSerializer, self).__init__(*args, **kwargs)
+        if card_fields is not None and 'cards' in self.fields:
+            self.fields['cards'] = CardSerializer(read_only=True, many=True, fields=card_fields)
+
+
+class BulkCardSerializer(CardSerializer):
+    """
+    CardSerializer for the bulk endpoints. The list is checked against the
+    list ids passed in the context instead of with one query per card.
+    """
+    list = serializers.IntegerField(source='list_id')
+
+    def validate_list(self, value):
+        if value not in self.context['list_ids']:
+            raise serializers.ValidationError('Invalid pk "{0}" - object does not exist.'.format(value))
+        return value
+
+
+# Fields in the order ListSerializer and CardSerializer output them.
+CARD_FIELDS = ('id', 'revision', 'title', 'description', 'story_points', 'buisness_value', 'list')
+
+
+# Fields in the order ListSerializer outputs them.
+LIST_FIELDS = ('id', 'cards', 'revision', 'name')
+
+
+def serialize_lists(lists, fields=None, card_fields=None):
+    """
+    Read-only equivalent of ListSerializer(lists, many=True, fields=fields,
+    card_fields=card_fields).data. The cards of all lists are fetched with a
+    single values() query and turned into dicts directly, skipping model
+    instances and DRF field handling.
+    """
+    lists = list(lists)
+    fields = [name for name in LIST_FIELDS if fields is None or name in fields]
+    cards_by_list = defaultdict(list)
+    if 'cards' in fields:
+        card_fields = [name for name in CARD_FIELDS if card_fields is None or name in card_fields]
+        cards = Card.objects.filter(list__in=[board_list.id for board_list in lists]).order_by('id')
+        for card in cards.values_list('list', *card_fields):
+            cards_by_list[card[0]].append(dict(zip(card_fields, card[1:])))
+    return [
+        {name: cards_by_list[board_list.id] if name == 'cards' else getattr(board_list, name) for name in fields}
+        for board_list in lists
+    ]
@@ -0,0 +1,39 @@
+"""
+Delta sync for the scrumboard.
+
+Every save of a list or card stamps it with the next board revision, taken
+from the single Revision row, and every deletion leaves a Tombstone with its
+revision (see scrumboard/signals.py). Clients take the current revision
+from /scrumboard/sync/ before loading the board, then ask
+/scrumboard/sync/?since=<revision> for what changed after it and move on to
+the revision returned. The highest revision among the rows they load
+can't be used instead: the board is loaded a page at a time, and the rows
+not loaded yet may have changed before it.
+
+Bumping the revision row locks it until the surrounding transaction ends.
+Every bump runs in the same transaction as the writes stamped with it
+(RevisionedModel.save(), the bulk endpoints, tombstone_batch()), so
+revisions become visible in increasing order and a client can't skip a
+change. Deleting lists and cards in bulk, or a list with its cards, writes
+their tombstones with one bump and one INSERT.
+"""
+from .models import Card, List, Revision, Tombstone
+from .serializers import CARD_FIELDS
+
+
+def changes_since(since):
+    """
+    Returns the lists and cards changed, and the ids of those deleted, after
+    revision since and up to the current revision.
+    """
+    revision = Revision.current()
+    window = {'revision__gt': since, 'revision__lte': revision}
+    deleted = {Tombstone.LIST: [], Tombstone.CARD: []}
+    for kind, object_id in Tombstone.objects.filter(**window).order_by('revision').values_list('kind', 'object_id'):
+        deleted[kind].append(object_id)
+    return {
+        'revision': revision,
+        'lists': list(List.objects.filter(**window).order_by('id').values('id', 'revision', 'name')),
+        'cards': list(Card.objects.filter(**window).order_by('id').values(*CARD_FIELDS)),
+        'deleted': {'lists': deleted[Tombstone.LIST], 'cards': deleted[Tombstone.CARD]},
+    }
@@ -1,3 +1,464 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .events import broker, event_stream
+from .models import Card, List, Revision, Tombstone
+from .pagination import keyset_ordering
+from .serializers import ListSerializer, serialize_lists
+
+
+class ListsApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', password='12345')
+        for list_num in range(5):
+            board_list = List.objects.create(name='List {0}'.format(list_num))
+            for card_num in range(4):
+                Card.objects.create(list=board_list, title='Card {0}'.format(card_num), description='Description',
+                                    story_points=card_num or None, buisness_value=list_num)
+        List.objects.create(name='Empty list')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_serialize_lists_matches_drf_serializer(self):
+        expected = ListSerializer(List.objects.order_by('id'), many=True).data
+        self.assertEqual(serialize_lists(List.objects.order_by('id')), expected)
+
+    def test_fast_and_drf_responses_match(self):
+        fast = self.client.get(reverse('scrumboard:list-list'))
+        with override_settings(SCRUMBOARD_FAST_SERIALIZATION=False):
+            drf = self.client.get(reverse('scrumboard:list-list'))
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.json(), drf.json())
+
+    def test_query_count_does_not_depend_on_number_of_lists(self):
+        # Session, user, lists and cards.
+        with self.assertNumQueries(4):
+            self.client.get(reverse('scrumboard:list-list'))
+        with override_settings(SCRUMBOARD_FAST_SERIALIZATION=False), self.assertNumQueries(4):
+            self.client.get(reverse('scrumboard:list-list'))
+
+    @override_settings(SCRUMBOARD_PAGE_SIZE=2)
+    def test_lists_are_cursor_paginated(self):
+        names, url = [], reverse('scrumboard:list-list')
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 2)
+            names.extend(board_list['name'] for board_list in page['results'])
+            url = page['next']
+        self.assertEqual(names, list(List.objects.order_by('id').values_list('name', flat=True)))
+
+    def test_sparse_fields(self):
+        params = {'fields': 'id,name,cards', 'card_fields': 'id,title,story_points'}
+        fast = self.client.get(reverse('scrumboard:list-list'), params)
+        with override_settings(SCRUMBOARD_FAST_SERIALIZATION=False):
+            drf = self.client.get(reverse('scrumboard:list-list'), params)
+        self.assertEqual(fast.json(), drf.json())
+        board_list = fast.json()['results'][0]
+        self.assertEqual(list(board_list), ['id', 'cards', 'name'])
+        self.assertEqual(list(board_list['cards'][0]), ['id', 'title', 'story_points'])
+
+    def test_sparse_fields_trim_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse('scrumboard:card-list'), {'fields': 'id,title'})
+        self.assertEqual(list(resp.json()['results'][0]), ['id', 'title'])
+        cards_query = queries[-1]['sql']
+        self.assertIn('"title"', cards_query)
+        self.assertNotIn('"description"', cards_query)
+
+    def test_lists_without_cards_skip_the_cards_query(self):
+        with override_settings(SCRUMBOARD_FAST_SERIALIZATION=False), self.assertNumQueries(3):
+            resp = self.client.get(reverse('scrumboard:list-list'), {'fields': 'id,name'})
+        self.assertEqual(list(resp.json()['results'][0]), ['id', 'name'])
+
+    def test_unknown_field(self):
+        resp = self.client.get(reverse('scrumboard:card-list'), {'fields': 'id,secret'})
+        self.assertEqual(resp.status_code, 400)
+
+
+class CardFilterApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', password='12345')
+        cls.todo = List.objects.create(name='To do')
+        cls.done = List.objects.create(name='Done')
+        points = [3, None, 1, 3, None, 8, 1, 3, None, 5]
+        for num, story_points in enumerate(points):
+            Card.objects.create(list=cls.todo, title='Card {0}'.format(num % 4), story_points=story_points,
+                                buisness_value=num % 3 or None)
+        Card.objects.create(list=cls.done, title='Done card', story_points=2)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_all(self, **params):
+        ids, url = [], reverse('scrumboard:card-list')
+        params.setdefault('page_size', 3)
+        while url:
+            resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, 200)
+            ids.extend(card['id'] for card in resp.json()['results'])
+            url, params = resp.json()['next'], {}
+        return ids
+
+    def expected(self, cards, name, descending):
+        # NULLs first in ascending order and last in descending order, ties by id.
+        def key(card):
+            value = getattr(card, name)
+            return (value is not None, value if value is not None else 0, card.pk)
+        return [card.pk for card in sorted(cards, key=key, reverse=descending)]
+
+    def test_orderings_page_through_every_card(self):
+        cards = list(Card.objects.filter(list=self.todo))
+        for name in ('title', 'story_points', 'buisness_value'):
+            for descending in (False, True):
+                ordering = ('-' if descending else '') + name
+                with self.subTest(ordering=ordering):
+                    ids = self.get_all(list=self.todo.pk, ordering=ordering)
+                    self.assertEqual(ids, self.expected(cards, name, descending))
+
+    def test_filters(self):
+        self.assertEqual(len(self.get_all(list=self.todo.pk)), 10)
+        self.assertEqual(len(self.get_all(story_points_min=3)), 5)
+        self.assertEqual(len(self.get_all(list=self.todo.pk, story_points_min=2, story_points_max=5)), 4)
+        self.assertEqual(len(self.get_all(buisness_value_max=1)), 3)
+        self.assertEqual(len(self.get_all(search='done')), 1)
+
+    def test_invalid_parameters(self):
+        invalid = (
+            ({'ordering': 'description'}, 400),
+            ({'story_points_min': 'many'}, 400),
+            ({'ordering': 'story_points', 'cursor': 'garbage'}, 404),
+        )
+        for params, status_code in invalid:
+            with self.subTest(params=params):
+                resp = self.client.get(reverse('scrumboard:card-list'), params)
+                self.assertEqual(resp.status_code, status_code)
+
+    def test_sorted_list_uses_index(self):
+        for name in ('story_points', 'buisness_value'):
+            queryset = Card.objects.filter(list=self.todo).order_by(*keyset_ordering(name, True))
+            with connection.cursor() as cursor:
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+            self.assertIn('scrumboard_card_', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+
+class BulkCardsApiTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='12345')
+        self.client.force_login(self.user)
+        self.todo = List.objects.create(name='To do')
+        self.done = List.objects.create(name='Done')
+        self.cards = [Card.objects.create(list=self.todo, title='Card {0}'.format(num)) for num in range(3)]
+        self.url = reverse('scrumboard:card-bulk')
+
+    def test_bulk_create(self):
+        data = [{'title': 'New {0}'.format(num), 'list': self.done.pk, 'story_points': num} for num in range(5)]
+        resp = self.client.post(self.url, json.dumps(data), content_type='application/json')
+        self.assertEqual(resp.status_code, 201)
+        created = resp.json()
+        self.assertEqual([card['title'] for card in created], [item['title'] for item in data])
+        for card in created:
+            self.assertEqual(Card.objects.get(pk=card['id']).title, card['title'])
+        self.assertEqual(self.done.cards.count(), 5)
+
+    def test_bulk_create_validates_every_card(self):
+        data = [{'title': 'Good', 'list': self.done.pk}, {'title': 'Bad', 'list': 999}]
+        resp = self.client.post(self.url, json.dumps(data), content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(Card.objects.count(), 3)
+
+    def test_bulk_update_runs_one_update(self):
+        data = [
+            {'id': self.cards[0].pk, 'title': 'Renamed'},
+            {'id': self.cards[1].pk, 'list': self.done.pk, 'description': 'Moved'},
+        ]
+        # Session, user, lists, cards, savepoint, revision bump and read,
+        # update, release.
+        with self.assertNumQueries(9):
+            resp = self.client.patch(self.url, json.dumps(data), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        first, second, third = [Card.objects.get(pk=card.pk) for card in self.cards]
+        self.assertEqual((first.title, first.list_id), ('Renamed', self.todo.pk))
+        self.assertEqual((second.title, second.list_id, second.description), ('Card 1', self.done.pk, 'Moved'))
+        self.assertEqual((third.title, third.list_id), ('Card 2', self.todo.pk))
+
+    def test_bulk_update_unknown_card(self):
+        data = [{'id': self.cards[0].pk, 'title': 'Renamed'}, {'id': 999, 'title': 'Missing'}]
+        resp = self.client.patch(self.url, json.dumps(data), content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(Card.objects.get(pk=self.cards[0].pk).title, 'Card 0')
+
+    def test_bulk_update_writes_changed_fields_only(self):
+        revision = Card.objects.get(pk=self.cards[1].pk).revision
+        data = [{'id': self.cards[0].pk, 'title': 'Renamed'}, {'id': self.cards[1].pk, 'title': 'Card 1'}]
+        with CaptureQueriesContext(connection) as context:
+            resp = self.client.patch(self.url, json.dumps(data), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        [update] = [query['sql'] for query in context if query['sql'].startswith('UPDATE "scrumboard_card"')]
+        self.assertNotIn('"description"', update)
+        self.assertNotIn('"id" = {0}'.format(self.cards[1].pk), update.split('WHERE')[0])
+        self.assertEqual(Card.objects.get(pk=self.cards[1].pk).revision, revision)
+
+    def test_invalid_ids(self):
+        card_id = self.cards[0].pk
+        requests = (
+            ('delete', self.url, ['abc']),
+            ('delete', self.url, [True]),
+            ('patch', self.url, [{'id': card_id, 'list': 'abc'}]),
+            ('patch', self.url, [{'id': [1], 'title': 'Renamed'}]),
+            ('patch', self.url, [{'id': 2 ** 70, 'title': 'Renamed'}]),
+            ('post', self.url, [{'title': 'New', 'list': 'abc'}]),
+            ('post', reverse('scrumboard:card-move'), {'list': self.done.pk, 'cards': ['abc']}),
+            ('post', reverse('scrumboard:card-move'), {'list': 'abc', 'cards': [card_id]}),
+        )
+        for method, url, data in requests:
+            with self.subTest(method=method, data=data):
+                resp = getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+                self.assertEqual(resp.status_code, 400)
+        self.assertEqual(Card.objects.count(), 3)
+
+    def test_bulk_delete(self):
+        ids = [self.cards[0].pk, self.cards[2].pk]
+        resp = self.client.delete(self.url, json.dumps(ids), content_type='application/json')
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(list(Card.objects.values_list('pk', flat=True)), [self.cards[1].pk])
+        tombstones = Tombstone.objects.values_list('object_id', 'revision')
+        self.assertEqual(sorted(object_id for object_id, revision in tombstones), ids)
+        self.assertEqual(len({revision for object_id, revision in tombstones}), 1)
+
+    def test_move(self):
+        data = {'list': self.done.pk, 'cards': [card.pk for card in self.cards[:2]]}
+        resp = self.client.post(reverse('scrumboard:card-move'), json.dumps(data), content_type='application/json')
+        self.assertEqual(resp.json(), {'list': self.done.pk, 'moved': 2})
+        self.assertEqual(self.done.cards.count(), 2)
+
+    def test_move_to_unknown_list(self):
+        data = {'list': 999, 'cards': [self.cards[0].pk]}
+        resp = self.client.post(reverse('scrumboard:card-move'), json.dumps(data), content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+
+
+class SyncApiTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='12345')
+        self.client.force_login(self.user)
+        self.todo = List.objects.create(name='To do')
+        self.card = Card.objects.create(list=self.todo, title='Card')
+
+    def sync(self, since):
+        resp = self.client.get(reverse('scrumboard:sync'), {'since': since})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_revisions_increase_on_every_save(self):
+        revision = self.card.revision
+        self.card.title = 'Renamed'
+        self.card.save(update_fields=['title'])
+        self.assertGreater(Card.objects.get(pk=self.card.pk).revision, revision)
+        self.assertGreater(revision, self.todo.revision)
+
+    def test_full_sync(self):
+        delta = self.sync(0)
+        self.assertEqual(delta['revision'], Revision.current())
+        self.assertEqual([board_list['name'] for board_list in delta['lists']], ['To do'])
+        self.assertEqual([card['title'] for card in delta['cards']], ['Card'])
+
+    def test_current_revision(self):
+        resp = self.client.get(reverse('scrumboard:sync'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {'revision': Revision.current()})
+
+    def test_nothing_changed(self):
+        revision = self.sync(0)['revision']
+        self.assertEqual(self.sync(revision), {
+            'revision': revision, 'lists': [], 'cards': [], 'deleted': {'lists': [], 'cards': []},
+        })
+
+    def test_only_changes_are_returned(self):
+        other = Card.objects.create(list=self.todo, title='Other')
+        revision = self.sync(0)['revision']
+        self.card.title = 'Renamed'
+        self.card.save()
+        delta = self.sync(revision)
+        self.assertEqual(delta['lists'], [])
+        self.assertEqual([card['title'] for card in delta['cards']], ['Renamed'])
+        self.assertGreater(delta['revision'], revision)
+
+    def test_bulk_changes_are_returned(self):
+        revision = self.sync(0)['revision']
+        done = List.objects.create(name='Done')
+        self.client.post(reverse('scrumboard:card-move'), json.dumps({'list': done.pk, 'cards': [self.card.pk]}),
+                         content_type='application/json')
+        self.client.post(reverse('scrumboard:card-bulk'), json.dumps([{'title': 'New', 'list': done.pk}]),
+                         content_type='application/json')
+        delta = self.sync(revision)
+        self.assertEqual([board_list['name'] for board_list in delta['lists']], ['Done'])
+        self.assertEqual([(card['title'], card['list']) for card in delta['cards']], [('Card', done.pk), ('New', done.pk)])
+
+    def test_deletes_are_returned(self):
+        revision = self.sync(0)['revision']
+        list_id, card_id = self.todo.pk, self.card.pk
+        self.todo.delete()
+        delta = self.sync(revision)
+        self.assertEqual(delta['deleted'], {'lists': [list_id], 'cards': [card_id]})
+
+    def test_deletes_share_a_revision(self):
+        for num in range(3):
+            Card.objects.create(list=self.todo, title='Card {0}'.format(num))
+        revision = Revision.current()
+        with CaptureQueriesContext(connection) as context:
+            self.todo.delete()
+        # The list and its four cards get one revision, written with one INSERT.
+        self.assertEqual(Revision.current(), revision + 1)
+        self.assertEqual(sum('INSERT INTO "scrumboard_tombstone"' in query['sql'] for query in context), 1)
+        self.assertEqual(len(self.sync(revision)['deleted']['cards']), 4)
+
+    def test_missing_revision_row(self):
+        # manage.py flush removes the row created by the migrations.
+        Revision.objects.all().delete()
+        self.assertEqual(Revision.current(), 0)
+        Revision.objects.all().delete()
+        self.assertEqual(Revision.bump(), 1)
+        self.assertEqual(Card.objects.create(list=self.todo, title='New').revision, 2)
+
+    def test_invalid_since(self):
+        resp = self.client.get(reverse('scrumboard:sync'), {'since': 'yesterday'})
+        self.assertEqual(resp.status_code, 400)
+
+
+class FakeConnection(object):
+    """
+    Client side of an ASGI HTTP connection to the event stream.
+    """
+
+    def __init__(self, headers, slow=False):
+        self.scope = {'type': 'http', 'method': 'GET', 'path': '/scrumboard/events/', 'headers': headers}
+        self.messages = []
+        self.events = 0
+        self.slow = slow
+        self.disconnected = asyncio.Event()
+        self.unblocked = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.messages.append(message)
+        if message.get('body', b'').startswith(b'data: '):
+            self.events += 1
+            if self.slow:
+                # Stop reading after the first event, like a stalled client.
+                await self.unblocked.wait()
+
+    def finished(self):
+        return self.messages and self.messages[-1].get('more_body') is False
+
+
+class EventStreamTests(TransactionTestCase):
+    """
+    Drives go.asgi's event stream endpoint with in-process connections.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='12345')
+        self.client.force_login(self.user)
+        cookie = '{0}={1}'.format(settings.SESSION_COOKIE_NAME, self.client.cookies[settings.SESSION_COOKIE_NAME].value)
+        self.headers = [(b'cookie', cookie.encode('latin-1'))]
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def wait_until(self, condition, timeout=60):
+        async def wait():
+            deadline = time.monotonic() + timeout
+            while not condition():
+                self.assertLess(time.monotonic(), deadline, 'Timed out')
+                await asyncio.sleep(0.01)
+        self.loop.run_until_complete(wait())
+
+    def start(self, connections):
+        return [asyncio.ensure_future(event_stream(conn.scope, conn.receive, conn.send), loop=self.loop)
+                for conn in connections]
+
+    def publish(self, count):
+        for num in range(count):
+            broker.publish({'lists': [], 'cards': [{'id': num}], 'deleted': {'lists': [], 'cards': []}})
+
+    def disconnect(self, connections, tasks):
+        for conn in connections:
+            conn.disconnected.set()
+            conn.unblocked.set()
+        self.loop.run_until_complete(asyncio.gather(*tasks))
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_anonymous_connection_is_refused(self):
+        conn = FakeConnection(headers=[])
+        self.loop.run_until_complete(event_stream(conn.scope, conn.receive, conn.send))
+        self.assertEqual(conn.messages[0]['status'], 403)
+
+    def test_thousand_listeners(self):
+        listeners, events = 1000, 20
+        connections = [FakeConnection(self.headers) for num in range(listeners)]
+        tasks = self.start(connections)
+        self.wait_until(lambda: broker.subscriber_count() == listeners)
+        started = time.monotonic()
+        # Publish from another thread, like a request handled by the WSGI pool.
+        self.loop.run_until_complete(self.loop.run_in_executor(None, self.publish, events))
+        self.wait_until(lambda: all(conn.events == events for conn in connections))
+        elapsed = time.monotonic() - started
+        self.assertTrue(all(conn.messages[0]['status'] == 200 for conn in connections))
+        self.assertLess(elapsed, 30)
+        self.disconnect(connections, tasks)
+
+    @override_settings(SCRUMBOARD_EVENTS_QUEUE_SIZE=5)
+    def test_slow_listener_is_dropped(self):
+        fast, slow = FakeConnection(self.headers), FakeConnection(self.headers, slow=True)
+        tasks = self.start([fast, slow])
+        self.wait_until(lambda: broker.subscriber_count() == 2)
+        for sent in range(4, 24, 4):
+            # Batches smaller than the queue, so only the stalled listener falls behind.
+            self.publish(4)
+            self.wait_until(lambda: fast.events == sent)
+        slow.unblocked.set()
+        # The slow listener's stream ends instead of delivering the backlog.
+        self.wait_until(slow.finished)
+        self.assertEqual(slow.events, 1)
+        self.assertEqual(broker.subscriber_count(), 1)
+        self.disconnect([fast], tasks[:1])
+        self.loop.run_until_complete(tasks[1])
+
+    def test_card_changes_are_published(self):
+        conn = FakeConnection(self.headers)
+        tasks = self.start([conn])
+        self.wait_until(lambda: broker.subscriber_count() == 1)
+        todo = List.objects.create(name='To do')
+        resp = self.client.post(reverse('scrumboard:card-list'), {'title': 'Pushed', 'list': todo.pk})
+        self.assertEqual(resp.status_code, 201)
+        self.client.delete(reverse('scrumboard:card-detail', args=(resp.json()['id'],)))
+        self.wait_until(lambda: conn.events == 2)
+        created, deleted = [json.loads(message['body'][len(b'data: '):]) for message in conn.messages
+                            if message.get('body', b'').startswith(b'data: ')]
+        self.assertEqual(created['cards'][0]['title'], 'Pushed')
+        self.assertEqual(deleted['deleted']['cards'], [resp.json()['id']])
+        self.disconnect([conn], tasks)
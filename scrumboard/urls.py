@@ -1,7 +1,7 @@
 from rest_framework.routers import DefaultRouter, SimpleRouter
 from django.urls import re_path, path, include
 from django.views.generic import TemplateView
-from .api import ListViewSet, CardViewSet
+from .api import ListViewSet, CardViewSet, SyncView
 from django.views.decorators.csrf import ensure_csrf_cookie
 
 # router = SimpleRouter()
@@ -12,5 +12,6 @@ router.register(r'cards', CardViewSet)
 app_name = 'scrumboard'
 urlpatterns = [
     path('', ensure_csrf_cookie(TemplateView.as_view(template_name="scrumboard/index.html")), name="index"),
+    path('sync/', SyncView.as_view(), name="sync"),
 ]
 urlpatterns += router.urls